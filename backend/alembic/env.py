@@ -0,0 +1,52 @@
+from logging.config import fileConfig # per i log di Alembic definiti in alembic.ini
+from alembic import context # contesto della migrazione in corso
+from app.database import Base, engine # modelli e engine sincrono (le migrazioni non usano l'event loop)
+
+# importo tutti i modelli, così Base.metadata descrive lo schema completo (per "alembic revision --autogenerate")
+from app.models import user_db, travel_db, day_db, chat_db, chat_message_db, geocode_db, travel_stats_db # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+# modalità offline: scrive l'SQL delle migrazioni senza collegarsi al database (alembic upgrade head --sql)
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# render_as_batch: su SQLite le modifiche ai vincoli ricreano la tabella (ALTER TABLE è limitato)
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# modalità online: applica le migrazioni al database configurato in DATABASE_URL
+# oppure alla connessione passata in config.attributes["connection"] (es. dai test su un database di prova)
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    with engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,78 @@
+"""schema iniziale (utenti, viaggi, tappe, chat) come in travelapp.sql
+
+Le revisioni successive portano lo schema a quello dei modelli, compresi i passaggi che spostano o convertono
+i dati. Un database creato con travelapp.sql (o dal vecchio create_all dell'app) non va ricreato:
+basta segnarlo con "alembic stamp 0001" e poi eseguire "alembic upgrade head".
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# colonna data/ora: TIMESTAMP su MySQL come nel resto dello schema
+def timestamp():
+    return sa.DateTime(timezone=True).with_variant(mysql.TIMESTAMP(), "mysql")
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("surname", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), unique=True, nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("experiences", sa.JSON(), nullable=True),
+        sa.Column("photo", sa.String(255), nullable=True),
+        sa.Column("registration_date", timestamp(), server_default=sa.func.now(), nullable=True),
+    )
+
+    # date in formato testo (DD-MM-YYYY o YYYY-MM-DD): diventano colonne DATE con la revisione 0011
+    op.create_table(
+        "travels",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("town", sa.String(255), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.String(255), nullable=False),
+        sa.Column("end_date", sa.String(255), nullable=False),
+        sa.Column("general_vote", sa.Float(), nullable=True),
+        sa.Column("votes", sa.JSON(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    op.create_table(
+        "days",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("city", sa.String(255), nullable=False),
+        sa.Column("date", sa.String(255), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("experiences", sa.JSON(), nullable=True),
+        sa.Column("photo", sa.JSON(), nullable=True),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lng", sa.Float(), nullable=True),
+        sa.Column("travel_id", sa.Integer(), sa.ForeignKey("travels.id", ondelete="CASCADE"), nullable=False),
+    )
+
+    # messaggi in una colonna JSON (lista di {"user", "ai"}): passano nella tabella chat_messages con la revisione 0004
+    op.create_table(
+        "chats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("messages", sa.JSON(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    )
+
+
+def downgrade():
+    for table in ("chats", "days", "travels", "users"):
+        op.drop_table(table)
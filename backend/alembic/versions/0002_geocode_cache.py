@@ -0,0 +1,40 @@
+"""cache delle coordinate trovate dal geocoding
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+# colonna data/ora: TIMESTAMP su MySQL come nel resto dello schema
+def timestamp():
+    return sa.DateTime(timezone=True).with_variant(mysql.TIMESTAMP(), "mysql")
+
+
+# valore di default "adesso"; su MySQL la colonna si aggiorna anche a ogni modifica della riga
+def now(on_update: bool = False):
+    if on_update and op.get_bind().dialect.name == "mysql":
+        return sa.text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    return sa.func.now()
+
+
+def upgrade():
+    op.create_table(
+        "geocode_cache",
+        sa.Column("query", sa.String(255), primary_key=True),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lng", sa.Float(), nullable=True),
+        sa.Column("updated_at", timestamp(), server_default=now(on_update=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("geocode_cache")
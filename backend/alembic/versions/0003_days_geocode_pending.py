@@ -0,0 +1,28 @@
+"""tappe in attesa del worker di geocoding
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("days", sa.Column("geocode_pending", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index("ix_days_geocode_pending", "days", ["geocode_pending"])
+
+    # le tappe esistenti senza coordinate vengono ricalcolate dal worker
+    days = sa.table("days", sa.column("lat"), sa.column("lng"), sa.column("geocode_pending", sa.Boolean()))
+    op.execute(days.update().where(sa.or_(days.c.lat.is_(None), days.c.lng.is_(None))).values(geocode_pending=True))
+
+
+def downgrade():
+    op.drop_index("ix_days_geocode_pending", table_name="days")
+    with op.batch_alter_table("days") as batch:
+        batch.drop_column("geocode_pending")
@@ -0,0 +1,92 @@
+"""messaggi delle chat in una tabella propria al posto della colonna JSON chats.messages
+
+La copia dei messaggi JSON è fatta in Python (non con JSON_TABLE) per funzionare anche su SQLite.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000 # righe inserite per ogni INSERT
+
+chats = sa.table("chats", sa.column("id", sa.Integer()), sa.column("messages", sa.JSON()))
+chat_messages = sa.table(
+    "chat_messages",
+    sa.column("id", sa.Integer()),
+    sa.column("chat_id", sa.Integer()),
+    sa.column("user_message", sa.Text()),
+    sa.column("ai_message", sa.Text()),
+)
+
+
+# colonna data/ora: TIMESTAMP su MySQL come nel resto dello schema
+def timestamp():
+    return sa.DateTime(timezone=True).with_variant(mysql.TIMESTAMP(), "mysql")
+
+
+# lista dei messaggi di una chat (la colonna può contenere anche il JSON come testo)
+def load_messages(value) -> list:
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value if isinstance(value, list) else []
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chat_id", sa.Integer(), sa.ForeignKey("chats.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_message", sa.Text(), nullable=False),
+        sa.Column("ai_message", sa.Text(), nullable=False),
+        sa.Column("created_at", timestamp(), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_chat_messages_chat_id_id", "chat_messages", ["chat_id", "id"])
+
+    # copio i messaggi esistenti mantenendo l'ordine della cronologia (chat per chat, poi posizione nella lista)
+    result = bind.execute(sa.select(chats.c.id, chats.c.messages).where(chats.c.messages.is_not(None)).order_by(chats.c.id))
+    rows = []
+    for chat_id, messages in result.all():
+        for message in load_messages(messages):
+            message = message if isinstance(message, dict) else {}
+            rows.append({
+                "chat_id": chat_id,
+                "user_message": message.get("user") or "",
+                "ai_message": message.get("ai") or "",
+            })
+    for first in range(0, len(rows), BATCH_SIZE):
+        op.bulk_insert(chat_messages, rows[first:first + BATCH_SIZE])
+
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("messages")
+
+
+def downgrade():
+    bind = op.get_bind()
+    with op.batch_alter_table("chats") as batch:
+        batch.add_column(sa.Column("messages", sa.JSON(), nullable=True))
+
+    # ricostruisco la lista JSON di ogni chat dai suoi messaggi, in ordine
+    messages: dict[int, list] = {}
+    result = bind.execute(
+        sa.select(chat_messages.c.chat_id, chat_messages.c.user_message, chat_messages.c.ai_message)
+        .order_by(chat_messages.c.chat_id, chat_messages.c.id)
+    )
+    for chat_id, user_message, ai_message in result.all():
+        messages.setdefault(chat_id, []).append({"user": user_message, "ai": ai_message})
+    if messages:
+        bind.execute(
+            chats.update().where(chats.c.id == sa.bindparam("chat")).values(messages=sa.bindparam("items", type_=sa.JSON())),
+            [{"chat": chat_id, "items": items} for chat_id, items in messages.items()],
+        )
+
+    op.drop_table("chat_messages")
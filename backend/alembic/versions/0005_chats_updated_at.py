@@ -0,0 +1,72 @@
+"""ultima attività e anteprima delle chat per la lista paginata
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+PREVIEW_LENGTH = 120 # caratteri dell'ultima risposta mostrati nella lista delle chat
+
+
+# colonna data/ora: TIMESTAMP su MySQL come nel resto dello schema
+def timestamp():
+    return sa.DateTime(timezone=True).with_variant(mysql.TIMESTAMP(), "mysql")
+
+
+# valore di default "adesso"; su MySQL la colonna si aggiorna anche a ogni modifica della riga
+def now(on_update: bool = False):
+    if on_update and op.get_bind().dialect.name == "mysql":
+        return sa.text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    return sa.func.now()
+
+
+def upgrade():
+    bind = op.get_bind()
+    # SQLite non aggiunge colonne con default CURRENT_TIMESTAMP: la tabella viene ricreata
+    with op.batch_alter_table("chats", recreate="always" if bind.dialect.name == "sqlite" else "auto") as batch:
+        batch.add_column(sa.Column("preview", sa.String(255), nullable=True))
+        batch.add_column(sa.Column("updated_at", timestamp(), server_default=now(on_update=True), nullable=False))
+    op.create_index("ix_chats_user_id_updated_at_id", "chats", ["user_id", "updated_at", "id"])
+
+    # le chat esistenti prendono data e anteprima dal loro ultimo messaggio
+    chats = sa.table("chats", sa.column("id", sa.Integer()), sa.column("preview", sa.String()), sa.column("updated_at", timestamp()))
+    messages = sa.table(
+        "chat_messages",
+        sa.column("id", sa.Integer()),
+        sa.column("chat_id", sa.Integer()),
+        sa.column("ai_message", sa.Text()),
+        sa.column("created_at", timestamp()),
+    )
+    last = sa.select(sa.func.max(messages.c.id).label("id")).group_by(messages.c.chat_id).subquery()
+    result = bind.execute(
+        sa.select(messages.c.chat_id, messages.c.ai_message, messages.c.created_at).join(last, last.c.id == messages.c.id)
+    )
+    rows = [
+        {"chat": chat_id, "text": ai_message.replace("\n", " ")[:PREVIEW_LENGTH], "created": created_at}
+        for chat_id, ai_message, created_at in result.all()
+    ]
+    if rows:
+        bind.execute(
+            chats.update()
+            .where(chats.c.id == sa.bindparam("chat"))
+            .values(
+                preview=sa.bindparam("text"),
+                updated_at=sa.func.coalesce(sa.bindparam("created", type_=timestamp()), chats.c.updated_at),
+            ),
+            rows,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_chats_user_id_updated_at_id", table_name="chats")
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("preview")
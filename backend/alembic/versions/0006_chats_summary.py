@@ -0,0 +1,24 @@
+"""riassunto incrementale degli scambi usciti dal contesto passato all'AI
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("chats", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column("chats", sa.Column("summary_until", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("summary_until")
+        batch.drop_column("summary")
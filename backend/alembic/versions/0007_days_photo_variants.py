@@ -0,0 +1,24 @@
+"""varianti ridimensionate (thumb, medium, full) delle foto di ogni tappa
+
+Le foto già caricate restano senza varianti: il frontend usa l'URL originale.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("days", sa.Column("photo_variants", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("days") as batch:
+        batch.drop_column("photo_variants")
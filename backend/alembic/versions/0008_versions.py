@@ -0,0 +1,45 @@
+"""versione e ultima modifica di viaggi, tappe e chat per ETag e Last-Modified
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+# colonna data/ora: TIMESTAMP su MySQL come nel resto dello schema
+def timestamp():
+    return sa.DateTime(timezone=True).with_variant(mysql.TIMESTAMP(), "mysql")
+
+
+# valore di default "adesso"; su MySQL la colonna si aggiorna anche a ogni modifica della riga
+def now(on_update: bool = False):
+    if on_update and op.get_bind().dialect.name == "mysql":
+        return sa.text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP")
+    return sa.func.now()
+
+
+def upgrade():
+    # SQLite non aggiunge colonne con default CURRENT_TIMESTAMP: le tabelle vengono ricreate
+    recreate = "always" if op.get_bind().dialect.name == "sqlite" else "auto"
+    for table in ("travels", "days"):
+        with op.batch_alter_table(table, recreate=recreate) as batch:
+            batch.add_column(sa.Column("updated_at", timestamp(), server_default=now(on_update=True), nullable=False))
+            batch.add_column(sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+    op.add_column("chats", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table("chats") as batch:
+        batch.drop_column("version")
+    for table in ("days", "travels"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("version")
+            batch.drop_column("updated_at")
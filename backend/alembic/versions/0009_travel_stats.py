@@ -0,0 +1,74 @@
+"""statistiche dei viaggi di ogni utente, una riga per anno e una per paese
+
+Le statistiche dei viaggi esistenti vengono calcolate subito con aggregate_stats di app/utils/travel_stats.py,
+la stessa usata dal ricalcolo; la query legge le tabelle con lo schema di questo punto, non con i modelli.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.travel_stats import aggregate_stats # somma dei viaggi nelle righe delle statistiche
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+travel_stats = sa.table(
+    "travel_stats",
+    sa.column("user_id", sa.Integer()),
+    sa.column("dimension", sa.String()),
+    sa.column("label", sa.String()),
+    sa.column("trips", sa.Integer()),
+    sa.column("days", sa.Integer()),
+    sa.column("vote_sum", sa.Float()),
+    sa.column("vote_count", sa.Integer()),
+    sa.column("category_votes", sa.JSON()),
+)
+
+
+# somma i viaggi esistenti nelle righe del loro anno e del loro paese (una sola query, con il numero delle tappe)
+def compute_stats(bind) -> list[dict]:
+    travels = sa.table(
+        "travels",
+        sa.column("id", sa.Integer()),
+        sa.column("user_id", sa.Integer()),
+        sa.column("year", sa.Integer()),
+        sa.column("town", sa.String()),
+        sa.column("general_vote", sa.Float()),
+        sa.column("votes", sa.JSON()),
+    )
+    days = sa.table("days", sa.column("id", sa.Integer()), sa.column("travel_id", sa.Integer()))
+    day_counts = sa.select(days.c.travel_id, sa.func.count(days.c.id).label("days")).group_by(days.c.travel_id).subquery()
+    result = bind.execute(
+        sa.select(
+            travels.c.user_id, travels.c.year, travels.c.town, travels.c.general_vote, travels.c.votes,
+            sa.func.coalesce(day_counts.c.days, 0).label("days"),
+        ).outerjoin(day_counts, day_counts.c.travel_id == travels.c.id)
+    )
+    return aggregate_stats(result.all())
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.create_table(
+        "travel_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("dimension", sa.String(16), primary_key=True),
+        sa.Column("label", sa.String(255), primary_key=True),
+        sa.Column("trips", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("days", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("vote_sum", sa.Float(), server_default="0", nullable=False),
+        sa.Column("vote_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("category_votes", sa.JSON(), nullable=True),
+    )
+
+    rows = compute_stats(bind)
+    if rows:
+        op.bulk_insert(travel_stats, rows)
+
+
+def downgrade():
+    op.drop_table("travel_stats")
@@ -0,0 +1,20 @@
+"""indice per i marker della mappa: tappe di ogni viaggio per latitudine e longitudine
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_days_travel_id_lat_lng", "days", ["travel_id", "lat", "lng"])
+
+
+def downgrade():
+    op.drop_index("ix_days_travel_id_lat_lng", table_name="days")
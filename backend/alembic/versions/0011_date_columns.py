@@ -0,0 +1,81 @@
+"""date di viaggi e tappe come colonne DATE e indice per la lista dei viaggi
+
+Prima erano testo in formato DD-MM-YYYY o YYYY-MM-DD: i valori vengono convertiti in Python (anche su SQLite)
+e scritti in nuove colonne che poi sostituiscono le vecchie.
+Con l'indice, WHERE user_id ORDER BY year, start_date, id diventa una scansione dell'indice.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y") # formati accettati dalle vecchie colonne di testo
+
+
+# data da testo, None se non leggibile
+def parse_date(value) -> date | None:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+# sostituisce una colonna con una nuova di tipo diverso, riempita con i valori calcolati (id della riga -> valore)
+def replace_column(table: str, column: str, column_type, values: dict):
+    temporary = f"{column}_new"
+    op.add_column(table, sa.Column(temporary, column_type, nullable=True))
+    if values:
+        rows = sa.table(table, sa.column("id", sa.Integer()), sa.column(temporary, column_type))
+        op.get_bind().execute(
+            rows.update().where(rows.c.id == sa.bindparam("row")).values({temporary: sa.bindparam("value", type_=column_type)}),
+            [{"row": row_id, "value": value} for row_id, value in values.items()],
+        )
+    with op.batch_alter_table(table) as batch:
+        batch.drop_column(column)
+        batch.alter_column(temporary, new_column_name=column, existing_type=column_type, nullable=False)
+
+
+def upgrade():
+    bind = op.get_bind()
+    travels = sa.table("travels", sa.column("id"), sa.column("year"), sa.column("start_date"), sa.column("end_date"))
+    days = sa.table("days", sa.column("id"), sa.column("travel_id"), sa.column("date"))
+
+    # date non leggibili: il primo gennaio dell'anno del viaggio, la fine non prima dell'inizio
+    start_dates, end_dates = {}, {}
+    for travel_id, year, start_date, end_date in bind.execute(sa.select(travels.c.id, travels.c.year, travels.c.start_date, travels.c.end_date)).all():
+        start_dates[travel_id] = parse_date(start_date) or date(min(max(year, 1), 9999), 1, 1)
+        end_dates[travel_id] = parse_date(end_date) or start_dates[travel_id]
+
+    # date non leggibili: la data di inizio del viaggio
+    day_dates = {
+        day_id: parse_date(day_date) or start_dates.get(travel_id) or date.today()
+        for day_id, travel_id, day_date in bind.execute(sa.select(days.c.id, days.c.travel_id, days.c.date)).all()
+    }
+
+    replace_column("travels", "start_date", sa.Date(), start_dates)
+    replace_column("travels", "end_date", sa.Date(), end_dates)
+    replace_column("days", "date", sa.Date(), day_dates)
+    op.create_index("ix_travels_user_id_year_start_date", "travels", ["user_id", "year", "start_date"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.drop_index("ix_travels_user_id_year_start_date", table_name="travels")
+
+    # torno al testo in formato YYYY-MM-DD, uno dei due formati letti dall'upgrade
+    for table, columns in (("travels", ("start_date", "end_date")), ("days", ("date",))):
+        rows = sa.table(table, sa.column("id"), *(sa.column(column, sa.Date()) for column in columns))
+        result = bind.execute(sa.select(rows.c.id, *(rows.c[column] for column in columns))).all()
+        for position, column in enumerate(columns, start=1):
+            values = {row[0]: row[position].isoformat() for row in result}
+            replace_column(table, column, sa.String(255), values)
@@ -0,0 +1,117 @@
+"""email unica, indici sulle chiavi esterne e cancellazione a cascata
+
+Lo schema di partenza può venire da travelapp.sql o dal vecchio create_all dei modelli, che differiscono
+proprio su questi vincoli: ogni passaggio controlla il database e aggiunge solo quello che manca.
+L'email unica di travelapp.sql (UNIQUE senza nome, "email" su MySQL) diventa l'indice unico ix_users_email dei modelli.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+# chiavi esterne: (tabella, colonna, tabella riferita)
+FOREIGN_KEYS = [
+    ("travels", "user_id", "users"),
+    ("days", "travel_id", "travels"),
+    ("chats", "user_id", "users"),
+    ("chat_messages", "chat_id", "chats"),
+    ("travel_stats", "user_id", "users"),
+]
+
+# nomi per i vincoli senza nome (SQLite): servono alla modalità batch per trovarli e sostituirli
+NAMING_CONVENTION = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s",
+    "uq": "uq_%(table_name)s_%(column_0_name)s",
+}
+
+
+# indici e vincoli unici sulla sola colonna email (es. quello di travelapp.sql)
+def email_unique_keys(inspector) -> tuple[list[str], list[str | None]]:
+    indexes = [index["name"] for index in inspector.get_indexes("users") if index["unique"] and index["column_names"] == ["email"]]
+    constraints = [
+        constraint["name"] for constraint in inspector.get_unique_constraints("users")
+        if constraint["column_names"] == ["email"] and constraint["name"] not in indexes # su MySQL sono anche indici
+    ]
+    return indexes, constraints
+
+
+# toglie le chiavi uniche sull'email diverse da ix_users_email
+def drop_email_unique_keys(inspector):
+    indexes, constraints = email_unique_keys(inspector)
+    for name in indexes:
+        if name != "ix_users_email":
+            op.drop_index(name, table_name="users")
+    if constraints:
+        with op.batch_alter_table("users", naming_convention=NAMING_CONVENTION) as batch:
+            for name in constraints:
+                batch.drop_constraint(name or "uq_users_email", type_="unique")
+
+
+# True se un indice (o la chiave primaria) inizia con la colonna: basta per le ricerche sulla chiave esterna
+def column_is_indexed(inspector, table: str, column: str) -> bool:
+    leading = [index["column_names"][:1] for index in inspector.get_indexes(table)]
+    leading.append(inspector.get_pk_constraint(table)["constrained_columns"][:1])
+    return [column] in leading
+
+
+def find_foreign_key(inspector, table: str, column: str) -> dict | None:
+    for foreign_key in inspector.get_foreign_keys(table):
+        if foreign_key["constrained_columns"] == [column]:
+            return foreign_key
+    return None
+
+
+# sostituisce la chiave esterna con una nuova (con o senza cancellazione a cascata)
+def replace_foreign_key(foreign_key: dict | None, table: str, column: str, referred: str, ondelete: str | None):
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+        if foreign_key is not None:
+            batch.drop_constraint(foreign_key["name"] or f"fk_{table}_{column}", type_="foreignkey")
+        batch.create_foreign_key(f"fk_{table}_{column}", referred, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # email unica: il login e la registrazione cercano l'utente per email (senza indice leggono tutta la tabella)
+    indexes, constraints = email_unique_keys(sa.inspect(bind))
+    if not indexes and not constraints:
+        duplicates = bind.execute(
+            sa.text("SELECT email FROM users GROUP BY email HAVING COUNT(*) > 1 LIMIT 10")
+        ).scalars().all()
+        if duplicates:
+            raise RuntimeError(f"Email registrate più volte, da sistemare prima della migrazione: {', '.join(duplicates)}")
+    if "ix_users_email" not in indexes:
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    drop_email_unique_keys(sa.inspect(bind))
+
+    # indici sulle chiavi esterne (quelli composti già presenti, es. chats(user_id, updated_at, id), valgono anche per queste)
+    for table, column, _ in FOREIGN_KEYS:
+        if not column_is_indexed(sa.inspect(bind), table, column):
+            op.create_index(f"ix_{table}_{column}", table, [column])
+
+    # cancellazione a cascata: eliminando un utente il DB elimina viaggi, tappe, chat, messaggi e statistiche
+    for table, column, referred in FOREIGN_KEYS:
+        foreign_key = find_foreign_key(sa.inspect(bind), table, column)
+        if foreign_key is None or (foreign_key.get("options", {}).get("ondelete") or "").upper() != "CASCADE":
+            replace_foreign_key(foreign_key, table, column, referred, "CASCADE")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    # le chiavi esterne restano a cascata, come in travelapp.sql e nelle revisioni precedenti
+    for table, column, _ in FOREIGN_KEYS:
+        if f"ix_{table}_{column}" in {index["name"] for index in sa.inspect(bind).get_indexes(table)}:
+            op.drop_index(f"ix_{table}_{column}", table_name=table)
+
+    # torna il vincolo unico di travelapp.sql al posto dell'indice
+    with op.batch_alter_table("users") as batch:
+        batch.create_unique_constraint("uq_users_email", ["email"])
+    op.drop_index("ix_users_email", table_name="users")
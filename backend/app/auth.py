@@ -2,7 +2,19 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer # importo lo schema per ottenere il token
 from datetime import datetime, timedelta, timezone # per gestire la scadenza del token
 from jose import JWTError, jwt # libreria per creare e verificare i token JWT
+from collections import OrderedDict # per la cache LRU dei token già verificati
+import hashlib # per la chiave della cache (digest del token)
+import time # per la scadenza delle voci della cache
 from app.config import settings  # importo le impostazioni dal file config.py
+from app.utils import revocation # archivio dei token revocati (condiviso tra i worker con il backend "redis")
+
+# cache dei token già verificati: digest del token → (payload, scadenza "exp")
+# evita di ripetere la verifica della firma a ogni richiesta con lo stesso token
+# è locale al processo: le revoche invece vengono controllate nell'archivio delle revoche (con "redis" dalla sua copia locale)
+token_cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+
+# contatori della cache dei token
+token_cache_metrics = {"hits": 0, "misses": 0, "revoked": 0}
 
 # Funzione per creare il token JWT
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -19,15 +31,79 @@ def verify_token(token: str): # token da verificare
         return payload # ritorno i dati decodificati
     except JWTError: # se c'è un errore, ritorno None
         return None
-    
+
+
+# chiave della cache: non tengo in memoria il token in chiaro
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# Funzione per verificare il token usando la cache: la firma viene verificata solo la prima volta
+# la revoca viene controllata anche per i token già in cache (il logout può essere avvenuto su un altro worker):
+# con il backend "redis" Redis viene interrogato al massimo ogni TOKEN_REVOCATION_CHECK_SECONDS per token
+async def verify_token_cached(token: str):
+    key = token_digest(token)
+    now = time.time()
+
+    if await revocation.revocation_store.is_revoked(key):
+        token_cache.pop(key, None)
+        return None
+
+    cached = token_cache.get(key)
+    if cached is not None:
+        payload, expires_at = cached
+        if now < expires_at:
+            token_cache.move_to_end(key) # voce usata di recente
+            token_cache_metrics["hits"] += 1
+            return payload
+        del token_cache[key] # token scaduto
+
+    token_cache_metrics["misses"] += 1
+    payload = verify_token(token)
+
+    # salvo solo i token validi con scadenza: la voce scade insieme al token
+    if payload is not None and "exp" in payload:
+        token_cache[key] = (payload, float(payload["exp"]))
+        while len(token_cache) > settings.TOKEN_CACHE_SIZE:
+            token_cache.popitem(last=False)
+    return payload
+
+
+# Funzione per revocare un token prima della sua scadenza (es. logout)
+async def revoke_token(token: str):
+    key = token_digest(token)
+    token_cache.pop(key, None)
+    payload = verify_token(token)
+    if payload is None:
+        return # token già non valido o scaduto
+
+    expires_at = float(payload.get("exp", time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60))
+    await revocation.revocation_store.revoke(key, expires_at)
+    token_cache_metrics["revoked"] += 1
+
+
+# statistiche per le metriche interne
+def token_cache_stats() -> dict:
+    total = token_cache_metrics["hits"] + token_cache_metrics["misses"]
+    return {
+        **token_cache_metrics,
+        "size": len(token_cache),
+        "revocation_backend": settings.TOKEN_REVOCATION_BACKEND,
+        "revoked_size": revocation.revocation_store.size(),
+        "revocation_lookups": getattr(revocation.revocation_store, "lookups", None), # richieste a Redis
+        "hit_ratio": round(token_cache_metrics["hits"] / total, 3) if total else None,
+    }
+
+
 # Definisce lo schema OAuth2 per ottenere un token JWT tramite login.
 # `tokenUrl="/users/login"` indica l'endpoint che fornisce il token.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
 # Funzione per ottenere l'utente corrente in base al token fornito.
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    # Verifica il token JWT. `verify_token` dovrebbe decodificare il token e restituire il payload (dati dell'utente).
-    payload = verify_token(token)
+# è async: la verifica della firma avviene solo la prima volta e la revoca si controlla senza bloccare l'event loop
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # Verifica il token JWT (dalla cache se già verificato) e restituisce il payload (dati dell'utente).
+    payload = await verify_token_cached(token)
 
     # Se il token non è valido o è scaduto, viene sollevata un'eccezione HTTP 401.
     if payload is None:
@@ -37,3 +113,4 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         )
      # Se il token è valido, restituisce il payload (informazioni dell'utente autenticato)
     return payload
+
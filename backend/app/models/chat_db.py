@@ -1,16 +1,26 @@
-from sqlalchemy import Column, String, JSON, Integer, ForeignKey  # definisco le colonne e tipi di dato per i modelli ORM
-from sqlalchemy.ext.mutable import MutableList # permette a SQLAlchemy di rilevare automaticamente le modifiche fatte a una lista (o dict) memorizzata in una colonna JSON
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Index, func  # definisco le colonne e tipi di dato per i modelli ORM
 from sqlalchemy.orm import relationship # per poter gestire la relazione ORM bidirezionale
-from app.database import Base  # Importa la base ORM da cui derivano tutti i modelli
+from app.database import Base, Timestamp  # Importa la base ORM da cui derivano tutti i modelli e il tipo per le date confrontabili
+from app.models.chat_message_db import ChatMessageDB # modello ORM per i messaggi della chat
 
 # Modello per la tabella "chats"
 class ChatDB(Base):
     __tablename__ = "chats"  # Nome della tabella nel database
 
     # Colonne della tabella
-    id = Column(Integer, primary_key=True, index=True)                          # ID univoco della chat
+    id = Column(Integer, primary_key=True)                          # ID univoco della chat
     title = Column(String, nullable=False)                                      # titolo della chat
-    messages = Column(MutableList.as_mutable(JSON), default=list)               # messaggi della chat in formato JSON
+    preview = Column(String(255), nullable=True)                                # anteprima dell'ultimo messaggio (per la lista delle chat)
+    updated_at = Column(Timestamp, nullable=False, server_default=func.now(), onupdate=func.now())  # ultima attività
+    version = Column(Integer, nullable=False, default=1, server_default="1")   # cresce a ogni nuovo messaggio o titolo (ETag)
+    summary = Column(Text, nullable=True)                                       # riassunto degli scambi usciti dal contesto dell'AI
+    summary_until = Column(Integer, nullable=True)                              # ID dell'ultimo messaggio incluso nel riassunto
 
-    user_id = Column(Integer, ForeignKey("users.id"))     # Chiave esterna
-    user = relationship("UserDB", back_populates="chats") # Relazione con la tabella users
\ No newline at end of file
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False) # Chiave esterna (indicizzata dall'indice composto qui sotto)
+    user = relationship("UserDB", back_populates="chats", lazy="raise_on_sql") # Relazione con la tabella users
+
+    # messaggi della chat nella tabella chat_messages (cancellati dal DB insieme alla chat)
+    messages = relationship(ChatMessageDB, order_by=ChatMessageDB.id, cascade="all, delete-orphan", passive_deletes=True, lazy="raise_on_sql")
+
+    # indice per la lista delle chat di un utente, dalla più recente (paginazione keyset)
+    __table_args__ = (Index("ix_chats_user_id_updated_at_id", "user_id", "updated_at", "id"),)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, DateTime, Index, func  # definisco le colonne e tipi di dato per i modelli ORM
+from app.database import Base  # importo la base ORM da cui derivano tutti i modelli
+
+# Modello per la tabella "chat_messages": uno scambio (messaggio dell'utente + risposta dell'AI) per riga
+# i messaggi vengono solo aggiunti, la chat non viene mai riscritta
+class ChatMessageDB(Base):
+    __tablename__ = "chat_messages"  # Nome della tabella nel database
+
+    # Colonne della tabella
+    id = Column(Integer, primary_key=True)                                                  # ID univoco (ordine dei messaggi)
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"), nullable=False)   # Chiave esterna verso ChatDB
+    user = Column("user_message", Text, nullable=False)                                     # messaggio dell'utente
+    ai = Column("ai_message", Text, nullable=False)                                         # risposta dell'AI
+    created_at = Column(DateTime(timezone=True), server_default=func.now())                 # data del messaggio
+
+    # indice per leggere gli ultimi messaggi di una chat in ordine
+    __table_args__ = (Index("ix_chat_messages_chat_id_id", "chat_id", "id"),)
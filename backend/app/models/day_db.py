@@ -1,22 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON  # definisco le colonne e tipi di dato per i modelli ORM
+from sqlalchemy import Column, Integer, String, Text, Float, Date, Boolean, ForeignKey, JSON, Index, false, func  # definisco le colonne e tipi di dato per i modelli ORM
 from sqlalchemy.orm import relationship # per poter gestire la relazione ORM bidirezionale
-from app.database import Base  # importo la base ORM da cui derivano tutti i modelli
+from app.database import Base, Timestamp  # importo la base ORM da cui derivano tutti i modelli e il tipo per le date
 
 # Modello per la tabella "days" (giorni del viaggio)
 class DayDB(Base):
     __tablename__ = "days"  # Nome della tabella nel database
 
     # Colonne della tabella
-    id = Column(Integer, primary_key=True, index=True)  # ID univoco del giorno
+    id = Column(Integer, primary_key=True)  # ID univoco del giorno
     city = Column(String, nullable=False)               # città 
-    date = Column(String, nullable=False)               # data
+    date = Column(Date, nullable=False)                 # data
     title = Column(String, nullable=False)              # titolo
-    description = Column(String, nullable=True)         # descrizione
+    description = Column(Text, nullable=True)           # descrizione
     experiences = Column(JSON, nullable=True)           # esperienze
     photo = Column(JSON, nullable=True)                 # foto
+    photo_variants = Column(JSON, nullable=True)        # varianti ridimensionate di ogni foto (thumb, medium, full)
     lat = Column(Float, nullable=True)                  # latitudine
     lng = Column(Float, nullable=True)                  # longitudine
+    geocode_pending = Column(Boolean, nullable=False, default=False, server_default=false(), index=True)  # coordinate in attesa del worker
+    updated_at = Column(Timestamp, nullable=False, server_default=func.now(), onupdate=func.now())  # ultima modifica
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # cresce a ogni modifica della tappa
 
     # Colonna per la relazione con la tabella "travels"
-    travel_id = Column(Integer, ForeignKey("travels.id"))  # Chiave esterna verso TravelDB
-    travel = relationship("TravelDB", back_populates="days")  # Relazione con la classe TravelDB che si trova nel file travel_db.py
+    travel_id = Column(Integer, ForeignKey("travels.id", ondelete="CASCADE"), nullable=False)  # Chiave esterna verso TravelDB (indicizzata dall'indice composto qui sotto)
+    travel = relationship("TravelDB", back_populates="days", lazy="raise_on_sql")  # Relazione con la classe TravelDB che si trova nel file travel_db.py
+
+    # indice per i marker della mappa: le tappe di ogni viaggio ordinate per latitudine e longitudine
+    # (GET /days/markers legge solo le tappe dei viaggi dell'utente dentro l'area visibile)
+    __table_args__ = (Index("ix_days_travel_id_lat_lng", "travel_id", "lat", "lng"),)
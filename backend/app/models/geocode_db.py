@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Float, DateTime, func  # definisco le colonne e tipi di dato per i modelli ORM
+from app.database import Base  # importo la base ORM da cui derivano tutti i modelli
+
+# Modello per la tabella "geocode_cache" (coordinate già calcolate con Nominatim)
+class GeocodeCacheDB(Base):
+    __tablename__ = "geocode_cache"  # Nome della tabella nel database
+
+    # Colonne della tabella
+    query = Column(String(255), primary_key=True)   # query normalizzata (luogo, città, paese)
+    lat = Column(Float, nullable=True)              # latitudine (None = luogo non trovato)
+    lng = Column(Float, nullable=True)              # longitudine (None = luogo non trovato)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())  # data dell'ultima ricerca
@@ -1,24 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON  # definisco le colonne e tipi di dato per i modelli ORM
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, JSON, Index, func  # definisco le colonne e tipi di dato per i modelli ORM
 from sqlalchemy.orm import relationship # per poter gestire la relazione ORM bidirezionale
-from app.database import Base  # Importa la base ORM da cui derivano tutti i modelli
+from app.database import Base, Timestamp  # Importa la base ORM da cui derivano tutti i modelli e il tipo per le date
 
 # Modello per la tabella "travels" (viaggi)
 class TravelDB(Base):
     __tablename__ = "travels"  # Nome della tabella nel database
 
     # Colonne della tabella
-    id = Column(Integer, primary_key=True, index=True)  # ID univoco del viaggio
+    id = Column(Integer, primary_key=True)  # ID univoco del viaggio
     town = Column(String, nullable=False)              # paese
     year = Column(Integer, nullable=False)             # anno 
-    start_date = Column(String, nullable=False)        # data inizio
-    end_date = Column(String, nullable=False)          # data fine
+    start_date = Column(Date, nullable=False)          # data inizio
+    end_date = Column(Date, nullable=False)            # data fine
     general_vote = Column(Float, nullable=True)        # media dei voti
     votes = Column(JSON, nullable=True)                # # voti (giorno, paesaggio, attività relax, prezzo)
+    updated_at = Column(Timestamp, nullable=False, server_default=func.now(), onupdate=func.now())  # ultima modifica (del viaggio o delle sue tappe)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # cresce a ogni modifica del viaggio o delle sue tappe (ETag)
 
     # Relazione ORM con la tabella "days"
     # back_populates="travel" crea una relazione bidirezionale con DayDB
     # cascade="all, delete" fa sì che se un viaggio viene cancellato, anche i giorni associati vengano rimossi
-    days = relationship("DayDB", back_populates="travel", cascade="all, delete")
+    # lazy="raise_on_sql" impedisce il caricamento implicito (N+1): le tappe vanno caricate con selectinload nella query
+    days = relationship("DayDB", back_populates="travel", cascade="all, delete", lazy="raise_on_sql")
 
-    user_id = Column(Integer, ForeignKey("users.id")) # Chiave esterna
-    user = relationship("UserDB", back_populates="travels") # Relazione con la tabella users
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False) # Chiave esterna (indicizzata dall'indice composto qui sotto)
+    user = relationship("UserDB", back_populates="travels", lazy="raise_on_sql") # Relazione con la tabella users
+
+    # indice per la lista dei viaggi di un utente (dal più recente, paginata per anno, data di inizio e id)
+    __table_args__ = (Index("ix_travels_user_id_year_start_date", "user_id", "year", "start_date"),)
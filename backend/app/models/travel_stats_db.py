@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON  # definisco le colonne e tipi di dato per i modelli ORM
+from app.database import Base  # importo la base ORM da cui derivano tutti i modelli
+
+# Modello per la tabella "travel_stats" (statistiche dei viaggi di ogni utente, aggiornate a ogni modifica)
+# una riga per ogni anno e per ogni paese visitato: ogni viaggio è contato in una riga "year" e in una riga "country"
+class TravelStatsDB(Base):
+    __tablename__ = "travel_stats"  # Nome della tabella nel database
+
+    # Colonne della tabella
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)  # utente
+    dimension = Column(String(16), primary_key=True)    # "year" oppure "country"
+    label = Column(String(255), primary_key=True)       # anno o paese
+    trips = Column(Integer, nullable=False, default=0)  # numero di viaggi
+    days = Column(Integer, nullable=False, default=0)   # numero di tappe
+    vote_sum = Column(Float, nullable=False, default=0.0)   # somma dei voti generali
+    vote_count = Column(Integer, nullable=False, default=0) # viaggi con voto generale
+    category_votes = Column(JSON, nullable=True)        # categoria → [somma dei voti, numero di voti]
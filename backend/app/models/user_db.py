@@ -6,14 +6,16 @@ class UserDB(Base):
     __tablename__ = 'users' # nome tabella del database
 
     # colonne della tabella
-    id = Column(Integer, primary_key=True, index=True)  # ID univoco dell'utente
+    id = Column(Integer, primary_key=True)  # ID univoco dell'utente
     name = Column(String, nullable=False)               # nome 
     surname = Column(String, nullable=False)            # cognome
-    email = Column(String, nullable=False)              # email
+    email = Column(String, nullable=False, unique=True, index=True)  # email (indice unico: login e registrazione cercano per email)
     password = Column(String, nullable=False)           # password
     experiences = Column(JSON, nullable=True)           # esperienze
     photo = Column(String, nullable=True)               # foto profilo
     registration_date = Column(DateTime(timezone=True), server_default=func.now())   # data di registrazione
 
-    travels = relationship("TravelDB", back_populates="user")  # Relazione con la classe TravelDB che si trova nel file travel_db.py
-    chats = relationship("ChatDB", back_populates="user")      # Relazione con la classe ChatDB che si trova nel file chat_db.py
\ No newline at end of file
+    # lazy="raise_on_sql" impedisce il caricamento implicito (N+1): le relazioni vanno caricate esplicitamente nella query
+    # viaggi e chat vengono eliminati insieme all'utente (come ON DELETE CASCADE nel DB), quelli non caricati li elimina il DB
+    travels = relationship("TravelDB", back_populates="user", cascade="all, delete", passive_deletes=True, lazy="raise_on_sql")  # Relazione con la classe TravelDB che si trova nel file travel_db.py
+    chats = relationship("ChatDB", back_populates="user", cascade="all, delete", passive_deletes=True, lazy="raise_on_sql")        # Relazione con la classe ChatDB che si trova nel file chat_db.py
\ No newline at end of file
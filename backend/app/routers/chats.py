@@ -1,41 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori
-from sqlalchemy.orm import Session # sessione ORM per interagire con il database
-from app.database import SessionLocal # connessione locale al DB (crea le sessioni)
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request, Response # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori, lavori dopo la risposta, parametri e header
+from fastapi.responses import StreamingResponse # per inviare la risposta dell'AI in streaming (SSE)
+from sqlalchemy import select, delete, update, func, tuple_ # costruzione delle query
+from sqlalchemy.orm import load_only # per leggere solo le colonne che servono
+from sqlalchemy.ext.asyncio import AsyncSession # sessione ORM asincrona per interagire con il database
+from app.database import get_db, AsyncSessionLocal, bump_version # dependency condivisa che fornisce la sessione del DB, sessioni fuori dalla richiesta e incremento della versione
 from app.models.user_db import UserDB # modello ORM per la tabella degli utenti
 from app.models.chat_db import ChatDB # modello ORM per la tabella delle chat
-from app.schemas.chats import Chat, UserMessage, RecommendationRequest # classi Pydantic per le chat e i messaggi utente
-from app.config import travel_model # importo il modello di AI per i viaggi e lo schema per i messaggi utente
+from app.models.chat_message_db import ChatMessageDB # modello ORM per i messaggi delle chat
+from app.schemas.chats import Chat, ChatSummary, UserMessage, RecommendationRequest # classi Pydantic per le chat e i messaggi utente
+from app.config import travel_model, settings # importo il modello di AI per i viaggi e lo schema per i messaggi utente
 from app.auth import get_current_user # importo la funzione per ottenere l'utente in base al token fornito
+from app.utils.chats import clean_markdown, MarkdownCleaner, RECOMMENDATION_HEADINGS, sse_event, make_preview, encode_chat_cursor, decode_chat_cursor, estimate_tokens # pulizia del testo dell'AI, formattazione SSE, anteprima, cursore e stima dei token
+from app.utils.intent import classify_locally, OFF_TOPIC # classificatore locale dell'intento
+from app.utils.llm_cache import cached_generate # cache delle risposte dell'AI
+from app.utils.metrics import record_latency # per misurare la durata dei turni di chat e delle chiamate all'AI
+from app.utils.http_cache import make_etag, not_modified_response # ETag e risposte 304
+import asyncio # per eseguire in parallelo le chiamate a Gemini
+import logging # per registrare gli errori dei lavori eseguiti dopo la risposta
+import time # per misurare le latenze
 
 router = APIRouter(prefix="/chats")
-
-# Dependency: fornisce una sessione di database a ogni richiesta API.
-# La sessione viene creata all'inizio, resa disponibile tramite yield,
-# e chiusa automaticamente alla fine della richiesta (pattern try/finally).
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db  # restituisce la sessione da usare nelle query
-    finally:
-        db.close()  # chiude la sessione per evitare memory leak
-
-# GET: Funzione per ottenere tutte le chat
-@router.get("/", response_model=list[Chat])
-def get_chats(db: Session = Depends(get_db)):
-    return db.query(ChatDB).all()  # mi restituisce tutte le chat
+logger = logging.getLogger(__name__)
+
+
+# funzione che carica gli ultimi `limit` messaggi di una chat, in ordine cronologico
+# con after_id carica solo i messaggi successivi a quello indicato (es. non ancora riassunti)
+async def load_history(chat_id: int, db: AsyncSession, limit: int, after_id: int | None = None) -> list[ChatMessageDB]:
+    query = select(ChatMessageDB).filter(ChatMessageDB.chat_id == chat_id)
+    if after_id is not None:
+        query = query.filter(ChatMessageDB.id > after_id)
+    result = await db.execute(query.order_by(ChatMessageDB.id.desc()).limit(limit))
+    return list(reversed(result.scalars().all()))
+
+
+# risposta di una chat con i suoi messaggi più recenti
+def chat_response(chat: ChatDB, messages: list[ChatMessageDB]) -> dict:
+    return {"id": chat.id, "user_id": chat.user_id, "title": chat.title, "messages": messages}
+
+
+# GET: lista delle chat dell'utente, dalla più recente, paginata con un cursore (keyset)
+# restituisce solo titolo, anteprima e ultima attività: i messaggi si leggono con GET /chats/{chat_id}
+# il cursore della pagina successiva viene restituito nell'header "X-Next-Cursor"
+@router.get("/", response_model=list[ChatSummary])
+async def get_chats(
+    request: Request,
+    response: Response,
+    limit: int = Query(30, ge=1, le=100),     # numero massimo di chat per pagina
+    cursor: str | None = None,                # cursore ricevuto dalla pagina precedente
+    db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)
+):
+    user_id = current_user["id"]
+    query = (
+        select(ChatDB)
+        .options(load_only(ChatDB.id, ChatDB.title, ChatDB.preview, ChatDB.updated_at, ChatDB.version)) # solo le colonne della lista
+        .filter(ChatDB.user_id == user_id)
+        .order_by(ChatDB.updated_at.desc(), ChatDB.id.desc())
+    )
+
+    # riparto dall'ultima chat della pagina precedente
+    if cursor:
+        position = decode_chat_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Cursore non valido")
+        # tipi espliciti: la data deve essere convertita come la colonna
+        query = query.filter(tuple_(ChatDB.updated_at, ChatDB.id) < tuple_(*position, types=[ChatDB.updated_at.type, ChatDB.id.type]))
+
+    # chiedo una chat in più per sapere se esiste una pagina successiva
+    result = await db.execute(query.limit(limit + 1))
+    chats = result.scalars().all()
+
+    if len(chats) > limit:
+        chats = chats[:limit]
+        last = chats[-1]
+        response.headers["X-Next-Cursor"] = encode_chat_cursor(last.updated_at, last.id)
+
+    # la versione cresce con ogni messaggio e titolo nuovo: (id, versione) descrive tutta la pagina;
+    # l'ultima attività distingue una chat nuova da una eliminata con lo stesso id (entrambe alla versione 1)
+    etag = make_etag("chats", user_id, [(chat.id, chat.version, chat.updated_at) for chat in chats])
+    last_modified = max((chat.updated_at for chat in chats), default=None)
+    not_modified = not_modified_response(request, response, etag, last_modified, use_modified_since=False)
+    if not_modified:
+        return not_modified
+
+    return chats
 
 
 #  GET: per ottenere una chat singola tramite ID
+# con If-None-Match / If-Modified-Since risponde 304 senza leggere i messaggi se la chat non è cambiata
 @router.get("/{chat_id}", response_model=Chat)
-def get_chat(chat_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)): # ID della chat
+async def get_chat(chat_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)): # ID della chat
     user_id = current_user["id"]
-    chat = db.query(ChatDB).filter(ChatDB.id == chat_id, ChatDB.user_id == user_id).first() # ottengo la chat
+    result = await db.execute(select(ChatDB).filter(ChatDB.id == chat_id, ChatDB.user_id == user_id))
+    chat = result.scalars().first() # ottengo la chat
     if not chat:
         raise HTTPException(status_code=404, detail="Chat non trovata")
-    return chat
+
+    not_modified = not_modified_response(request, response, make_etag("chat", chat.id, chat.version, chat.updated_at), chat.updated_at)
+    if not_modified:
+        return not_modified
+    return chat_response(chat, await load_history(chat.id, db, settings.CHAT_HISTORY_LIMIT))
+
+# funzione per generare il contenuto con l'API asincrona di Gemini
+# "kind" indica il tipo di chiamata (intento, risposta, titolo...) per le metriche di latenza
+async def generate_content(prompt: str, kind: str = "answer"):
+    start = time.perf_counter()
+    try:
+        return await travel_model.generate_content_async(prompt)
+    finally:
+        record_latency(f"llm_{kind}", time.perf_counter() - start)
 
 # funzione per generare il titolo della chat con l'AI
-def generate_ai_title(message: str) -> str:
+async def generate_ai_title(message: str) -> str:
     prompt = f"""
     Genera UN SOLO titolo per una chat di viaggio.
 
@@ -53,7 +128,7 @@ def generate_ai_title(message: str) -> str:
 
     Rispondi SOLO con il titolo.
     """
-    return travel_model.generate_content(prompt).text.strip()
+    return (await generate_content(prompt, "title")).text.strip()
 
 # funzione per pulire il titolo della chat 
 def clean_title(title: str) -> str:
@@ -68,87 +143,147 @@ def clean_title(title: str) -> str:
     return " ".join(words[:6])
 
 
-# POST: funzione per generare il messaggio dall'AI
-@router.post("/")
-def generate_message(msg: UserMessage, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    user_id = current_user["id"]
+# funzione eseguita dopo la risposta: genera il titolo della chat e lo salva con una sessione propria
+# il titolo viene scritto solo se la chat ha ancora quello provvisorio
+async def update_chat_title(chat_id: int, seed: str):
+    try:
+        title = clean_title(await generate_ai_title(seed))
+    except Exception as e:
+        logger.warning("Generazione del titolo fallita per la chat %s: %s", chat_id, e)
+        return
 
-    #  Gestione creazione nuova chat 
-    if msg.mode == "new_chat": # se la modalità è nuova chat
+    async with AsyncSessionLocal() as session:
+        chat = await session.get(ChatDB, chat_id)
+        if chat and (not chat.title or chat.title == "Nuova Chat"):
+            chat.title = title
+            bump_version(chat)
+            await session.commit()
 
-        title = "Nuova Chat"  # placeholder iniziale
 
-        # creo una nuova chat nel DB
-        new_chat = ChatDB(
-            user_id=user_id, # ID dell'utente
-            title=title, # titolo della chat
-            messages=[] # nessun messaggio iniziale
-        )
-        db.add(new_chat) # aggiungo la nuova chat alla sessione
-        db.commit() # salvo la chat nel DB
-        db.refresh(new_chat) # aggiorno l'istanza con i dati dal DB
+MAX_CONTEXT_MESSAGES = 50 # scambi non ancora riassunti letti dal DB per costruire il contesto (i più recenti)
+MAX_SUMMARY_MESSAGES = 50 # scambi più vecchi aggiunti al riassunto in una volta sola (il prompt resta limitato)
+
+# parole con cui l'utente termina la conversazione e risposte fisse
+TERMINATION_KEYWORDS = ["fine conversazione", "grazie", "stop", "è tutto", "basta così"]
+FAREWELL = "È stato un piacere aiutarti! Buon viaggio e alla prossima 😊"
+OFF_TOPIC_REPLY = ("Posso aiutarti solo con argomenti legati ai viaggi 😊. "
+                   "Prova a chiedermi una meta, un consiglio o un periodo per un viaggio!")
 
-        return {
-            "response": "Nuova chat creata!",
-            "chat_id": new_chat.id
-        }
 
+# funzione per recuperare la chat a cui appartiene il messaggio (o crearne una se non esiste)
+async def get_or_create_chat(msg: UserMessage, user_id: int, db: AsyncSession) -> ChatDB:
     # recupero chat esistente
     if msg.chat_id:
-        chat_db = db.query(ChatDB).filter( # filtro per ID chat e utente
+        result = await db.execute(select(ChatDB).filter( # filtro per ID chat e utente
             ChatDB.id == msg.chat_id, # ID della chat
             ChatDB.user_id == user_id # ID dell'utente
-        ).first() # ottengo la chat
+        ))
+        chat_db = result.scalars().first() # ottengo la chat
     else:
         # fallback: usa l'ultima chat dell'utente
-        chat_db = db.query(ChatDB).filter( # filtro per utente
+        result = await db.execute(select(ChatDB).filter( # filtro per utente
             ChatDB.user_id == user_id # ID dell'utente
-        ).order_by(ChatDB.id.desc()).first() # prendo l'ultima chat
+        ).order_by(ChatDB.id.desc()).limit(1))
+        chat_db = result.scalars().first() # prendo l'ultima chat
 
     # se non esiste ancora nessuna chat, se ne crea una
     if not chat_db:
-        chat_db = ChatDB(user_id=user_id, messages=[]) # creo nuova chat
+        chat_db = ChatDB(user_id=user_id, title="Nuova Chat") # creo nuova chat
         db.add(chat_db) # aggiungo alla sessione
-        db.commit() # salvo nel DB
-        db.refresh(chat_db) # aggiorno l'istanza
+        await db.commit() # salvo nel DB
 
-    history = chat_db.messages or []
+    return chat_db
 
-    MAX_STORED_HISTORY = 20 # numero massimo di messaggi persistiti nel DB (storico completo per la chat), serve per persistenza e UI
-    CONTEXT_WINDOW = 3 # numero di scambi recenti passati all'AI come contesto (memoria corta), serve solo per mantenere coerenza nella risposta
 
-    # Costruzione del contesto della conversazione: ultimi 3 scambi
-    conversation_context = "\n".join([
-        f"Utente: {ex['user']}\nAssistente: {ex['ai']}"
-        for ex in history[-CONTEXT_WINDOW:]
-    ])
+# formato di uno scambio nel contesto passato all'AI
+def format_exchange(ex: ChatMessageDB) -> str:
+    return f"Utente: {ex.user}\nAssistente: {ex.ai}"
 
-    # prendo l'ultimo messaggio dell'AI per fornire contesto
-    last_ai = history[-1]["ai"] if history else ""
 
+# Costruzione del contesto della conversazione entro un budget di token (stimati in locale):
+# il riassunto degli scambi più vecchi, poi gli scambi più recenti che ci stanno per intero
+# ritorna (contesto, scambi esclusi dal contesto e non ancora riassunti)
+def build_context(history: list[ChatMessageDB], summary: str | None, budget: int) -> tuple[str, list[ChatMessageDB]]:
+    header = f"Riassunto della conversazione precedente: {summary}" if summary else ""
+    used = estimate_tokens(header)
 
-    # controllo se l'utente vuole terminare
-    termination_keywords = ["fine conversazione", "grazie", "stop", "è tutto", "basta così"]
-    if any(kw in msg.message.lower() for kw in termination_keywords):
-        farewell = "È stato un piacere aiutarti! Buon viaggio e alla prossima 😊"
-        # aggiorno la cronologia
-        history.append({"user": msg.message, "ai": farewell})
+    recent = []
+    for ex in reversed(history): # dal più recente al più vecchio
+        text = format_exchange(ex)
+        cost = estimate_tokens(text)
+        if recent and used + cost > budget: # lo scambio più recente entra sempre
+            break
+        recent.append(text)
+        used += cost
 
-        # salva solo gli ultimi 20 messaggi
-        chat_db.messages = history[-MAX_STORED_HISTORY:]
+    dropped = history[:len(history) - len(recent)]
+    parts = ([header] if header else []) + list(reversed(recent))
+    return "\n".join(parts), dropped
 
-        # salvo la chat nel DB
-        db.add(chat_db)
-        db.commit()
-        db.refresh(chat_db)
 
-        return {"response": farewell, "intent": "terminazione"}
+# prompt per aggiornare il riassunto con gli scambi usciti dal contesto
+def build_summary_prompt(summary: str | None, exchanges: list[ChatMessageDB]) -> str:
+    conversation = "\n".join(format_exchange(ex) for ex in exchanges)
+    return f"""
+    Aggiorna il riassunto di una conversazione tra un utente e un assistente di viaggio.
 
+    Riassunto attuale:
+    {summary or "nessuno"}
 
-    # Analisi intento dell'utente
-    intent_prompt = f"""
+    Nuovi scambi da aggiungere:
+    {conversation}
+
+    Scrivi il riassunto aggiornato in massimo 120 parole, in italiano, senza elenchi.
+    Conserva destinazioni, date, budget, preferenze e decisioni già prese; ometti i saluti.
+    Rispondi SOLO con il riassunto.
+    """
+
+
+# funzione eseguita dopo la risposta: aggiunge al riassunto della chat gli scambi più vecchi usciti dal contesto
+# (quelli dopo summary_until e prima di before_id, al massimo MAX_SUMMARY_MESSAGES alla volta, dal più vecchio):
+# se un aggiornamento fallisce, il successivo riparte dallo stesso punto e nessuno scambio resta fuori dal riassunto
+# il riassunto viene aggiornato in modo incrementale e salvato solo se nel frattempo nessun'altra richiesta l'ha cambiato
+async def update_chat_summary(chat_id: int, summary: str | None, summary_until: int | None, before_id: int):
+    async with AsyncSessionLocal() as session:
+        query = select(ChatMessageDB).filter(ChatMessageDB.chat_id == chat_id, ChatMessageDB.id < before_id)
+        if summary_until is not None:
+            query = query.filter(ChatMessageDB.id > summary_until)
+        exchanges = (await session.execute(query.order_by(ChatMessageDB.id).limit(MAX_SUMMARY_MESSAGES))).scalars().all()
+    if not exchanges:
+        return
+
+    try:
+        new_summary = (await generate_content(build_summary_prompt(summary, exchanges), "summary")).text.strip()
+    except Exception:
+        logger.exception("Aggiornamento del riassunto fallito per la chat %s", chat_id)
+        return
+
+    async with AsyncSessionLocal() as session:
+        same_summary = ChatDB.summary_until.is_(None) if summary_until is None else ChatDB.summary_until == summary_until
+        await session.execute(
+            update(ChatDB).filter(ChatDB.id == chat_id, same_summary)
+            .values(summary=new_summary, summary_until=exchanges[-1].id, updated_at=ChatDB.updated_at) # non è una nuova attività
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+
+# carico gli scambi non ancora riassunti più recenti, costruisco il contesto e, se abbastanza scambi sono usciti dal contesto
+# (o ce ne possono essere di più vecchi non letti), programmo l'aggiornamento del riassunto dopo la risposta
+async def prepare_context(chat_db: ChatDB, db: AsyncSession, background_tasks: BackgroundTasks) -> tuple[list[ChatMessageDB], str]:
+    history = await load_history(chat_db.id, db, MAX_CONTEXT_MESSAGES, after_id=chat_db.summary_until)
+    conversation_context, dropped = build_context(history, chat_db.summary, settings.CHAT_CONTEXT_TOKENS)
+    if len(dropped) >= settings.CHAT_SUMMARY_BATCH or len(history) == MAX_CONTEXT_MESSAGES:
+        first_in_context = history[len(dropped)].id # il più vecchio scambio rimasto nel contesto
+        background_tasks.add_task(update_chat_summary, chat_db.id, chat_db.summary, chat_db.summary_until, first_in_context)
+    return history, conversation_context
+
+
+# prompt per l'analisi dell'intento dell'utente
+def build_intent_prompt(last_ai: str, message: str) -> str:
+    return f"""
     L'assistente ha appena detto: "{last_ai}"
-    L'utente risponde: "{msg.message}"
+    L'utente risponde: "{message}"
 
     Analizza la risposta dell'utente nel contesto della conversazione.
     Se riguarda viaggi, turismo, destinazioni, esperienze, attività, trasporti, cibo locale o cultura, 
@@ -156,29 +291,24 @@ def generate_message(msg: UserMessage, db: Session = Depends(get_db), current_us
     Se NON riguarda i viaggi, rispondi solo con "fuori_tema".
     Rispondi esclusivamente con UNA parola in minuscolo.
     """
-    intent = travel_model.generate_content(intent_prompt).text.strip().lower()
 
-    # Gestione messaggi fuori tema con retry
-    if intent == "fuori_tema": # se l'intento è fuori tema
-        retry_prompt = f""" 
+
+# prompt per ricontrollare i messaggi fuori tema
+def build_retry_prompt(conversation_context: str, message: str) -> str:
+    return f""" 
         Ecco la conversazione recente:
         {conversation_context} 
 
-        L'utente ora dice: "{msg.message}"
+        L'utente ora dice: "{message}"
 
         Questa frase è collegata alla conversazione precedente?
         Se sì, spiega brevemente come. Se no, rispondi "fuori_tema".
         """
-        retry = travel_model.generate_content(retry_prompt).text.strip().lower() # ottengo il risultato
-        if "fuori_tema" in retry:
-            return {
-                "response": "Posso aiutarti solo con argomenti legati ai viaggi 😊. "
-                            "Prova a chiedermi una meta, un consiglio o un periodo per un viaggio!",
-                "intent": intent
-            }
 
-    # Prompt principale per la risposta AI
-    prompt = f"""
+
+# Prompt principale per la risposta AI
+def build_chat_prompt(conversation_context: str, message: str) -> str:
+    return f"""
     Sei un assistente AI esperto di viaggi e turismo, disponibile a fornire consigli pratici, 
     idee, informazioni su mete, attività, trasporti, alloggi, stagioni, budget e cultura locale.
 
@@ -186,7 +316,7 @@ def generate_message(msg: UserMessage, db: Session = Depends(get_db), current_us
     {conversation_context}
 
     Nuovo messaggio:
-    Utente: "{msg.message}"
+    Utente: "{message}"
 
     Rispondi in modo chiaro, dettagliato e amichevole.
     Mantieni coerenza con la destinazione, stagione e budget già discussi.
@@ -197,65 +327,240 @@ def generate_message(msg: UserMessage, db: Session = Depends(get_db), current_us
     Rispondi solo in lingua italiana.
     """
 
-    try:
-        response = travel_model.generate_content(prompt) # ottengo la risposta dall'AI
 
-        # pulisco il testo rimuovendo caratteri indesiderati
-        cleaned_text = (response.text.replace("**", "").replace("*", "").replace("###", "").replace("\n\n", "\n").strip())
+# controllo se l'utente vuole terminare la conversazione (nessuna chiamata all'AI)
+def is_termination(message: str) -> bool:
+    return any(kw in message.lower() for kw in TERMINATION_KEYWORDS)
 
-        # aggiornamento cronologia con limite a 20 messaggi
-        history.append({"user": msg.message, "ai": cleaned_text})
-        chat_db.messages = history[-MAX_STORED_HISTORY:]
 
-        # salvo la chat nel DB
-        if not chat_db.title or chat_db.title == "Nuova Chat": # chiamo le 2 funzioni per generare il titolo
-           raw_title = generate_ai_title(msg.message)
-           chat_db.title = clean_title(raw_title)
+# funzione per classificare il messaggio dell'utente
+# ritorna (intento, risposta fissa) se il messaggio è fuori tema, altrimenti (intento, None)
+async def classify_message(message: str, history: list[ChatMessageDB], conversation_context: str) -> tuple[str, str | None]:
+    # prima provo il classificatore locale: l'AI serve solo quando non è sicuro
+    if settings.INTENT_LOCAL_ENABLED:
+        intent = classify_locally(message, settings.INTENT_MIN_CONFIDENCE)
+        if intent == OFF_TOPIC and not history:
+            return intent, OFF_TOPIC_REPLY
+        if intent == OFF_TOPIC:
+            # con una conversazione in corso ricontrollo col contesto, come per l'intento dell'AI
+            retry = (await generate_content(build_retry_prompt(conversation_context, message), "retry")).text.strip().lower()
+            return intent, OFF_TOPIC_REPLY if "fuori_tema" in retry else None
+        if intent:
+            return intent, None
 
+    # prendo l'ultimo messaggio dell'AI per fornire contesto
+    last_ai = history[-1].ai if history else ""
 
-        db.add(chat_db)
-        db.commit()
-        db.refresh(chat_db)
+    # Analisi intento dell'utente
+    intent = (await generate_content(build_intent_prompt(last_ai, message), "intent")).text.strip().lower()
+
+    # Gestione messaggi fuori tema con retry
+    if intent == "fuori_tema": # se l'intento è fuori tema
+        retry = (await generate_content(build_retry_prompt(conversation_context, message), "retry")).text.strip().lower() # ottengo il risultato
+        if "fuori_tema" in retry:
+            return intent, OFF_TOPIC_REPLY
+
+    return intent, None
+
+
+# funzione per salvare uno scambio nella cronologia della chat
+# ogni scambio è una nuova riga: il costo non cresce con la lunghezza della conversazione
+async def save_exchange(chat_id: int, user_message: str, ai_message: str, db: AsyncSession):
+    db.add(ChatMessageDB(chat_id=chat_id, user=user_message, ai=ai_message))
+
+    # aggiorno ultima attività e anteprima usate dalla lista delle chat
+    await db.execute(
+        update(ChatDB).filter(ChatDB.id == chat_id)
+        .values(updated_at=func.now(), preview=make_preview(ai_message), version=ChatDB.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+# POST: funzione per generare il messaggio dall'AI
+@router.post("/")
+async def generate_message(msg: UserMessage, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    user_id = current_user["id"]
+    start = time.perf_counter()
+
+    #  Gestione creazione nuova chat 
+    if msg.mode == "new_chat": # se la modalità è nuova chat
+
+        title = "Nuova Chat"  # placeholder iniziale
+
+        # creo una nuova chat nel DB
+        new_chat = ChatDB(
+            user_id=user_id, # ID dell'utente
+            title=title # titolo della chat
+        )
+        db.add(new_chat) # aggiungo la nuova chat alla sessione
+        await db.commit() # salvo la chat nel DB
+
+        return {
+            "response": "Nuova chat creata!",
+            "chat_id": new_chat.id
+        }
+
+    chat_db = await get_or_create_chat(msg, user_id, db)
+    history, conversation_context = await prepare_context(chat_db, db, background_tasks)
+
+    # conversazione terminata: risposta fissa
+    if is_termination(msg.message):
+        await save_exchange(chat_db.id, msg.message, FAREWELL, db) # aggiorno la cronologia
+        return {"response": FAREWELL, "intent": "terminazione"}
+
+    # la risposta non dipende dall'intento: la chiedo subito, in parallelo alla classificazione
+    # se il messaggio risulta fuori tema la richiesta viene annullata
+    answer_task = asyncio.create_task(generate_content(build_chat_prompt(conversation_context, msg.message)))
+    try:
+        intent, reply = await classify_message(msg.message, history, conversation_context)
+    except BaseException:
+        answer_task.cancel()
+        raise
+    if reply:
+        answer_task.cancel()
+        return {"response": reply, "intent": intent}
+
+    try:
+        response = await answer_task # ottengo la risposta dall'AI
 
+        # pulisco il testo rimuovendo caratteri indesiderati
+        cleaned_text = clean_markdown(response.text)
+
+        # aggiornamento cronologia
+        await save_exchange(chat_db.id, msg.message, cleaned_text, db)
+
+        # il titolo viene generato dopo aver inviato la risposta
+        if not chat_db.title or chat_db.title == "Nuova Chat":
+            background_tasks.add_task(update_chat_title, chat_db.id, msg.message)
+
+        record_latency("chat_turn", time.perf_counter() - start)
         return {"response": cleaned_text, "intent": intent}
 
     except Exception as e:
         return {"response": f"Errore nella generazione: {e}", "intent": intent}
+
+
+# POST: come generate_message, ma la risposta dell'AI arriva a pezzi tramite Server-Sent Events
+# eventi inviati: "meta" (chat_id), messaggi senza nome con {"delta": testo}, "done" con la risposta completa, "error"
+# il titolo di una chat nuova viene generato dopo la fine dello stream
+@router.post("/stream")
+async def stream_message(msg: UserMessage, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    user_id = current_user["id"]
+    start = time.perf_counter()
+    chat_db = await get_or_create_chat(msg, user_id, db)
+    chat_id = chat_db.id
+    needs_title = not chat_db.title or chat_db.title == "Nuova Chat"
+    history, conversation_context = await prepare_context(chat_db, db, background_tasks)
+
+    async def events():
+        yield sse_event({"chat_id": chat_id}, "meta")
+
+        # la sessione della richiesta è già chiusa durante lo streaming: per salvare ne apro una nuova
+        async def persist(ai_message: str):
+            async with AsyncSessionLocal() as session:
+                await save_exchange(chat_id, msg.message, ai_message, session)
+
+        if is_termination(msg.message):
+            await persist(FAREWELL)
+            yield sse_event({"delta": FAREWELL})
+            yield sse_event({"response": FAREWELL, "intent": "terminazione", "chat_id": chat_id}, "done")
+            return
+
+        # lo stream della risposta parte subito, in parallelo alla classificazione:
+        # i pezzi restano in coda finché non so che il messaggio riguarda i viaggi
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                stream = await travel_model.generate_content_async(build_chat_prompt(conversation_context, msg.message), stream=True)
+                async for chunk in stream:
+                    await chunks.put(chunk.text)
+                await chunks.put(None) # fine dello stream
+            except Exception as e:
+                await chunks.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            intent, reply = await classify_message(msg.message, history, conversation_context)
+            if reply:
+                producer.cancel() # messaggio fuori tema: la risposta non serve più
+                yield sse_event({"delta": reply})
+                yield sse_event({"response": reply, "intent": intent, "chat_id": chat_id}, "done")
+                return
+
+            # inoltro i pezzi della risposta appena arrivano da Gemini, già puliti
+            cleaner = MarkdownCleaner()
+            first_delta = True
+            while (item := await chunks.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                delta = cleaner.feed(item)
+                if delta:
+                    if first_delta:
+                        record_latency("chat_first_token", time.perf_counter() - start)
+                        first_delta = False
+                    yield sse_event({"delta": delta})
+            delta = cleaner.flush()
+            if delta:
+                yield sse_event({"delta": delta})
+
+            # a fine stream salvo il messaggio completo
+            await persist(cleaner.text)
+            if needs_title:
+                background_tasks.add_task(update_chat_title, chat_id, msg.message)
+            record_latency("chat_turn", time.perf_counter() - start)
+            yield sse_event({"response": cleaner.text, "intent": intent, "chat_id": chat_id, "title": None}, "done")
+
+        except Exception as e:
+            yield sse_event({"detail": f"Errore nella generazione: {e}"}, "error")
+        finally:
+            producer.cancel() # se il client si disconnette interrompo anche la richiesta a Gemini
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # niente buffering dei proxy
+        background=background_tasks, # generazione del titolo dopo la fine dello stream
+    )
     
 
 # funzione per ottenere le esperienze dell'utente
-def get_user_experiences(user_id: int, db: Session):
-    user = db.query(UserDB).filter(UserDB.id == user_id).first()
+async def get_user_experiences(user_id: int, db: AsyncSession):
+    result = await db.execute(select(UserDB).filter(UserDB.id == user_id))
+    user = result.scalars().first()
     return user.experiences if user and user.experiences else []
 
 
 # POST: funzione per ottenere il messaggio dall'AI in base alle esperienze dell'utente
 @router.post("/recommendations/{user_id}")
-def get_travel_recommendations(user_id: int, data: RecommendationRequest, db: Session = Depends(get_db)):
+async def get_travel_recommendations(user_id: int, data: RecommendationRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
 
     chat_id = data.chat_id # ID della chat
     title = "Nuova Chat"  # placeholder iniziale
 
     # recupera o creo una chat
     if chat_id:
-        chat = db.query(ChatDB).filter(ChatDB.id == chat_id, ChatDB.user_id == user_id).first() # ottengo la chat
+        result = await db.execute(select(ChatDB).filter(ChatDB.id == chat_id, ChatDB.user_id == user_id))
+        chat = result.scalars().first() # ottengo la chat
         if not chat:
             raise HTTPException(status_code=404, detail="Chat non trovata")
     else:
         chat = ChatDB( # creo una nuova chat
             user_id=user_id,
-            title=title,
-            messages=[]
+            title=title
             )
         db.add(chat) # aggiungo alla sessione
-        db.commit() # salvo nel DB
-        db.refresh(chat) # aggiorno l'istanza
+        await db.commit() # salvo nel DB
 
-    history = chat.messages or []
-    MAX_STORED_HISTORY = 20      # quanto salvi nel DB
+    # il titolo va generato solo al primo messaggio
+    result = await db.execute(select(ChatMessageDB.id).filter(ChatMessageDB.chat_id == chat.id).limit(1))
+    first_message = result.first() is None
 
     # recupero le esperienze di viaggio dell'utente    
-    experiences = get_user_experiences(user_id, db) 
+    experiences = await get_user_experiences(user_id, db) 
+    # ordine e duplicati non cambiano la richiesta: normalizzo per riusare la risposta in cache
+    experiences = sorted({e.strip() for e in experiences if e and e.strip()}, key=str.lower)
     experiences_text = ", ".join(experiences) if experiences else "nessuna esperienza specificata"
 
     prompt = f"""
@@ -284,44 +589,44 @@ def get_travel_recommendations(user_id: int, data: RecommendationRequest, db: Se
     Ispirare l'utente con proposte nuove e personalizzate, mantenendo sempre il focus su viaggi e turismo.
     """
 
-    # ottengo il testo generato dall'AI
-    response = travel_model.generate_content(prompt).text.strip()
+    # ottengo il testo generato dall'AI (dalla cache se le esperienze non sono cambiate)
+    async def generate(prompt: str) -> str:
+        return (await generate_content(prompt, "recommendations")).text.strip()
+
+    response = await cached_generate(prompt, generate, travel_model.model_name)
 
     # pulisco il testo per rimuovere caratteri indesiderati
-    cleaned_text = (response.replace("**", "").replace("*", "").replace("###", "").replace("##", "").replace("\n\n", "\n").strip())
+    cleaned_text = clean_markdown(response, RECOMMENDATION_HEADINGS)
 
     # aggiorna cronologia in memoria e DB
-    history.append({"user": "Richiesta raccomandazioni basata sulle esperienze", "ai": cleaned_text})
-    chat.messages = history[-MAX_STORED_HISTORY:]
-
-    #  Genera il titolo (solo se primo messaggio)
-    if len(history) == 1:
-       title_seed = f"Raccomandazioni viaggio: {experiences_text}"
-       raw_title = generate_ai_title(title_seed)
-       chat.title = clean_title(raw_title)
+    await save_exchange(chat.id, "Richiesta raccomandazioni basata sulle esperienze", cleaned_text, db)
 
-    db.add(chat)
-    db.commit()
-    db.refresh(chat)
+    #  Genera il titolo dopo la risposta (solo se primo messaggio)
+    if first_message:
+       background_tasks.add_task(update_chat_title, chat.id, f"Raccomandazioni viaggio: {experiences_text}")
 
     return {"recommendations": cleaned_text, "chat_id": chat.id }  # ritorna chat_id per continuare la conversazione
 
 
 # DELETE: funzione per cancellare una chat
 @router.delete("/{chat_id}")
-def delete_chat(chat_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def delete_chat(chat_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     # cerco la chat filtrando per user_id
-    chat = db.query(ChatDB).filter(
+    result = await db.execute(select(ChatDB).filter(
         ChatDB.id == chat_id,
         ChatDB.user_id == user_id
-    ).first()
+    ))
+    chat = result.scalars().first()
 
     if not chat:
         raise HTTPException(status_code=404, detail="Chat non trovata")
-    
-    db.delete(chat)  # cancella la chat
-    db.commit()      # conferma le modifiche nel database
+
+    # elimino i messaggi della chat
+    await db.execute(delete(ChatMessageDB).filter(ChatMessageDB.chat_id == chat_id))
+
+    await db.delete(chat)  # cancella la chat
+    await db.commit()      # conferma le modifiche nel database
     return {"messaggio": f"Chat {chat_id} eliminata con successo"}
 
 
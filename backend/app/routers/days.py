@@ -1,34 +1,39 @@
 from fastapi import APIRouter, Form, UploadFile, Depends, HTTPException  # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori
-from sqlalchemy.orm import Session  # sessione ORM per interagire con il database
+from sqlalchemy import select, update  # costruzione delle query
+from sqlalchemy.ext.asyncio import AsyncSession  # sessione ORM asincrona per interagire con il database
 from typing import List, Optional
-from app.database import SessionLocal  # connessione locale al DB (crea le sessioni)
+from app.database import get_db, bump_version # dependency condivisa che fornisce la sessione del DB e incremento della versione
 from app.models.travel_db import TravelDB  # modello ORM per la tabella dei viaggi
 from app.models.day_db import DayDB  # modello ORM per la tabella dei giorni
 from app.schemas.days import Day # classe Pydantic per i giorni
-from app.utils.travels import format_date, get_coordinates  # funzioni di utilità per formattare date e ottenere coordinate
-from app.config import cloudinary   # importo la configurazione di Cloudinary
-import cloudinary.uploader  # per caricare immagini su Cloudinary
+from app.utils.travels import parse_date  # funzione di utilità per leggere le date
+from app.utils.geocoding import get_cached_coordinates, enqueue_geocoding  # per ottenere le coordinate dalla cache o metterle in coda
+from app.utils.images import make_variants # per creare le varianti ridimensionate delle foto
+from app.utils.storage import read_upload, upload_bytes # per leggere le foto a chunk e salvarle nel backend configurato
+from app.utils.travel_cache import invalidate_user_travels # le risposte dei viaggi in cache contengono le tappe
+from app.utils.travel_stats import apply_travel_stats # le statistiche contano anche le tappe
+from app.config import settings # importo le impostazioni (formato delle varianti)
 from app.auth import get_current_user # importo la funzione per ottenere l'utente in base al token fornito
 import asyncio
 
 # creo il router per i giorni, con prefisso e tag
 router = APIRouter(prefix="/travels", tags=["days"])
 
-# Dependency: fornisce una sessione di database a ogni richiesta API.
-# La sessione viene creata all'inizio, resa disponibile tramite yield,
-# e chiusa automaticamente alla fine della richiesta (pattern try/finally).
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db  # restituisce la sessione da usare nelle query
-    finally:
-        db.close()  # chiude la sessione per evitare memory leak
-
 
 # Funzione che mi permette di fare l'upload delle foto in modo asincrono
-async def upload_photo(photo):
-    # Upload su Cloudinary in thread separato
-    return await asyncio.to_thread(cloudinary.uploader.upload, photo.file)
+# la foto viene ridimensionata nel pool di processi e ogni variante caricata nel backend di archiviazione
+async def upload_photo(photo) -> dict[str, str]:
+    variants = await make_variants(await read_upload(photo))
+    extension = "." + settings.IMAGE_FORMAT.lower().replace("jpeg", "jpg")
+    # Upload delle varianti in parallelo (entro il limite UPLOAD_CONCURRENCY)
+    urls = await asyncio.gather(*(upload_bytes(data, extension) for data in variants.values()))
+    return dict(zip(variants, urls))
+
+
+# varianti delle foto mantenute in modifica: per le foto caricate prima delle varianti uso l'URL originale
+def keep_photo_variants(existing_photos: List[str], photo_variants: Optional[list]) -> list[dict]:
+    known = {variants["full"]: variants for variants in photo_variants or []}
+    return [known.get(url, {"thumb": url, "medium": url, "full": url}) for url in existing_photos]
 
 
 #  POST: aggiunge un giorno a un viaggio esistente
@@ -41,24 +46,30 @@ async def add_day_travel(
     description: str = Form(...),
     experiences: Optional[List[str]] = Form(None),
     photos: List[UploadFile] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user) 
 ):
     user_id = current_user["id"]
+    day_date = parse_date(date) # ISO (YYYY-MM-DD) o DD-MM-YYYY
+    if day_date is None:
+        raise HTTPException(status_code=400, detail="Data non valida")
+
     # controllo che il viaggio esista
-    travel = db.query(TravelDB).filter(TravelDB.id == travel_id, TravelDB.user_id == user_id).first()
+    result = await db.execute(select(TravelDB).filter(TravelDB.id == travel_id, TravelDB.user_id == user_id))
+    travel = result.scalars().first()
     if not travel:
         raise HTTPException(status_code=404, detail="Viaggio non trovato")
 
-    # ottengo le coordinate geografiche per il giorno
-    lat, lng = await get_coordinates(title, city, travel.town)
+    # ottengo le coordinate geografiche per il giorno dalla cache
+    # se non ci sono, la tappa viene salvata in attesa e le calcola il worker in background
+    coords = await get_cached_coordinates(title, city, travel.town, db)
+    lat, lng = coords or (None, None)
 
     # carico le foto su Cloudinary in parallelo
-    photo_urls = []
+    photo_variants = []
     if photos:
         upload_tasks = [upload_photo(photo) for photo in photos]
-        results = await asyncio.gather(*upload_tasks)
-        photo_urls = [res["secure_url"] for res in results]
+        photo_variants = list(await asyncio.gather(*upload_tasks))
 
     # carico le esperienze
     experiences_data = experiences or []
@@ -66,18 +77,25 @@ async def add_day_travel(
     # creo il giorno nel DB
     db_day = DayDB(
         city=city,
-        date=format_date(date),
+        date=day_date,
         title=title,
         description=description,
         experiences=experiences_data,
-        photo=photo_urls,
+        photo=[variants["full"] for variants in photo_variants],
+        photo_variants=photo_variants,
         lat=lat,
         lng=lng,
+        geocode_pending=coords is None,
         travel_id=travel_id
     )
     db.add(db_day)       # il giorno viene salvato
-    db.commit()          # salva le modifiche
-    db.refresh(db_day)   # database aggiornato
+    bump_version(travel) # il viaggio cambia insieme alle sue tappe (ETag)
+    await apply_travel_stats(db, user_id, travel.year, travel.town, {"days": 1})
+    await db.commit()    # salva le modifiche
+    await invalidate_user_travels(user_id)
+
+    if db_day.geocode_pending:
+        enqueue_geocoding()
     return db_day
 
 
@@ -93,69 +111,92 @@ async def update_day_travel(
     experiences: Optional[List[str]] = Form(None),
     photos: List[UploadFile] = None,
     existing_photos: List[str] = Form([]),  # URL foto già presenti
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["id"]
+    day_date = parse_date(date) # ISO (YYYY-MM-DD) o DD-MM-YYYY
+    if day_date is None:
+        raise HTTPException(status_code=400, detail="Data non valida")
 
     # controllo che il viaggio appartenga all'utente
-    travel = db.query(TravelDB).filter(
+    result = await db.execute(select(TravelDB).filter(
         TravelDB.id == travel_id,
         TravelDB.user_id == user_id
-    ).first()
+    ))
+    travel = result.scalars().first()
     if not travel:
         raise HTTPException(status_code=404, detail="Viaggio non trovato")
 
     # controllo che il giorno esista
-    db_day = db.query(DayDB).filter(
+    result = await db.execute(select(DayDB).filter(
         DayDB.id == day_id,
         DayDB.travel_id == travel_id
-    ).first()
+    ))
+    db_day = result.scalars().first()
     if not db_day:
         raise HTTPException(status_code=404, detail="Giorno non trovato")
     
     # carico le esperienze
     experiences_data = experiences or []
 
+    # le coordinate vanno ricalcolate solo se cambia il luogo della tappa
+    place_changed = db_day.title != title or db_day.city != city or db_day.lat is None
+
     # aggiorno i campi
     db_day.city = city
-    db_day.date = format_date(date)
+    db_day.date = day_date
     db_day.title = title
     db_day.description = description
     db_day.experiences = experiences_data
 
     # gestisco le foto: mantieni quelle esistenti + nuove caricate
-    photo_urls = existing_photos or []
+    photo_variants = keep_photo_variants(existing_photos or [], db_day.photo_variants)
     if photos:
         # upload in parallelo
         upload_tasks = [upload_photo(photo) for photo in photos]
-        results = await asyncio.gather(*upload_tasks)
-        photo_urls += [res["secure_url"] for res in results]
+        photo_variants += await asyncio.gather(*upload_tasks)
 
-    db_day.photo = photo_urls
+    db_day.photo = [variants["full"] for variants in photo_variants]
+    db_day.photo_variants = photo_variants
 
     # aggiorno lat/lng
-    db_day.lat, db_day.lng = await get_coordinates(title, city, travel.town)
-
-    db.commit()
-    db.refresh(db_day)
+    if place_changed:
+        coords = await get_cached_coordinates(title, city, travel.town, db)
+        db_day.lat, db_day.lng = coords or (None, None)
+        db_day.geocode_pending = coords is None
+
+    bump_version(db_day)
+    bump_version(travel) # il viaggio cambia insieme alle sue tappe (ETag)
+    await db.commit()
+    await invalidate_user_travels(user_id)
+
+    if db_day.geocode_pending:
+        enqueue_geocoding()
     return db_day
 
 
 #  DELETE: elimina un giorno da un viaggio
 @router.delete("/{travel_id}/days/{day_id}")
-def delete_day_travel(travel_id: int, day_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def delete_day_travel(travel_id: int, day_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     # trovo il giorno da eliminare
-    day = db.query(DayDB).join(TravelDB).filter(
+    # insieme ad anno e paese del viaggio, per aggiornare le statistiche
+    result = await db.execute(select(DayDB, TravelDB.year, TravelDB.town).join(TravelDB).filter(
         DayDB.id == day_id,
         TravelDB.id == travel_id,
         TravelDB.user_id == user_id
-    ).first()
+    ))
+    row = result.first()
     
-    if not day:
+    if not row:
         raise HTTPException(status_code=404, detail="Giorno non trovato")
-
-    db.delete(day)     # elimina il giorno
-    db.commit()        # conferma le modifiche nel DB
+    day = row.DayDB
+
+    await db.delete(day)  # elimina il giorno
+    await apply_travel_stats(db, user_id, row.year, row.town, {"days": 1}, sign=-1)
+    # il viaggio cambia insieme alle sue tappe (ETag)
+    await db.execute(update(TravelDB).filter(TravelDB.id == travel_id).values(version=TravelDB.version + 1))
+    await db.commit()     # conferma le modifiche nel DB
+    await invalidate_user_travels(user_id)
     return {"messaggio": f"Giorno {day_id} eliminato dal viaggio {travel_id}"}
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status # strumenti di FastAPI per il routing
+import hmac # confronto del token in tempo costante
+from app.config import settings # token delle metriche
+from app.database import pool_status # stato del pool di connessioni al DB
+from app.utils.geocoding import geocode_stats # statistiche della cache delle coordinate
+from app.utils.metrics import latency_stats # percentili delle latenze misurate
+from app.utils.intent import intent_stats # intenti decisi in locale o dall'AI
+from app.utils.llm_cache import llm_cache_stats # hit e miss della cache delle risposte dell'AI
+from app.auth import token_cache_stats # hit e miss della cache dei token verificati
+from app.utils.users import hashing_stats # coda e richieste rifiutate dell'hashing delle password
+from app.utils.images import image_stats # foto elaborate e byte risparmiati dalle varianti
+from app.utils.storage import storage_stats # caricamenti in corso, in attesa e completati
+from app.utils.http_cache import http_cache_stats # GET condizionali risolti con 304
+from app.utils.travel_cache import travel_cache_stats # risposte dei viaggi servite dalla cache
+
+
+# le metriche descrivono pool, code e cache del server: le legge solo chi conosce METRICS_TOKEN
+# (main.py registra il router solo se il token è impostato)
+def require_metrics_token(x_metrics_token: str | None = Header(default=None)):
+    if not settings.METRICS_TOKEN or x_metrics_token is None or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+# creo il router per le rotte interne di monitoraggio
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+
+
+# GET: metriche interne dell'applicazione
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "database_pool": pool_status(), # connessioni in uso, libere, overflow e attesa
+        "geocoding": geocode_stats(),   # hit e miss della cache delle coordinate
+        "latency": latency_stats(),     # p50/p95/p99 dei turni di chat e delle chiamate all'AI
+        "intent": intent_stats(),       # classificazioni locali e ricorsi all'AI
+        "llm_cache": llm_cache_stats(), # risposte dell'AI servite dalla cache
+        "password_hashing": hashing_stats(), # hash in corso, completati, falliti e rifiutati (503)
+        "token_cache": token_cache_stats(),  # token serviti dalla cache senza rifare la verifica della firma
+        "images": image_stats(),             # foto ridimensionate, rifiutate e byte prima/dopo
+        "storage": storage_stats(),          # caricamenti verso il backend di archiviazione
+        "http_cache": http_cache_stats(),    # risposte 304 (il client aveva già la versione attuale) e complete
+        "travel_cache": travel_cache_stats(),  # risposte di GET /travels servite senza query sulle tappe né serializzazione
+    }
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori e parametri
+from sqlalchemy import select, func, cast, and_, or_, Integer # costruzione delle query
+from sqlalchemy.ext.asyncio import AsyncSession # sessione ORM asincrona per interagire con il database
+from app.database import get_db # dependency condivisa che fornisce la sessione del DB
+from app.models.travel_db import TravelDB # modello ORM per la tabella dei viaggi
+from app.models.day_db import DayDB # modello ORM per la tabella dei giorni
+from app.schemas.days import MarkerCluster # classe Pydantic per i marker della mappa
+from app.utils.markers import parse_bbox, cluster_cell_size # bbox e griglia dei gruppi
+from app.config import settings # importo le impostazioni (zoom oltre il quale non si raggruppa)
+from app.auth import get_current_user # importo la funzione per ottenere l'utente in base al token fornito
+
+# creo il router per i marker delle tappe sulla mappa
+router = APIRouter(prefix="/days", tags=["days"])
+
+
+# GET: marker delle tappe dell'utente nell'area visibile della mappa, raggruppati in base allo zoom
+# il raggruppamento avviene nel DB (GROUP BY sulla cella della griglia): il numero di gruppi dipende dalla
+# dimensione della mappa sullo schermo e non dal numero di tappe, anche per chi ne ha migliaia
+@router.get("/markers", response_model=list[MarkerCluster])
+async def get_day_markers(
+    bbox: str,                                      # area visibile: "ovest,sud,est,nord"
+    zoom: int = Query(..., ge=0, le=22),            # zoom della mappa
+    travel_id: int | None = None,                   # solo le tappe di un viaggio
+    db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)
+):
+    bounds = parse_bbox(bbox)
+    if bounds is None:
+        raise HTTPException(status_code=400, detail="bbox non valido")
+    west, south, east, north = bounds
+
+    # solo le tappe con le coordinate dentro l'area (indice su viaggio, latitudine e longitudine)
+    if west <= east:
+        in_lng = DayDB.lng.between(west, east)
+    else:
+        in_lng = or_(DayDB.lng >= west, DayDB.lng <= east) # l'area attraversa l'antimeridiano
+    filters = [TravelDB.user_id == current_user["id"], and_(DayDB.lat.between(south, north), in_lng)]
+    if travel_id is not None:
+        filters.append(DayDB.travel_id == travel_id)
+
+    # da MARKER_CLUSTER_MAX_ZOOM in su ogni tappa è un marker a sé: anche le tappe con le stesse coordinate
+    # (stesso luogo trovato dal geocoding) restano separate, altrimenti il loro gruppo non si potrebbe mai aprire
+    if zoom >= settings.MARKER_CLUSTER_MAX_ZOOM:
+        result = await db.execute(
+            select(DayDB.id, DayDB.travel_id, DayDB.city, DayDB.date, DayDB.title, DayDB.lat, DayDB.lng)
+            .join(TravelDB, TravelDB.id == DayDB.travel_id)
+            .filter(*filters)
+            .order_by(DayDB.id)
+        )
+        return [
+            {
+                "lat": row.lat,
+                "lng": row.lng,
+                "count": 1,
+                "day": {"id": row.id, "travel_id": row.travel_id, "city": row.city, "date": row.date, "title": row.title},
+            }
+            for row in result.all()
+        ]
+
+    # cella della griglia di ogni tappa, ancorata a (-90, -180): i gruppi non cambiano spostando la mappa
+    lat_size, lng_size = cluster_cell_size(zoom, south, north)
+    lat_cell = cast((DayDB.lat + 90) / lat_size, Integer).label("lat_cell")
+    lng_cell = cast((DayDB.lng + 180) / lng_size, Integer).label("lng_cell")
+
+    result = await db.execute(
+        select(
+            lat_cell, lng_cell,
+            func.count(DayDB.id).label("count"),
+            func.avg(DayDB.lat).label("lat"),
+            func.avg(DayDB.lng).label("lng"),
+            func.min(DayDB.id).label("day_id"), # l'unica tappa, nei gruppi da uno
+        )
+        .join(TravelDB, TravelDB.id == DayDB.travel_id)
+        .filter(*filters)
+        .group_by(lat_cell, lng_cell)
+    )
+    groups = result.all()
+
+    # dati per il popup delle tappe singole, con una sola query
+    single_ids = [group.day_id for group in groups if group.count == 1]
+    days = {}
+    if single_ids:
+        result = await db.execute(
+            select(DayDB.id, DayDB.travel_id, DayDB.city, DayDB.date, DayDB.title).filter(DayDB.id.in_(single_ids))
+        )
+        days = {row.id: row._asdict() for row in result.all()}
+
+    return [
+        {
+            "lat": group.lat,
+            "lng": group.lng,
+            "count": group.count,
+            "day": days.get(group.day_id) if group.count == 1 else None,
+        }
+        for group in groups
+    ]
@@ -1,113 +1,226 @@
-from fastapi import APIRouter, Depends, HTTPException # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori
-from sqlalchemy import func # funzioni SQL generiche (es. per ordinamenti personalizzati)
-from sqlalchemy.orm import Session # sessione ORM per interagire con il database
-from app.database import SessionLocal # connessione locale al DB (crea le sessioni)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori, parametri, header della richiesta e della risposta
+from sqlalchemy import select, tuple_ # costruzione delle query e confronto su più colonne (paginazione keyset)
+from sqlalchemy.ext.asyncio import AsyncSession # sessione ORM asincrona per interagire con il database
+from sqlalchemy.orm import selectinload # per caricare le tappe insieme ai viaggi
+from app.database import get_db, bump_version # dependency condivisa che fornisce la sessione del DB e incremento della versione
 from app.models.travel_db import TravelDB # modello ORM per la tabella dei viaggi
-from app.schemas.travels import Travel, TravelCreate # classi Pydantic per i viaggi
-from app.utils.travels import format_date # funzioni di utilità per formattare date
+from app.models.travel_stats_db import TravelStatsDB # modello ORM per le statistiche dei viaggi
+from app.schemas.travels import Travel, TravelCreate, TravelStats # classi Pydantic per i viaggi e le loro statistiche
+from app.utils.travels import encode_cursor, decode_cursor # funzioni di utilità per gestire il cursore della paginazione
+from app.utils.http_cache import make_etag, not_modified_response, json_bytes_response # ETag, risposte 304 e risposte già serializzate
+from app.utils.travel_cache import cached_travel_payload, invalidate_user_travels, serialize_travel, serialize_travels # cache per utente delle risposte dei viaggi
+from app.utils.travel_stats import apply_travel_stats, replace_travel_stats, travel_contribution, build_stats # statistiche dei viaggi aggiornate a ogni modifica
+from app.utils.geocoding import enqueue_geocoding # per ricalcolare le coordinate delle tappe quando cambia il paese
 from app.auth import get_current_user # importo la funzione per ottenere l'utente in base al token fornito
 
 # creo il router per il modulo "travels"
 router = APIRouter(prefix="/travels", tags=["travels"])
 
-# Dependency: fornisce una sessione di database a ogni richiesta API.
-# La sessione viene creata all'inizio, resa disponibile tramite yield,
-# e chiusa automaticamente alla fine della richiesta (pattern try/finally).
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db  # restituisce la sessione da usare nelle query
-    finally:
-        db.close()  # chiude la sessione per evitare memory leak
 
-
-# GET: per ottenere tutti i viaggi
+# GET: per ottenere i viaggi, filtrabili per anno e paginati con un cursore (keyset)
+# il cursore della pagina successiva viene restituito nell'header "X-Next-Cursor"
+# se il client ha già la pagina aggiornata (If-None-Match) risponde 304 senza leggere le tappe
 @router.get("/", response_model=list[Travel])
-def get_travels(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)): # Sessione DB iniettata come dipendenza (Depends), prendo l'id dal token
+async def get_travels(
+    request: Request,
+    response: Response,
+    year: int | None = None,                              # filtra i viaggi di un solo anno
+    limit: int | None = Query(None, ge=1, le=100),        # numero massimo di viaggi per pagina (None = tutti)
+    cursor: str | None = None,                            # cursore ricevuto dalla pagina precedente
+    db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user) # Sessione DB iniettata come dipendenza (Depends), prendo l'id dal token
+):
     user_id = current_user["id"]
     # restituisce solo i viaggi dell'utente loggato dal più recente al più vecchio
-    travels = (
-        db.query(TravelDB)
+    query = (
+        select(TravelDB)
         .filter(TravelDB.user_id == user_id)
-        .order_by(
-            TravelDB.year.desc(),
-            func.str_to_date(TravelDB.start_date, "%Y-%m-%d").desc()
+        .order_by(TravelDB.year.desc(), TravelDB.start_date.desc(), TravelDB.id.desc())
+    )
+
+    if year is not None:
+        query = query.filter(TravelDB.year == year)
+
+    # riparto dall'ultimo viaggio della pagina precedente
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(status_code=400, detail="Cursore non valido")
+        query = query.filter(tuple_(TravelDB.year, TravelDB.start_date, TravelDB.id) < tuple_(*position))
+
+    # chiedo un viaggio in più per sapere se esiste una pagina successiva
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    # prima leggo solo id e versione dei viaggi della pagina: bastano per l'ETag
+    result = await db.execute(query.with_only_columns(
+        TravelDB.id, TravelDB.version, TravelDB.updated_at, TravelDB.year, TravelDB.start_date
+    ))
+    rows = result.all()
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.year, last.start_date, last.id)
+
+    # le versioni crescono anche quando cambiano le tappe, quindi (id, versione) descrive tutta la pagina;
+    # l'ultima modifica distingue un viaggio nuovo da uno eliminato con lo stesso id (entrambi alla versione 1)
+    etag = make_etag("travels", user_id, [(row.id, row.version, row.updated_at) for row in rows])
+    last_modified = max((row.updated_at for row in rows), default=None)
+    not_modified = not_modified_response(request, response, etag, last_modified, use_modified_since=False)
+    if not_modified:
+        return not_modified
+
+    # la pagina è cambiata per il client: la prendo dalla cache o carico i viaggi con le tappe
+    # le tappe vanno caricate qui: con la sessione asincrona non esiste il lazy load
+    async def build() -> bytes:
+        result = await db.execute(
+            select(TravelDB).options(selectinload(TravelDB.days))
+            .filter(TravelDB.id.in_([row.id for row in rows]))
+            .order_by(TravelDB.year.desc(), TravelDB.start_date.desc(), TravelDB.id.desc())
         )
-        .all()
+        return serialize_travels(result.scalars().all())
+
+    return json_bytes_response(await cached_travel_payload(user_id, etag, build), response)
+
+
+# GET: per ottenere gli anni in cui l'utente ha viaggiato (per i filtri del frontend)
+@router.get("/years", response_model=list[int])
+async def get_travel_years(db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    user_id = current_user["id"]
+    result = await db.execute(
+        select(TravelDB.year).filter(TravelDB.user_id == user_id).distinct().order_by(TravelDB.year.desc())
     )
-    return travels
+    return result.scalars().all()
+
+
+# GET: statistiche dei viaggi per il profilo (paesi visitati, viaggi e tappe per anno, medie dei voti)
+# una sola query sulle righe riassuntive, aggiornate dalle rotte che modificano viaggi e tappe
+@router.get("/stats", response_model=TravelStats)
+async def get_travel_stats(db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    result = await db.execute(select(TravelStatsDB).filter(TravelStatsDB.user_id == current_user["id"]))
+    return build_stats(result.scalars().all())
 
 
 #  GET: per ottenere un viaggio singolo tramite ID
+# con If-None-Match / If-Modified-Since risponde 304 se il viaggio e le sue tappe non sono cambiati
 @router.get("/{travel_id}", response_model=Travel)
-def get_travel(travel_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)): # ID del nuovo viaggio
+async def get_travel(travel_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)): # ID del nuovo viaggio
     user_id = current_user["id"]
-    travel = db.query(TravelDB).filter(TravelDB.id == travel_id, TravelDB.user_id == user_id).first() # ottengo il viaggio
-    if not travel:
+
+    # leggo solo versione e ultima modifica per decidere se serve la risposta completa
+    result = await db.execute(
+        select(TravelDB.version, TravelDB.updated_at).filter(TravelDB.id == travel_id, TravelDB.user_id == user_id)
+    )
+    state = result.first()
+    if not state:
         raise HTTPException(status_code=404, detail="Viaggio non trovato")
-    return travel
+    etag = make_etag("travel", travel_id, state.version, state.updated_at) # updated_at: l'id può essere riusato dopo un'eliminazione
+    not_modified = not_modified_response(request, response, etag, state.updated_at)
+    if not_modified:
+        return not_modified
+
+    # risposta dalla cache o dal DB (con le tappe)
+    async def build() -> bytes:
+        result = await db.execute(
+            select(TravelDB).options(selectinload(TravelDB.days)).filter(TravelDB.id == travel_id, TravelDB.user_id == user_id)
+        )
+        travel = result.scalars().first() # ottengo il viaggio
+        if not travel:
+            raise HTTPException(status_code=404, detail="Viaggio non trovato")
+        return serialize_travel(travel)
+
+    return json_bytes_response(await cached_travel_payload(user_id, etag, build), response)
 
 
 #  POST: per aggiungere un nuovo viaggio 
 @router.post("/", response_model=Travel)
-def add_travel(travel: TravelCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def add_travel(travel: TravelCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     # creo il record del viaggio
     db_travel = TravelDB(
         town=travel.town,
         year=travel.year,
-        start_date=format_date(travel.start_date),
-        end_date=format_date(travel.end_date),
+        start_date=travel.start_date,
+        end_date=travel.end_date,
         general_vote=travel.general_vote,
         votes=travel.votes,
-        user_id=user_id
+        user_id=user_id,
+        days=[] # un nuovo viaggio non ha ancora tappe
     )
     db.add(db_travel)     # il viaggio viene salvato
-    db.commit()           # salva le modifiche
-    db.refresh(db_travel) # database aggiornato
+    await apply_travel_stats(db, user_id, db_travel.year, db_travel.town, travel_contribution(db_travel, 0))
+    await db.commit()     # salva le modifiche
+    await invalidate_user_travels(user_id) # le liste in cache non contengono il nuovo viaggio
 
     return db_travel
 
 
 # PUT: modifica un viaggio esistente 
 @router.put("/{travel_id}", response_model=Travel)
-def update_travel(travel_id: int, updated_travel: TravelCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def update_travel(travel_id: int, updated_travel: TravelCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
     # cerca il viaggio solo se appartiene all'utente
-    travel = db.query(TravelDB).filter(
-        TravelDB.id == travel_id,
-        TravelDB.user_id == user_id
-    ).first()
+    result = await db.execute(
+        select(TravelDB).options(selectinload(TravelDB.days)).filter(
+            TravelDB.id == travel_id,
+            TravelDB.user_id == user_id
+        )
+    )
+    travel = result.scalars().first()
 
     if not travel:
         raise HTTPException(status_code=404, detail="Viaggio non trovato")
 
+    # contributo alle statistiche prima della modifica
+    old_stats = (travel.year, travel.town, travel_contribution(travel, len(travel.days)))
+
+    # il paese fa parte della ricerca delle coordinate: se cambia, quelle delle tappe non valgono più
+    town_changed = travel.town != updated_travel.town
+
     # aggiorno i campi del viaggio
     travel.town = updated_travel.town
     travel.year = updated_travel.year
-    travel.start_date = format_date(updated_travel.start_date)
-    travel.end_date = format_date(updated_travel.end_date)
+    travel.start_date = updated_travel.start_date
+    travel.end_date = updated_travel.end_date
     travel.general_vote = updated_travel.general_vote
     travel.votes = updated_travel.votes
+    bump_version(travel) # nuova versione: i client con la copia vecchia riceveranno la risposta completa
+
+    # le tappe tornano in coda per il worker delle coordinate (che usa la cache prima di Nominatim)
+    if town_changed:
+        for day in travel.days:
+            day.lat, day.lng = None, None
+            day.geocode_pending = True
+            bump_version(day)
+
+    await replace_travel_stats(db, user_id, old_stats, (travel.year, travel.town, travel_contribution(travel, len(travel.days))))
 
-    db.commit()
-    db.refresh(travel)
+    await db.commit()
+    await invalidate_user_travels(user_id)
+
+    if town_changed and travel.days:
+        enqueue_geocoding()
     return travel
 
 
 # DELETE: elimina un viaggio 
 @router.delete("/{travel_id}")
-def delete_travel(travel_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+async def delete_travel(travel_id: int, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
     user_id = current_user["id"]
-    # cerco il viaggio filtrando anche per user_id
-    travel = db.query(TravelDB).filter(
-        TravelDB.id == travel_id,
-        TravelDB.user_id == user_id
-    ).first()
+    # cerco il viaggio filtrando anche per user_id (con le tappe, che vengono cancellate a cascata)
+    result = await db.execute(
+        select(TravelDB).options(selectinload(TravelDB.days)).filter(
+            TravelDB.id == travel_id,
+            TravelDB.user_id == user_id
+        )
+    )
+    travel = result.scalars().first()
     
     if not travel:
         raise HTTPException(status_code=404, detail="Viaggio non trovato")
 
-    db.delete(travel)  # elimina il viaggio
-    db.commit()         # conferma le modifiche nel DB
+    await apply_travel_stats(db, user_id, travel.year, travel.town, travel_contribution(travel, len(travel.days)), sign=-1)
+    await db.delete(travel)  # elimina il viaggio
+    await db.commit()        # conferma le modifiche nel DB
+    await invalidate_user_travels(user_id)
     return {"messaggio": f"Viaggio {travel_id} eliminato con successo"}
@@ -1,41 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form # strumenti di FastAPI: routing, injection delle dipendenze, gestione errori, caricamento file, gestione form
-from sqlalchemy.orm import Session # sessione ORM per interagire con il database
-from app.database import SessionLocal # connessione locale al DB (crea le sessioni)
+from sqlalchemy import select, delete # costruzione delle query
+from sqlalchemy.exc import IntegrityError # violazione dell'indice unico sull'email
+from sqlalchemy.ext.asyncio import AsyncSession # sessione ORM asincrona per interagire con il database
+from sqlalchemy.orm import selectinload # per caricare viaggi e tappe insieme all'utente
+from app.database import get_db # dependency condivisa che fornisce la sessione del DB
 from app.models.user_db import UserDB # modello ORM per la tabella dei viaggi
 from app.schemas.users import User # classe Pydantic per gli utenti
 from app.models.travel_db import TravelDB # modello ORM per la tabella dei viaggi
-from app.utils.users import get_password_hash, verify_password, validate_password # importo le funzioni per hashare, verificare e validare la password
-from app.config import cloudinary  # importo la configurazione di Cloudinary
-import cloudinary.uploader  # per caricare immagini su Cloudinary
+from app.models.travel_stats_db import TravelStatsDB # modello ORM per le statistiche dei viaggi
+from app.utils.users import hash_password, verify_and_update_password, validate_password # importo le funzioni per hashare, verificare e validare la password
+from app.utils.storage import upload_file # per caricare le foto nel backend di archiviazione configurato
+from app.utils.travel_cache import invalidate_user_travels # per eliminare dalla cache i viaggi dell'utente eliminato
 import json # per gestire la conversione da stringa JSON a lista Python
-from app.auth import create_access_token # importo la funzione per creare il token JWT
+from app.auth import create_access_token, oauth2_scheme, revoke_token # importo le funzioni per creare e revocare il token JWT
 from app.config import settings # importo le impostazioni
 from datetime import timedelta # per gestire la durata del token
 
 # creo il router per il modulo "users"
 router = APIRouter(prefix="/users", tags=["users"])
 
-# Dependency: fornisce una sessione di database a ogni richiesta API.
-# La sessione viene creata all'inizio, resa disponibile tramite yield,
-# e chiusa automaticamente alla fine della richiesta (pattern try/finally).
-def get_db():
-    db = SessionLocal()
+
+# salva le modifiche dell'utente: se nel frattempo un'altra richiesta ha registrato la stessa email
+# l'indice unico blocca il salvataggio e rispondo come al controllo fatto prima
+async def commit_unique_email(db: AsyncSession):
     try:
-        yield db  # restituisce la sessione da usare nelle query
-    finally:
-        db.close()  # chiude la sessione per evitare memory leak
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email già registrata")
 
 
 # GET: Funzione per ottenere tutti gli utenti
 @router.get("/", response_model=list[User])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(UserDB).all()  # mi restituisce tuti gli utenti
+async def get_users(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(UserDB).options(selectinload(UserDB.travels).selectinload(TravelDB.days)))
+    return result.scalars().all()  # mi restituisce tuti gli utenti
 
 
 #  GET: Funzione per ottenere un utente singolo tramite ID
 @router.get("/{user_id}", response_model=User)
-def get_user(user_id: int, db: Session = Depends(get_db)): # ID dell'utente, , Sessione DB iniettata come dipendenza (Depends)
-    user = db.query(UserDB).filter(UserDB.id == user_id).first() # ottengo l'utente
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)): # ID dell'utente, , Sessione DB iniettata come dipendenza (Depends)
+    result = await db.execute(select(UserDB).options(selectinload(UserDB.travels).selectinload(TravelDB.days)).filter(UserDB.id == user_id))
+    user = result.scalars().first() # ottengo l'utente
     if not user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
     return user
@@ -50,10 +56,11 @@ async def add_user(
     password: str = Form(...),
     experiences: str = Form(None),  # ricevo le esperienze come stringa JSON
     photo: UploadFile = File(None),  # ricevo la foto come file
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # controllo se l'utente già esiste
-    existing_user = db.query(UserDB).filter(UserDB.email == email).first()
+    result = await db.execute(select(UserDB).filter(UserDB.email == email))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email già registrata")
     
@@ -77,24 +84,24 @@ async def add_user(
         except Exception:
             experiences_list = [experiences] 
     
-    # carico la foto su Cloudinary se presente
+    # carico la foto se presente (a chunk, senza bloccare l'event loop)
     photo_url = None 
     if photo:
-        upload_result = cloudinary.uploader.upload(photo.file) 
-        photo_url = upload_result.get("secure_url")  # ottengo l'URL sicuro della foto caricata
+        photo_url = await upload_file(photo)  # ottengo l'URL pubblico della foto caricata
 
     # creo il record dell'utente
     db_user = UserDB(
         name = name,
         surname = surname,
         email = email,
-        password=get_password_hash(password),  # salvo password hashata
+        password=await hash_password(password),  # salvo password hashata (nell'executor dedicato)
         experiences = experiences_list,  # salvo la lista delle esperienze
-        photo = photo_url # salvo l'URL della foto 
+        photo = photo_url, # salvo l'URL della foto 
+        travels = [] # un nuovo utente non ha ancora viaggi
     )
     db.add(db_user)      # l'utente viene salvato
-    db.commit()          # modifiche salvate
-    db.refresh(db_user)  # database aggiornato
+    await commit_unique_email(db) # modifiche salvate
+    await db.refresh(db_user, ["registration_date"])  # leggo la data di registrazione generata dal DB
 
     return db_user       # mi restituisce l'utente creato
 
@@ -109,10 +116,11 @@ async def update_user(
     password: str = Form(...),
     experiences: str = Form(None),
     photo: UploadFile = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # trova l'utente nel DB
-    user = db.query(UserDB).filter(UserDB.id == user_id).first()
+    result = await db.execute(select(UserDB).options(selectinload(UserDB.travels).selectinload(TravelDB.days)).filter(UserDB.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
 
@@ -136,11 +144,10 @@ async def update_user(
         except Exception:
             experiences_list = [experiences]
 
-    # carica la foto su Cloudinary se presente
+    # carica la foto se presente
     photo_url = user.photo  # mantieni la vecchia se non viene cambiata
     if photo:
-        upload_result = cloudinary.uploader.upload(photo.file)
-        photo_url = upload_result.get("secure_url")
+        photo_url = await upload_file(photo)
 
     # aggiorna i campi
     user.name = name
@@ -149,13 +156,12 @@ async def update_user(
 
     # aggiorna la password solo se ne è stata inviata una nuova
     if password:
-       user.password = get_password_hash(password)
+       user.password = await hash_password(password)
 
     user.experiences = experiences_list
     user.photo = photo_url
 
-    db.commit()       # modifiche salvate
-    db.refresh(user)  # database aggiornato
+    await commit_unique_email(db) # modifiche salvate
 
     return user
 
@@ -163,29 +169,42 @@ async def update_user(
 
 # DELETE: Funzione per cancellare un utente
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(UserDB).filter(UserDB.id == user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(UserDB).filter(UserDB.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="Utente non trovato")
     
     # elimina i viaggi dell'utente
-    db.query(TravelDB).filter(TravelDB.user_id == user_id).delete()
+    await db.execute(delete(TravelDB).filter(TravelDB.user_id == user_id))
+    await db.execute(delete(TravelStatsDB).filter(TravelStatsDB.user_id == user_id)) # e le loro statistiche
+
+    # carico le relazioni prima di eliminare l'utente (con la sessione asincrona non esiste il lazy load)
+    await db.refresh(user, ["travels", "chats"])
 
-    db.delete(user)     # elimina l'utente
-    db.commit()         # conferma le modifiche nel DB
+    await db.delete(user)  # elimina l'utente
+    await db.commit()      # conferma le modifiche nel DB
+    await invalidate_user_travels(user_id)
     return {"messaggio": f"Utente {user_id} eliminato con successo"}
 
 
 # POST: Rotta del login
 @router.post("/login")
-def login(email: str, password: str, db: Session = Depends(get_db)):
-    user = db.query(UserDB).filter(UserDB.email == email).first() # cerco l'utente tramite email
+async def login(email: str, password: str, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(UserDB).filter(UserDB.email == email))
+    user = result.scalars().first() # cerco l'utente tramite email
     if not user:
         raise HTTPException(status_code=400, detail="Email non registrata") # se non esiste, errore
 
-    if not verify_password(password, user.password): #  verifico la password
+    valid, new_hash = await verify_and_update_password(password, user.password) #  verifico la password nell'executor dedicato
+    if not valid:
         raise HTTPException(status_code=400, detail="Password errata")
 
+    # se l'hash usa parametri argon2 non più attuali lo aggiorno con quelli nuovi
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
     # crea il token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES) # durata del token
     access_token = create_access_token( #   creo il token
@@ -199,4 +218,12 @@ def login(email: str, password: str, db: Session = Depends(get_db)):
         "token_type": "bearer",
         "user_id": user.id,
         "message": "Login effettuato con successo"
-    }
\ No newline at end of file
+    }
+
+
+# POST: Rotta del logout, il token non viene più accettato anche se non è ancora scaduto
+# (da tutti i worker con TOKEN_REVOCATION_BACKEND=redis, solo da questo processo con "memory")
+@router.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    await revoke_token(token)
+    return {"messaggio": "Logout effettuato con successo"}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel # importo la classe base di Pydantic per creare modelli di dati con validazione
 from typing import List # importo List per array tipizzati
+from datetime import datetime # per la data dell'ultima attività
 
 # classe  che serve quando l’utente manda un messaggio singolo alla rotta
 class UserMessage(BaseModel):
@@ -11,10 +12,18 @@ class UserMessage(BaseModel):
 class RecommendationRequest(BaseModel):
     chat_id: int | None = None   # ID della chat, opzionale
 
+# classe che rappresenta uno scambio della chat (messaggio dell'utente e risposta dell'AI)
+class ChatMessage(BaseModel):
+    user: str   # messaggio dell'utente
+    ai: str     # risposta dell'AI
+
+    class Config:
+        from_attributes = True
+
 # classe che rappresenta una chat completa con messaggi già salvati
 class ChatBase(BaseModel):
-     title: str                  # titolo della chat
-     messages: List[dict] = []   # lista di messaggi nella chat
+     title: str                          # titolo della chat
+     messages: List[ChatMessage] = []    # ultimi messaggi della chat
 
 # classe per restituire le chat dal database nel frontend ereditando da ChatBase, ti serve se vuoi fare response_model=Chat
 class Chat(ChatBase):
@@ -23,4 +32,14 @@ class Chat(ChatBase):
 
     # classe Config per permettere a Pydantic di leggere dati direttamente da oggetti SQLAlchemy
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# classe per la lista delle chat: solo i dati che servono al frontend, senza i messaggi
+class ChatSummary(BaseModel):
+    id: int                          # ID univoco della chat
+    title: str                       # titolo della chat
+    updated_at: datetime | None      # ultima attività
+    preview: str | None = None       # anteprima dell'ultimo messaggio
+
+    class Config:
+        from_attributes = True
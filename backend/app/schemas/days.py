@@ -1,26 +1,63 @@
-from pydantic import BaseModel # importo la classe base di Pydantic per creare modelli di dati con validazione
+from pydantic import BaseModel, field_validator # importo la classe base di Pydantic per creare modelli di dati con validazione
 from typing import List, Optional # importo List per array tipizzati e Optional per valori facoltativi
+from datetime import date # le date vengono restituite in formato ISO (YYYY-MM-DD)
+from app.utils.travels import parse_date # per accettare le date sia ISO sia DD-MM-YYYY
 
 # classe che rappresenta i dati base di una tappa
 class DayBase(BaseModel):
     city: str                       # città 
-    date: str                       # data
+    date: date                      # data
     title: str                      # titolo
     description: str                # descrizione
     experiences: List[str] = []     # esperienze
     lat: Optional[float] = None     # latitudine
     lng: Optional[float] = None     # longitudine
 
+    # accetto anche il vecchio formato DD-MM-YYYY
+    @field_validator("date", mode="before")
+    @classmethod
+    def parse_day_date(cls, value):
+        return parse_date(value) or value
+
 # classe per creare una nuova tappa ereditando da DayBase
 class DayCreate(DayBase):
     pass  # nessun campo aggiuntivo
 
+# classe con gli URL delle varianti di una foto
+class PhotoVariants(BaseModel):
+    thumb: str   # anteprima per le liste
+    medium: str  # galleria e carosello
+    full: str    # dimensione piena
+
 # classe per restituire i dati delle tappe nel frontend ereditando da DayBase, ti serve se vuoi fare response_model=Day
 class Day(DayBase):
     id: int                       # ID tappa
     photo: List[str] = []         # foto
+    photo_variants: List[PhotoVariants] = [] # varianti di ogni foto, nello stesso ordine di photo
+    geocode_pending: bool = False # True finché le coordinate non sono state calcolate
 
+    # le tappe create prima delle varianti hanno il campo vuoto nel DB
+    @field_validator("photo_variants", mode="before")
+    @classmethod
+    def empty_variants(cls, value):
+        return value or []
 
     # classe Config per permettere a Pydantic di leggere dati direttamente da oggetti SQLAlchemy
     class Config:
         from_attributes = True
+
+
+# tappa mostrata come marker singolo sulla mappa
+class MarkerDay(BaseModel):
+    id: int          # ID tappa
+    travel_id: int   # ID del viaggio
+    city: str        # città
+    date: date       # data
+    title: str       # titolo
+
+# gruppo di tappe vicine (o singola tappa) restituito da GET /days/markers
+class MarkerCluster(BaseModel):
+    lat: float                      # posizione media delle tappe del gruppo
+    lng: float
+    count: int                      # numero di tappe nel gruppo
+    day: Optional[MarkerDay] = None # dati della tappa quando il gruppo ne contiene una sola
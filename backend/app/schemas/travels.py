@@ -1,17 +1,25 @@
-from pydantic import BaseModel # importo la classe base di Pydantic per creare modelli di dati con validazione
-from typing import List, Optional # importo List per array tipizzati e Optional per valori facoltativi
+from pydantic import BaseModel, field_validator # importo la classe base di Pydantic per creare modelli di dati con validazione
+from datetime import date # le date vengono restituite in formato ISO (YYYY-MM-DD)
+from typing import Dict, List, Optional # importo List per array tipizzati, Dict per i dizionari e Optional per valori facoltativi
 from app.schemas.days import Day  # importo la classe Day per le tappe del viaggio
+from app.utils.travels import parse_date # per accettare le date sia ISO sia DD-MM-YYYY
 
 # classe che rappresenta i dati di un viaggio
 class TravelBase(BaseModel):
     town: str                                 # paese 
     year: int                                 # anno 
-    start_date: str                           # data di inizio 
-    end_date: str                             # data di fine 
+    start_date: date                          # data di inizio 
+    end_date: date                            # data di fine 
     general_vote: Optional[float] = None      # media dei voti da votes
     votes: Optional[dict] = None              # voti (giorno, paesaggio, attività relax, prezzo)
     user_id: Optional[int] = None             # ID dell'utente associato al viaggio
 
+    # accetto anche il vecchio formato DD-MM-YYYY
+    @field_validator("start_date", "end_date", mode="before")
+    @classmethod
+    def parse_dates(cls, value):
+        return parse_date(value) or value
+
 # classe per creare un nuovo viaggio, eredita da TravelBase
 class TravelCreate(TravelBase):
     days: List[Day] = []  # lista delle tappe del viaggio, default vuota
@@ -24,3 +32,27 @@ class Travel(TravelBase):
     # classe Config per permettere a Pydantic di leggere dati direttamente da oggetti SQLAlchemy
     class Config:
         from_attributes = True
+
+
+# statistiche di un anno o di un paese
+class YearStats(BaseModel):
+    year: int                             # anno
+    trips: int                            # numero di viaggi
+    days: int                             # numero di tappe
+    average_vote: Optional[float] = None  # media dei voti generali
+
+class CountryStats(BaseModel):
+    town: str                             # paese
+    trips: int                            # numero di viaggi
+    days: int                             # numero di tappe
+    average_vote: Optional[float] = None  # media dei voti generali
+
+# classe per restituire le statistiche dei viaggi dell'utente (pagina del profilo)
+class TravelStats(BaseModel):
+    trips: int                                  # viaggi totali
+    days: int                                   # tappe totali
+    countries_count: int                        # paesi visitati
+    average_vote: Optional[float] = None        # media dei voti generali
+    category_averages: Dict[str, float] = {}    # media dei voti per categoria (cibo, paesaggio...)
+    per_year: List[YearStats] = []              # viaggi e tappe per anno, dal più recente
+    countries: List[CountryStats] = []          # paesi visitati, dal più frequente
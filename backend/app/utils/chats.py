@@ -0,0 +1,94 @@
+import json # per serializzare gli eventi SSE e il cursore della paginazione
+import base64 # per rendere il cursore della paginazione una stringa sicura negli URL
+from datetime import datetime # per la data dell'ultima attività nel cursore
+
+# sequenze di intestazioni markdown rimosse dalle risposte dell'AI
+CHAT_HEADINGS = ("###",)
+RECOMMENDATION_HEADINGS = ("###", "##")
+
+# caratteri per token usati nella stima (valore tipico per testo italiano con i tokenizer degli LLM)
+CHARS_PER_TOKEN = 4
+
+# lunghezza massima dell'anteprima mostrata nella lista delle chat
+PREVIEW_LENGTH = 120
+
+# caratteri che possono formare una sequenza da pulire insieme al testo del chunk successivo
+HELD_CHARS = "#\n \t\r"
+
+
+# creo una funzione per pulire il testo dell'AI da grassetti, intestazioni e righe vuote doppie
+def clean_markdown(text: str, headings: tuple[str, ...] = CHAT_HEADINGS) -> str:
+    text = text.replace("**", "").replace("*", "")
+    for heading in headings:
+        text = text.replace(heading, "")
+    return text.replace("\n\n", "\n").strip()
+
+
+# Pulizia incrementale del markdown per le risposte in streaming:
+# dà lo stesso risultato di clean_markdown sul testo completo, ma restituisce il testo pulito chunk per chunk
+class MarkdownCleaner:
+    def __init__(self, headings: tuple[str, ...] = CHAT_HEADINGS):
+        self.headings = headings
+        self.pending = ""      # coda del testo non ancora emessa (potrebbe unirsi al chunk successivo)
+        self.started = False   # True dopo il primo carattere non vuoto (per lo strip iniziale)
+        self.text = ""         # testo pulito emesso finora
+
+    # pulisco la parte sicura del testo
+    def clean(self, text: str) -> str:
+        for heading in self.headings:
+            text = text.replace(heading, "")
+        text = text.replace("\n\n", "\n")
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        self.text += text
+        return text
+
+    # aggiungo un chunk e restituisco il testo pulito che si può già inviare
+    def feed(self, chunk: str) -> str:
+        text = self.pending + chunk.replace("*", "") # gli asterischi vengono sempre rimossi
+        # trattengo gli ultimi caratteri che potrebbero formare "###" o "\n\n" con il chunk successivo
+        cut = len(text)
+        while cut > 0 and text[cut - 1] in HELD_CHARS:
+            cut -= 1
+        self.pending = text[cut:]
+        return self.clean(text[:cut])
+
+    # a fine stream pulisco ciò che resta (senza spazi finali)
+    def flush(self) -> str:
+        text = self.clean(self.pending).rstrip()
+        self.text = self.text.rstrip()
+        self.pending = ""
+        return text
+
+
+# creo una funzione per formattare un evento Server-Sent Events
+def sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# creo una funzione per l'anteprima dell'ultimo messaggio: una sola riga, troncata
+def make_preview(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1].rstrip() + "…"
+
+
+# creo una funzione per codificare il cursore della paginazione (ultima chat della pagina)
+def encode_chat_cursor(updated_at: datetime, chat_id: int) -> str:
+    raw = json.dumps([updated_at.isoformat(), chat_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+# creo una funzione per decodificare il cursore, ritorna None se non è valido
+def decode_chat_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        updated_at, chat_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(updated_at), int(chat_id)
+    except (ValueError, TypeError):
+        return None
+
+
+# stima locale del numero di token di un testo, senza chiamare l'API
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN) # divisione arrotondata per eccesso
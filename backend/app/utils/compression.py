@@ -0,0 +1,79 @@
+from starlette.datastructures import Headers # per leggere Accept-Encoding
+from starlette.middleware.gzip import GZipResponder, IdentityResponder # risposte compresse con gzip o non compresse
+from starlette.types import ASGIApp, Receive, Scope, Send # tipi ASGI
+
+try:
+    import brotli # in requirements.txt; se manca (installazione minima) si usa solo gzip
+except ImportError:
+    brotli = None
+
+
+# Risposta compressa con Brotli: a parità di tempo produce file più piccoli di gzip per il JSON
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        # nelle risposte a più parti invio subito quanto compresso, all'ultima chiudo il flusso
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+# legge Accept-Encoding: codifica → peso q (es. "br;q=0, gzip" → {"br": 0.0, "gzip": 1.0})
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    weights = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0 # peso non valido: la codifica non viene usata
+        weights[name] = q
+    return weights
+
+
+# sceglie tra le codifiche disponibili quella accettata con il peso più alto (None = nessuna compressione)
+# "*" vale per le codifiche non elencate; a parità di peso vince la prima disponibile (la più efficiente)
+def choose_encoding(header: str, available: list[str]) -> str | None:
+    weights = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# Middleware di compressione: Brotli se il client lo accetta e il pacchetto è installato, altrimenti gzip
+# le risposte sotto minimum_size e gli stream SSE (text/event-stream) non vengono compressi
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ["br", "gzip"] if brotli is not None else ["gzip"] # in ordine di preferenza
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""), self.encodings)
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,285 @@
+from collections import OrderedDict # per la cache LRU in memoria
+from datetime import datetime, timedelta, timezone # per calcolare la scadenza delle coordinate salvate nel DB
+import asyncio  # per il worker in background e l'attesa tra le richieste
+import time     # per la scadenza delle voci della cache in memoria e per il token bucket
+import httpx     # client HTTP asincrono per fare richieste a Nominatim senza bloccare il server
+from sqlalchemy import select, update, text # costruzione delle query
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection # sessione e connessione asincrone
+from app.database import AsyncSessionLocal, async_engine # sessioni del worker e connessione per il lock globale
+from app.models.geocode_db import GeocodeCacheDB # modello ORM per la cache persistente delle coordinate
+from app.models.day_db import DayDB # modello ORM per la tabella dei giorni
+from app.models.travel_db import TravelDB # modello ORM per la tabella dei viaggi
+from app.config import settings # importo le impostazioni dal file config.py
+from app.utils.http import timeout_for # timeout specifico per host
+
+# endpoint di ricerca di Nominatim
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# cache in memoria: query normalizzata → (lat, lng, scadenza)
+memory_cache: OrderedDict[str, tuple[float | None, float | None, float]] = OrderedDict()
+
+# contatori per capire quanto lavoro risparmia la cache
+geocode_metrics = {
+    "memory_hits": 0,    # coordinate trovate nella cache in memoria
+    "db_hits": 0,        # coordinate trovate nella tabella geocode_cache
+    "negative_hits": 0,  # luoghi già cercati senza risultati (inclusi negli hit sopra)
+    "misses": 0,         # richieste effettive a Nominatim
+    "enqueued": 0,       # tappe salvate con coordinate in attesa
+    "resolved": 0,       # tappe completate dal worker
+}
+
+# evento per svegliare il worker quando una tappa resta in attesa di coordinate
+pending_event = asyncio.Event()
+
+# nome del lock MySQL che garantisce un solo worker attivo tra tutti i processi
+LEADER_LOCK = "travelapp_geocoding_worker"
+
+
+# creo una funzione per costruire la query eliminando valori None o vuoti
+def build_query(place: str | None, city: str | None, country: str | None) -> str:
+    parts = [place, city, country]
+    parts = [p.strip() for p in parts if p and p.strip()]
+    return ", ".join(parts)
+
+
+# creo una funzione per normalizzare la query, usata come chiave della cache
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())[:255]
+
+
+# durata di validità di una voce: più breve se il luogo non è stato trovato
+def cache_ttl(lat: float | None) -> timedelta:
+    if lat is None:
+        return timedelta(hours=settings.GEOCODE_NEGATIVE_TTL_HOURS)
+    return timedelta(days=settings.GEOCODE_CACHE_TTL_DAYS)
+
+
+# salvo le coordinate nella cache in memoria, eliminando le voci meno usate
+def remember(key: str, lat: float | None, lng: float | None, ttl: timedelta):
+    memory_cache[key] = (lat, lng, time.time() + ttl.total_seconds())
+    memory_cache.move_to_end(key)
+    while len(memory_cache) > settings.GEOCODE_CACHE_SIZE:
+        memory_cache.popitem(last=False)
+
+
+# Token bucket: limita le richieste a Nominatim a `rate` al secondo
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate              # gettoni aggiunti ogni secondo
+        self.capacity = capacity      # gettoni massimi accumulabili
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    # attende finché non è disponibile un gettone e lo consuma
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# creo una funzione che interroga Nominatim
+# ritorna (lat, lng), (None, None) se il luogo non esiste, None se la richiesta è fallita
+async def search_nominatim(query: str, client: httpx.AsyncClient):
+    # Header OBBLIGATORIO per Nominatim
+    headers = {
+        "User-Agent": "TravelApp/1.0 (contact: albertostizzoli60@gmail.com)"
+    }
+
+    # Parametri della richiesta
+    params = {
+        "q": query,
+        "format": "json",
+        "limit": 1
+    }
+
+    try:
+        # uso il client condiviso: la connessione TLS verso Nominatim viene riutilizzata
+        response = await client.get(
+            NOMINATIM_URL,
+            params=params,
+            headers=headers,
+            timeout=timeout_for(NOMINATIM_URL)
+        )
+
+        # Se la richiesta è andata a buon fine
+        if response.status_code == 200:
+            data = response.json()
+            if data:
+                lat = float(data[0]["lat"])
+                lng = float(data[0]["lon"])
+                return lat, lng
+            return None, None
+
+    except Exception as e:
+        # Qui puoi loggare se vuoi
+        print("Geocoding error:", e)
+
+    return None
+
+
+# cerco le coordinate nelle cache (memoria e DB), ritorna None se vanno chieste a Nominatim
+async def lookup_cache(key: str, db: AsyncSession):
+    # 1) cache in memoria
+    cached = memory_cache.get(key)
+    if cached and cached[2] > time.time():
+        memory_cache.move_to_end(key)
+        geocode_metrics["memory_hits"] += 1
+        if cached[0] is None:
+            geocode_metrics["negative_hits"] += 1
+        return cached[0], cached[1]
+
+    # 2) cache persistente nel database
+    entry = await db.get(GeocodeCacheDB, key)
+    if entry and entry.updated_at:
+        now = datetime.now(timezone.utc)
+        updated_at = entry.updated_at if entry.updated_at.tzinfo else entry.updated_at.replace(tzinfo=timezone.utc)
+        expires_at = updated_at + cache_ttl(entry.lat)
+        if expires_at > now:
+            geocode_metrics["db_hits"] += 1
+            if entry.lat is None:
+                geocode_metrics["negative_hits"] += 1
+            remember(key, entry.lat, entry.lng, expires_at - now)
+            return entry.lat, entry.lng
+
+    return None
+
+
+# salvo le coordinate in entrambe le cache (il commit spetta al chiamante)
+async def store_cache(key: str, lat: float | None, lng: float | None, db: AsyncSession):
+    now = datetime.now(timezone.utc)
+    remember(key, lat, lng, cache_ttl(lat))
+    entry = await db.get(GeocodeCacheDB, key)
+    if entry:
+        entry.lat, entry.lng, entry.updated_at = lat, lng, now
+    else:
+        db.add(GeocodeCacheDB(query=key, lat=lat, lng=lng, updated_at=now))
+
+
+# creo una funzione per ottenere latitudine e longitudine di una tappa senza chiamare la rete
+async def get_cached_coordinates(place: str | None, city: str | None, country: str | None, db: AsyncSession):
+    """
+    Cerca latitudine e longitudine nella cache in memoria e poi nella tabella geocode_cache.
+
+    - place   : luogo specifico (es. "Piazza Navona")
+    - city    : città (es. "Roma")
+    - country : paese (es. "Italia")
+    - db      : sessione usata per leggere la cache persistente
+
+    Ritorna:
+    - (lat, lng) se trovate, (None, None) se il luogo è già noto come inesistente
+    - None se le coordinate vanno calcolate dal worker in background
+    """
+    key = normalize_query(build_query(place, city, country))
+    if not key:
+        return None, None
+    return await lookup_cache(key, db)
+
+
+# segnalo al worker che c'è una tappa in attesa di coordinate
+def enqueue_geocoding():
+    geocode_metrics["enqueued"] += 1
+    pending_event.set()
+
+
+# calcolo le coordinate di una tappa per il worker: cache prima, poi Nominatim rispettando il rate limit
+async def resolve_coordinates(place: str | None, city: str | None, country: str | None, db: AsyncSession, bucket: TokenBucket, client: httpx.AsyncClient):
+    query = build_query(place, city, country)
+    key = normalize_query(query)
+    if not key:
+        return None, None
+
+    cached = await lookup_cache(key, db)
+    if cached is not None:
+        return cached
+
+    await bucket.acquire() # rispetta le policy di Nominatim (1 richiesta / secondo per tutta l'app)
+    geocode_metrics["misses"] += 1
+    result = await search_nominatim(query, client)
+    if result is not None:
+        await store_cache(key, *result, db) # gli errori di rete non vengono salvati
+    return result
+
+
+# verifico (o ottengo) il lock MySQL che rende questo processo l'unico worker attivo
+async def hold_leadership(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "mysql":
+        return True  # SQLite in locale: un solo processo
+    owner = (await conn.execute(text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": LEADER_LOCK})).scalar()
+    if not owner:
+        owner = (await conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": LEADER_LOCK})).scalar() == 1
+    await conn.commit()
+    return bool(owner)
+
+
+# elaboro un gruppo di tappe in attesa, ritorna False se non c'è altro da fare subito
+async def process_pending(bucket: TokenBucket, client: httpx.AsyncClient) -> bool:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(DayDB.id, DayDB.title, DayDB.city, DayDB.travel_id, TravelDB.town)
+            .join(TravelDB, DayDB.travel_id == TravelDB.id)
+            .filter(DayDB.geocode_pending == True)
+            .order_by(DayDB.id)
+            .limit(settings.GEOCODE_BATCH_SIZE)
+        )
+        rows = result.all()
+
+        for row in rows:
+            coords = await resolve_coordinates(row.title, row.city, row.town, db, bucket, client)
+            if coords is None:
+                await db.commit()
+                return False  # Nominatim non risponde: riprovo al prossimo giro
+
+            # aggiorno la tappa solo se nel frattempo non sono cambiati lei o il paese del suo viaggio
+            same_town = select(TravelDB.id).where(TravelDB.id == row.travel_id, TravelDB.town == row.town)
+            updated = await db.execute(
+                update(DayDB)
+                .where(DayDB.id == row.id, DayDB.title == row.title, DayDB.city == row.city, DayDB.geocode_pending == True, DayDB.travel_id.in_(same_town))
+                .values(lat=coords[0], lng=coords[1], geocode_pending=False, version=DayDB.version + 1)
+            )
+            # le coordinate fanno parte della risposta del viaggio: nuova versione anche per lui (ETag)
+            if updated.rowcount:
+                await db.execute(update(TravelDB).where(TravelDB.id == row.travel_id).values(version=TravelDB.version + 1))
+            await db.commit()
+            geocode_metrics["resolved"] += 1
+
+        return len(rows) == settings.GEOCODE_BATCH_SIZE
+
+
+# worker in background: calcola le coordinate delle tappe in attesa
+# riceve il client HTTP condiviso creato nel lifespan dell'applicazione
+async def geocoding_worker(client: httpx.AsyncClient):
+    bucket = TokenBucket(settings.GEOCODE_RATE_PER_SECOND) # unico per tutto il processo
+    while True:
+        try:
+            # connessione dedicata che tiene il lock finché il processo è il worker attivo
+            async with async_engine.connect() as lock_conn:
+                while await hold_leadership(lock_conn):
+                    if not await process_pending(bucket, client):
+                        # nessuna tappa in attesa: aspetto una nuova tappa o il prossimo controllo
+                        try:
+                            await asyncio.wait_for(pending_event.wait(), timeout=settings.GEOCODE_POLL_SECONDS)
+                        except asyncio.TimeoutError:
+                            pass
+                        pending_event.clear()
+            await asyncio.sleep(settings.GEOCODE_POLL_SECONDS) # un altro processo è il worker attivo
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Geocoding worker error:", e)
+            await asyncio.sleep(settings.GEOCODE_POLL_SECONDS)
+
+
+# funzione che restituisce le statistiche della cache delle coordinate
+def geocode_stats() -> dict:
+    hits = geocode_metrics["memory_hits"] + geocode_metrics["db_hits"]
+    total = hits + geocode_metrics["misses"]
+    return {
+        **geocode_metrics,
+        "memory_size": len(memory_cache),
+        "hit_ratio": round(hits / total, 3) if total else 0.0,
+    }
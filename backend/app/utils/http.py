@@ -0,0 +1,29 @@
+from urllib.parse import urlsplit # per ricavare l'host dall'URL della richiesta
+import httpx # client HTTP asincrono condiviso per le chiamate verso servizi esterni
+from fastapi import Request # per leggere il client salvato nello stato dell'applicazione
+from app.config import settings # importo le impostazioni dal file config.py
+
+
+# creo il client HTTP condiviso: connessioni keep-alive riutilizzate, limiti sul pool e HTTP/2
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED,
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,                     # connessioni totali aperte
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS, # connessioni tenute vive tra una richiesta e l'altra
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,                   # secondi prima di chiudere una connessione inattiva
+        ),
+    )
+
+
+# timeout da usare per un URL: quello specifico dell'host se configurato, altrimenti quello di default
+def timeout_for(url: str) -> httpx.Timeout:
+    host = urlsplit(url).hostname or ""
+    seconds = settings.HTTP_HOST_TIMEOUTS.get(host, settings.HTTP_TIMEOUT_SECONDS)
+    return httpx.Timeout(seconds)
+
+
+# Dependency: fornisce alle rotte il client HTTP creato nel lifespan di main.py
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
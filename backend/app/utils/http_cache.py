@@ -0,0 +1,80 @@
+from datetime import datetime, timezone # per le date di Last-Modified
+from email.utils import format_datetime, parsedate_to_datetime # formato delle date negli header HTTP
+from fastapi import Request, Response # per leggere gli header condizionali e rispondere 304
+import hashlib # per l'ETag
+import json # per serializzare le parti dell'ETag
+
+# contatori delle richieste condizionali
+http_cache_metrics = {"not_modified": 0, "full": 0}
+
+
+# ETag calcolato dalle versioni delle righe che compongono la risposta (es. id, versione e ultima modifica dei viaggi)
+# è debole (W/): lo stesso valore accompagna il corpo non compresso, gzip e brotli, che non sono identici byte per byte
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256(json.dumps(parts, default=str, separators=(",", ":")).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+# le date lette dal DB sono in UTC, anche quando arrivano senza fuso orario (SQLite)
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# controllo If-None-Match (ha la precedenza, con il confronto debole previsto per le GET) e If-Modified-Since
+# per le liste If-Modified-Since non basta: un elemento eliminato non cambia la data più recente
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None, use_modified_since: bool) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not (use_modified_since and if_modified_since and last_modified):
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False # data non valida per HTTP (manca GMT)
+    # l'header ha la precisione del secondo
+    return as_utc(last_modified).replace(microsecond=0) <= since
+
+
+# header già impostati dalla rotta sulla risposta (es. X-Next-Cursor, ETag), senza la lunghezza del corpo
+def route_headers(response: Response) -> dict:
+    return {key: value for key, value in response.headers.items() if key != "content-length"}
+
+
+# risposta JSON già serializzata (es. presa dalla cache), con gli header impostati dalla rotta
+def json_bytes_response(body: bytes, response: Response) -> Response:
+    return Response(content=body, media_type="application/json", headers=route_headers(response))
+
+
+# funzione usata dalle rotte GET: restituisce una risposta 304 se il client ha già la versione attuale,
+# altrimenti aggiunge ETag e Last-Modified alla risposta e restituisce None (la rotta prosegue normalmente)
+# "private, no-cache": il browser tiene la risposta ma la riconvalida a ogni richiesta
+def not_modified_response(request: Request, response: Response, etag: str, last_modified: datetime | None = None, use_modified_since: bool = True) -> Response | None:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(as_utc(last_modified), usegmt=True)
+
+    if is_not_modified(request, etag, last_modified, use_modified_since):
+        http_cache_metrics["not_modified"] += 1
+        # mantengo gli header già impostati dalla rotta (es. X-Next-Cursor), senza il corpo
+        return Response(status_code=304, headers={**route_headers(response), **headers})
+
+    http_cache_metrics["full"] += 1
+    response.headers.update(headers)
+    return None
+
+
+# statistiche per le metriche interne
+def http_cache_stats() -> dict:
+    total = http_cache_metrics["not_modified"] + http_cache_metrics["full"]
+    return {
+        **http_cache_metrics,
+        "not_modified_ratio": round(http_cache_metrics["not_modified"] / total, 3) if total else None,
+    }
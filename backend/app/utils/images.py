@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor # processi dedicati: decodifica e ridimensionamento usano molta CPU
+from fastapi import HTTPException # per rispondere 400 quando il file non è un'immagine valida
+from PIL import Image, ImageOps, UnidentifiedImageError # per leggere, ruotare e ridimensionare le immagini
+from app.config import settings # importo le impostazioni (formato, qualità e numero di processi)
+import asyncio # per attendere i processi senza bloccare l'event loop
+import io # per lavorare con i byte delle immagini in memoria
+
+# varianti generate per ogni foto: lato più lungo massimo in pixel
+IMAGE_VARIANTS = {
+    "thumb": 400,    # anteprime nelle liste (card dei viaggi e delle tappe)
+    "medium": 1280,  # galleria e carosello
+    "full": 2560,    # immagine aperta a schermo intero
+}
+
+# limite contro le "decompression bomb": immagini piccole su disco ma enormi una volta decodificate
+Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+# contatori dell'elaborazione delle immagini
+image_metrics = {"processed": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+# pool di processi creato al primo utilizzo
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_image_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+# chiude il pool di processi (alla chiusura dell'applicazione)
+def shutdown_image_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+# funzione eseguita nei processi del pool: restituisce i byte di ogni variante
+# i metadati EXIF (posizione GPS, modello della fotocamera...) non vengono copiati nelle varianti
+def resize_image(data: bytes, image_format: str, quality: int) -> dict[str, bytes]:
+    largest = max(IMAGE_VARIANTS.values())
+    with Image.open(io.BytesIO(data)) as source:
+        source.draft("RGB", (largest, largest)) # per i JPEG decodifico direttamente a una risoluzione ridotta
+        image = ImageOps.exif_transpose(source) # applico la rotazione indicata negli EXIF prima di eliminarli
+
+    # il JPEG non supporta la trasparenza
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha and image_format == "WEBP" else "RGB")
+
+    # parto dalla variante più grande e riduco quella precedente: ogni passaggio lavora su meno pixel
+    variants = {}
+    for name, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality, exif=b"")
+        variants[name] = output.getvalue()
+    return variants
+
+
+# versione asincrona di resize_image, eseguita nel pool di processi
+async def make_variants(data: bytes) -> dict[str, bytes]:
+    loop = asyncio.get_running_loop()
+    try:
+        variants = await loop.run_in_executor(
+            get_image_executor(), resize_image, data, settings.IMAGE_FORMAT.upper(), settings.IMAGE_QUALITY
+        )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        image_metrics["failed"] += 1
+        raise HTTPException(status_code=400, detail="Immagine non valida")
+
+    image_metrics["processed"] += 1
+    image_metrics["bytes_in"] += len(data)
+    image_metrics["bytes_out"] += sum(len(v) for v in variants.values())
+    return variants
+
+
+# statistiche per le metriche interne
+def image_stats() -> dict:
+    return {
+        **image_metrics,
+        "format": settings.IMAGE_FORMAT.upper(),
+        "workers": settings.IMAGE_WORKERS,
+    }
+
@@ -0,0 +1,120 @@
+import json # per leggere il modello e il set di valutazione
+import math # per il calcolo dell'IDF
+import re # per dividere il messaggio in parole
+import unicodedata # per rimuovere gli accenti
+from collections import Counter # per contare le parole del messaggio
+from pathlib import Path # per trovare i file del modello
+
+# file del modello, distribuito con l'app (il set di valutazione è in tests/data)
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+MODEL_PATH = DATA_DIR / "intent_model.json"
+
+OFF_TOPIC = "fuori_tema"
+
+# soglie di default: sotto queste la decisione passa all'AI
+DEFAULT_MIN_SCORE = 2.0         # punteggio minimo dell'intento migliore (circa una parola chiave specifica)
+DEFAULT_MIN_CONFIDENCE = 0.75   # quota minima del punteggio assegnata alla parte scelta (viaggi o fuori tema)
+
+# contatori delle classificazioni (locali o delegate all'AI)
+intent_metrics = {"local": 0, "local_off_topic": 0, "llm_fallback": 0}
+
+
+# normalizzo una parola: minuscolo, senza accenti e troncata (stemming semplice: "viaggio" e "viaggi" coincidono)
+def stem(word: str, length: int) -> str:
+    word = unicodedata.normalize("NFKD", word.lower())
+    word = "".join(ch for ch in word if not unicodedata.combining(ch))
+    return word[:length]
+
+
+# Classificatore dell'intento basato su parole chiave pesate con TF-IDF
+# ogni intento è un "documento" formato dalle sue parole chiave: le parole presenti in pochi intenti pesano di più
+class IntentClassifier:
+    def __init__(self, model: dict):
+        self.stem_length = model.get("stem_length", 6)
+        self.stopwords = {stem(w, self.stem_length) for w in model.get("stopwords", [])}
+
+        # parole (già normalizzate) di ogni intento
+        documents = {intent: Counter(self.tokenize(" ".join(keywords))) for intent, keywords in model["intents"].items()}
+
+        # IDF: in quanti intenti compare ogni parola
+        document_frequency = Counter(token for counts in documents.values() for token in counts)
+        total = len(documents)
+        self.idf = {token: math.log(total / df) + 1 for token, df in document_frequency.items()}
+
+        # peso delle parole di ogni intento: l'IDF (una parola chiave ripetuta nel modello non conta di più)
+        # gli intenti generici (es. "mete") hanno un peso ridotto, così a parità vince quello più specifico
+        weights = model.get("intent_weights", {})
+        self.vectors = {
+            intent: {token: self.idf[token] * weights.get(intent, 1.0) for token in counts}
+            for intent, counts in documents.items()
+        }
+
+    # funzione che carica il modello da file
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "IntentClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # divido il testo in parole normalizzate, senza stopword
+    def tokenize(self, text: str) -> list[str]:
+        tokens = (stem(word, self.stem_length) for word in re.findall(r"\w+", text.lower()))
+        return [token for token in tokens if token and token not in self.stopwords]
+
+    # punteggio TF-IDF di ogni intento per il messaggio (frequenza nel messaggio × peso della parola)
+    def scores(self, message: str) -> dict[str, float]:
+        counts = Counter(self.tokenize(message))
+        scores = {}
+        for intent, vector in self.vectors.items():
+            score = sum(vector[token] * count for token, count in counts.items() if token in vector)
+            if score > 0:
+                scores[intent] = score
+        return scores
+
+    # funzione che restituisce (intento, confidenza) oppure (None, confidenza) se la decisione è incerta
+    def predict(self, message: str, min_score: float = DEFAULT_MIN_SCORE, min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> tuple[str | None, float]:
+        scores = self.scores(message)
+        if not scores:
+            return None, 0.0 # nessuna parola nota: serve il contesto della conversazione
+
+        best = max(scores, key=scores.get)
+        off_topic = scores.get(OFF_TOPIC, 0.0)
+        on_topic = sum(scores.values()) - off_topic
+
+        # conta soprattutto la scelta tra viaggi e fuori tema: la confidenza è la quota di quella parte
+        confidence = (off_topic if best == OFF_TOPIC else on_topic) / (on_topic + off_topic)
+        if scores[best] < min_score or confidence < min_confidence:
+            return None, confidence
+        return best, confidence
+
+
+# istanza condivisa caricata al primo utilizzo
+_classifier: IntentClassifier | None = None
+
+
+def get_classifier() -> IntentClassifier:
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifier.load()
+    return _classifier
+
+
+# funzione usata dalla chat: intento locale oppure None se va chiesto all'AI
+def classify_locally(message: str, min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> str | None:
+    intent, _ = get_classifier().predict(message, min_confidence=min_confidence)
+    if intent is None:
+        intent_metrics["llm_fallback"] += 1
+    elif intent == OFF_TOPIC:
+        intent_metrics["local_off_topic"] += 1
+    else:
+        intent_metrics["local"] += 1
+    return intent
+
+
+# statistiche per le metriche interne
+def intent_stats() -> dict:
+    total = sum(intent_metrics.values())
+    return {
+        **intent_metrics,
+        "local_ratio": round((total - intent_metrics["llm_fallback"]) / total, 3) if total else None,
+    }
+
@@ -0,0 +1,193 @@
+from collections import OrderedDict # per la cache LRU in memoria
+from typing import Awaitable, Callable # per il tipo della funzione che genera la risposta
+import asyncio  # per i lock per chiave e per le operazioni SQLite fuori dall'event loop
+import hashlib  # per la chiave della cache (hash del prompt)
+import json     # per serializzare le voci
+import random   # per scegliere la variante da riproporre
+import sqlite3  # backend su file, senza servizi esterni
+import time     # per la scadenza delle voci
+from app.config import settings # importo le impostazioni dal file config.py
+
+# contatori per capire quante chiamate all'AI risparmia la cache
+llm_cache_metrics = {
+    "hits": 0,       # risposte servite dalla cache
+    "misses": 0,     # chiamate effettive all'AI (prima risposta o nuova variante)
+    "evictions": 0,  # voci eliminate dalla cache in memoria per fare spazio
+}
+
+
+# creo una funzione per normalizzare il prompt: spazi e a capo non cambiano la risposta
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
+
+
+# chiave della cache: hash del modello e del prompt normalizzato
+def cache_key(prompt: str, model: str = "") -> str:
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+# Backend in memoria: LRU con scadenza, valido per il singolo processo
+class MemoryBackend:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[dict, float]] = OrderedDict() # chiave → (voce, scadenza)
+
+    async def get(self, key: str) -> dict | None:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if expires_at < time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key) # voce usata di recente
+        return entry
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        self.entries[key] = (entry, time.time() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            llm_cache_metrics["evictions"] += 1
+
+
+# Backend SQLite: la cache sopravvive ai riavvii ed è condivisa dai worker sulla stessa macchina
+class SQLiteBackend:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+
+    def _get(self, key: str) -> dict | None:
+        now = time.time()
+        with sqlite3.connect(self.path) as conn:
+            row = conn.execute("SELECT entry FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def _set(self, key: str, entry: dict, ttl: int):
+        now = time.time()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, entry, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry), now + ttl, now),
+            )
+            # elimino le voci scadute e quelle meno usate oltre il limite
+            conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN (SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    async def get(self, key: str) -> dict | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        await asyncio.to_thread(self._set, key, entry, ttl)
+
+
+# Backend Redis (o compatibile): cache condivisa tra più server
+# la scadenza è gestita da Redis, l'eliminazione LRU dalla sua policy maxmemory (es. allkeys-lru)
+class RedisBackend:
+    PREFIX = "llm_cache:"
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis # dipendenza opzionale, serve solo con questo backend
+        except ImportError as e:
+            raise RuntimeError("LLM_CACHE_BACKEND=redis richiede il pacchetto 'redis'") from e
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> dict | None:
+        value = await self.client.get(self.PREFIX + key)
+        return json.loads(value) if value else None
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        await self.client.set(self.PREFIX + key, json.dumps(entry), ex=ttl)
+
+
+# Cache delle risposte dell'AI con più varianti:
+# per ogni prompt si conservano fino a `variants` risposte diverse, poi ne viene riproposta una a caso
+# la voce scade `ttl` secondi dopo la prima risposta: le letture non la prolungano e non la riscrivono
+class LLMCache:
+    def __init__(self, backend, ttl: int, variants: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.locks: dict[str, tuple[asyncio.Lock, int]] = {} # una sola generazione alla volta per lo stesso prompt: chiave → (lock, richieste in corso)
+
+    # funzione che restituisce la risposta per il prompt, chiamando `generate` solo se serve
+    async def get_or_generate(self, prompt: str, generate: Callable[[str], Awaitable[str]], model: str = "") -> str:
+        key = cache_key(prompt, model)
+        lock, users = self.locks.get(key, (asyncio.Lock(), 0))
+        self.locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                now = time.time()
+                entry = await self.backend.get(key) or {"variants": [], "expires_at": now + self.ttl}
+
+                # varianti complete: ne ripropongo una senza scrivere nulla
+                if len(entry["variants"]) >= self.variants:
+                    llm_cache_metrics["hits"] += 1
+                    return random.choice(entry["variants"])
+
+                # finché mancano varianti ne genero una nuova; la scadenza resta quella della prima risposta
+                llm_cache_metrics["misses"] += 1
+                text = await generate(prompt)
+                entry["variants"].append(text)
+                expires_at = entry.get("expires_at", now + self.ttl) # voci salvate prima della scadenza nella voce
+                remaining = round(expires_at - time.time())
+                if remaining > 0:
+                    entry["expires_at"] = expires_at
+                    await self.backend.set(key, entry, remaining)
+                return text
+        finally:
+            # rimuovo il lock quando nessun'altra richiesta lo sta usando
+            lock, users = self.locks[key]
+            if users == 1:
+                del self.locks[key]
+            else:
+                self.locks[key] = (lock, users - 1)
+
+
+# creo la cache in base alle impostazioni (None se disattivata)
+def create_llm_cache() -> LLMCache | None:
+    backend_name = settings.LLM_CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+    if backend_name == "sqlite":
+        backend = SQLiteBackend(settings.LLM_CACHE_SQLITE_PATH, settings.LLM_CACHE_SIZE)
+    elif backend_name == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("LLM_CACHE_BACKEND=redis richiede REDIS_URL")
+        backend = RedisBackend(settings.REDIS_URL)
+    else:
+        backend = MemoryBackend(settings.LLM_CACHE_SIZE)
+    return LLMCache(backend, settings.LLM_CACHE_TTL_HOURS * 3600, settings.LLM_CACHE_VARIANTS)
+
+
+# istanza condivisa dall'app
+llm_cache = create_llm_cache()
+
+
+# funzione che usa la cache se attiva, altrimenti chiama direttamente `generate`
+async def cached_generate(prompt: str, generate: Callable[[str], Awaitable[str]], model: str = "") -> str:
+    if llm_cache is None:
+        return await generate(prompt)
+    return await llm_cache.get_or_generate(prompt, generate, model)
+
+
+# statistiche per le metriche interne
+def llm_cache_stats() -> dict:
+    total = llm_cache_metrics["hits"] + llm_cache_metrics["misses"]
+    return {
+        "backend": settings.LLM_CACHE_BACKEND,
+        **llm_cache_metrics,
+        "hit_ratio": round(llm_cache_metrics["hits"] / total, 3) if total else None,
+    }
@@ -0,0 +1,33 @@
+import math # per la correzione della griglia alle latitudini alte
+
+from app.config import settings # importo le impostazioni (dimensione delle celle e zoom massimo)
+
+# lato di una tile della mappa in pixel (Leaflet / OpenStreetMap)
+TILE_SIZE = 256
+
+
+# legge il bbox nel formato di Leaflet (map.getBounds().toBBoxString()): "ovest,sud,est,nord"
+# restituisce None se non è valido; ovest > est indica un'area che attraversa l'antimeridiano
+def parse_bbox(bbox: str) -> tuple[float, float, float, float] | None:
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        return None
+    if not all(math.isfinite(value) for value in (west, south, east, north)):
+        return None
+    if not (-90 <= south <= north <= 90):
+        return None
+    # Leaflet può restituire longitudini fuori da [-180, 180] se la mappa viene spostata oltre i bordi
+    if east - west >= 360:
+        return -180.0, south, 180.0, north
+    west, east = ((value + 180) % 360 - 180 for value in (west, east))
+    return west, south, east, north
+
+
+# dimensione in gradi (latitudine, longitudine) delle celle della griglia per uno zoom
+# a zoom z la mappa è larga TILE_SIZE * 2^z pixel; in latitudine la cella si riduce con il coseno,
+# così sulla mappa (proiezione di Mercatore) resta circa quadrata
+def cluster_cell_size(zoom: int, south: float, north: float) -> tuple[float, float]:
+    lng_size = settings.MARKER_CLUSTER_PX * 360 / (TILE_SIZE * 2 ** zoom)
+    center = math.radians((south + north) / 2)
+    return lng_size * max(math.cos(center), 0.05), lng_size
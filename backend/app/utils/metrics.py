@@ -0,0 +1,34 @@
+from collections import deque # per tenere solo gli ultimi campioni di ogni misura
+
+# numero di campioni conservati per ogni misura di latenza
+MAX_SAMPLES = 1000
+
+# campioni di latenza in secondi: nome della misura → ultimi valori
+latency_samples: dict[str, deque] = {}
+
+
+# registro la durata di un'operazione (in secondi)
+def record_latency(name: str, seconds: float):
+    latency_samples.setdefault(name, deque(maxlen=MAX_SAMPLES)).append(seconds)
+
+
+# calcolo un percentile da una lista di valori ordinati
+def percentile(values: list[float], p: float) -> float:
+    index = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+# funzione che restituisce p50/p95/p99 (in millisecondi) di ogni misura
+def latency_stats() -> dict:
+    stats = {}
+    for name, samples in latency_samples.items():
+        values = sorted(samples)
+        if not values:
+            continue
+        stats[name] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+        }
+    return stats
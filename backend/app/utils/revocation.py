@@ -0,0 +1,90 @@
+import time # per la scadenza delle revoche
+from collections import OrderedDict # copia locale dei controlli già fatti, in ordine di scadenza
+from app.config import settings # importo le impostazioni (backend delle revoche)
+
+# Token revocati prima della scadenza (logout), controllati a ogni richiesta autenticata
+# la revoca serve solo fino alla scadenza del token: dopo, il token non viene accettato comunque.
+# Con più worker o più server le revoche devono stare in un archivio condiviso (backend "redis"):
+# il backend "memory" vale solo per il processo che ha ricevuto il logout.
+
+
+# Backend in memoria: adatto solo a un singolo worker (es. uvicorn senza --workers, oppure le prove)
+class MemoryRevocationStore:
+    def __init__(self):
+        self.revoked: dict[str, float] = {} # digest del token → scadenza
+
+    async def revoke(self, key: str, expires_at: float):
+        now = time.time()
+        # tolgo le revoche di token ormai scaduti, poi registro la nuova
+        for expired in [k for k, exp in self.revoked.items() if exp <= now]:
+            del self.revoked[expired]
+        self.revoked[key] = expires_at
+
+    async def is_revoked(self, key: str) -> bool:
+        return key in self.revoked
+
+    def size(self) -> int:
+        return len(self.revoked)
+
+
+# Backend Redis (o un server compatibile con il protocollo Redis): revoche condivise da tutti i worker
+# ogni revoca è una chiave che Redis elimina da solo alla scadenza del token.
+# Un token trovato non revocato non viene ricontrollato per check_seconds: senza questa copia locale
+# ogni richiesta autenticata farebbe un EXISTS su Redis, più lento della verifica della firma evitata dalla cache.
+# Un logout ricevuto da un altro worker vale quindi qui entro check_seconds (subito sul worker che lo riceve).
+class RedisRevocationStore:
+    PREFIX = "revoked_token:"
+
+    def __init__(self, client, check_seconds: float | None = None, max_entries: int | None = None):
+        self.client = client # es. redis.asyncio.Redis, oppure un client finto per le prove
+        self.check_seconds = settings.TOKEN_REVOCATION_CHECK_SECONDS if check_seconds is None else check_seconds
+        self.max_entries = max_entries or settings.TOKEN_CACHE_SIZE
+        self.not_revoked: OrderedDict[str, float] = OrderedDict() # digest del token → fino a quando non ricontrollarlo
+        self.lookups = 0 # EXISTS inviati a Redis
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRevocationStore":
+        try:
+            import redis.asyncio as redis # dipendenza opzionale, serve solo con questo backend
+        except ImportError as e:
+            raise RuntimeError("TOKEN_REVOCATION_BACKEND=redis richiede il pacchetto 'redis'") from e
+        return cls(redis.from_url(url))
+
+    async def revoke(self, key: str, expires_at: float):
+        self.not_revoked.pop(key, None)
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            await self.client.set(self.PREFIX + key, 1, ex=ttl)
+
+    async def is_revoked(self, key: str) -> bool:
+        now = time.monotonic()
+        until = self.not_revoked.get(key)
+        if until is not None and now < until:
+            return False
+
+        self.lookups += 1
+        if await self.client.exists(self.PREFIX + key):
+            self.not_revoked.pop(key, None)
+            return True
+        if self.check_seconds > 0:
+            self.not_revoked[key] = now + self.check_seconds
+            self.not_revoked.move_to_end(key) # le voci restano in ordine di scadenza
+            while len(self.not_revoked) > self.max_entries:
+                self.not_revoked.popitem(last=False)
+        return False
+
+    def size(self) -> int | None:
+        return None # conteggio non disponibile senza interrogare Redis
+
+
+# creo l'archivio delle revoche in base alle impostazioni
+def create_revocation_store():
+    if settings.TOKEN_REVOCATION_BACKEND.lower() == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("TOKEN_REVOCATION_BACKEND=redis richiede REDIS_URL")
+        return RedisRevocationStore.from_url(settings.REDIS_URL)
+    return MemoryRevocationStore()
+
+
+# istanza condivisa dall'app
+revocation_store = create_revocation_store()
@@ -0,0 +1,152 @@
+from pathlib import Path # per i percorsi del backend su disco
+from tempfile import SpooledTemporaryFile # buffer per Cloudinary: in memoria per i file piccoli, su disco per quelli grandi
+from typing import AsyncIterator # per il tipo dei flussi di chunk
+from fastapi import HTTPException, UploadFile # per rispondere 413 ai file troppo grandi e leggere i file caricati
+from app.config import settings # importo le impostazioni (backend, cartella, limiti)
+import asyncio # per il semaforo e le operazioni bloccanti fuori dall'event loop
+import mimetypes # per ricavare l'estensione dal tipo del file
+import re # per controllare l'estensione indicata dal client
+import uuid # per i nomi dei file salvati
+
+# contatori dei caricamenti
+storage_metrics = {"uploads": 0, "failed": 0, "bytes": 0, "in_flight": 0, "waiting": 0, "peak_in_flight": 0}
+
+
+# Backend Cloudinary: il file ricevuto a chunk viene scritto in un buffer temporaneo e caricato in un thread
+class CloudinaryStorage:
+    def __init__(self):
+        import cloudinary.uploader # importato solo con questo backend
+        self.uploader = cloudinary.uploader
+
+    async def save(self, chunks: AsyncIterator[bytes], extension: str) -> str:
+        buffer = SpooledTemporaryFile(max_size=settings.UPLOAD_CHUNK_SIZE * 4)
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(buffer.write, chunk)
+            buffer.seek(0)
+            result = await asyncio.to_thread(self.uploader.upload, buffer)
+            return result["secure_url"]
+        finally:
+            buffer.close()
+
+
+# Backend su disco: i file vengono serviti dall'app stessa sotto STORAGE_PUBLIC_URL
+class LocalStorage:
+    def __init__(self, directory: str, public_url: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.public_url = public_url.rstrip("/")
+
+    async def save(self, chunks: AsyncIterator[bytes], extension: str) -> str:
+        name = f"{uuid.uuid4().hex}{extension}"
+        path = self.directory / name
+        file = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(file.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(file.close)
+            path.unlink(missing_ok=True) # niente file a metà se il caricamento fallisce
+            raise
+        await asyncio.to_thread(file.close)
+        return f"{self.public_url}/{name}"
+
+
+# Backend in memoria: per le prove e i test di carico senza rete né disco
+class MemoryStorage:
+    def __init__(self):
+        self.files: dict[str, bytes] = {} # nome → contenuto
+
+    async def save(self, chunks: AsyncIterator[bytes], extension: str) -> str:
+        name = f"{uuid.uuid4().hex}{extension}"
+        self.files[name] = b"".join([chunk async for chunk in chunks])
+        return f"memory://{name}"
+
+
+# creo il backend in base alle impostazioni
+def create_storage():
+    backend_name = settings.STORAGE_BACKEND.lower()
+    if backend_name == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_DIR, settings.STORAGE_PUBLIC_URL)
+    if backend_name == "memory":
+        return MemoryStorage()
+    if not (settings.CLOUD_NAME_CLOUDINARY and settings.API_KEY_CLOUDINARY and settings.API_SECRET_CLOUDINARY):
+        raise RuntimeError("STORAGE_BACKEND=cloudinary richiede le credenziali di Cloudinary")
+    return CloudinaryStorage()
+
+
+# istanza condivisa dall'app
+storage = create_storage()
+
+# limite dei caricamenti contemporanei: gli altri aspettano il proprio turno senza bloccare il server
+upload_semaphore = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+
+
+# legge un file caricato a chunk, rifiutando quelli oltre UPLOAD_MAX_BYTES
+async def read_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    size = 0
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="File troppo grande")
+        yield chunk
+
+
+# flusso di chunk da byte già in memoria (es. le varianti delle foto)
+async def bytes_chunks(data: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), settings.UPLOAD_CHUNK_SIZE):
+        yield data[start:start + settings.UPLOAD_CHUNK_SIZE]
+
+
+# legge tutto il file caricato (serve quando va elaborato, es. ridimensionato)
+async def read_upload(file: UploadFile) -> bytes:
+    return b"".join([chunk async for chunk in read_chunks(file)])
+
+
+# conta i byte che passano nel flusso
+async def counted(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        storage_metrics["bytes"] += len(chunk)
+        yield chunk
+
+
+# salva un flusso di chunk nel backend configurato e restituisce l'URL pubblico
+async def upload_stream(chunks: AsyncIterator[bytes], extension: str) -> str:
+    storage_metrics["waiting"] += 1
+    async with upload_semaphore:
+        storage_metrics["waiting"] -= 1
+        storage_metrics["in_flight"] += 1
+        storage_metrics["peak_in_flight"] = max(storage_metrics["peak_in_flight"], storage_metrics["in_flight"])
+        try:
+            url = await storage.save(counted(chunks), extension)
+        except Exception:
+            storage_metrics["failed"] += 1
+            raise
+        finally:
+            storage_metrics["in_flight"] -= 1
+    storage_metrics["uploads"] += 1
+    return url
+
+
+# salva un file caricato dall'utente
+async def upload_file(file: UploadFile) -> str:
+    # uso l'estensione del nome del file solo se è semplice (es. ".jpg"), altrimenti la ricavo dal tipo
+    extension = Path(file.filename or "").suffix.lower()
+    if not re.fullmatch(r"\.[a-z0-9]{1,5}", extension):
+        extension = mimetypes.guess_extension(file.content_type or "") or ""
+    return await upload_stream(read_chunks(file), extension)
+
+
+# salva dei byte già in memoria
+async def upload_bytes(data: bytes, extension: str) -> str:
+    return await upload_stream(bytes_chunks(data), extension)
+
+
+# statistiche per le metriche interne
+def storage_stats() -> dict:
+    return {
+        "backend": settings.STORAGE_BACKEND,
+        **storage_metrics,
+        "concurrency": settings.UPLOAD_CONCURRENCY,
+    }
+
@@ -0,0 +1,137 @@
+from collections import OrderedDict # per la cache LRU in memoria
+from pydantic import TypeAdapter # per serializzare i viaggi direttamente in JSON
+from app.config import settings # importo le impostazioni (backend, dimensione, scadenza)
+from app.schemas.travels import Travel # classe Pydantic per i viaggi
+
+# Cache per utente delle risposte già serializzate di GET /travels e GET /travels/{id}
+# la chiave è l'ETag calcolato dalle versioni nel DB: una modifica fatta da qualunque worker (o dal worker
+# delle coordinate) cambia la chiave, quindi una voce vecchia non può mai essere servita.
+# Le rotte che modificano viaggi e tappe eliminano comunque le voci dell'utente per liberare spazio subito.
+
+# contatori della cache dei viaggi
+travel_cache_metrics = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+# serializzazione dei viaggi (con le tappe) in JSON
+travel_adapter = TypeAdapter(Travel)
+travel_list_adapter = TypeAdapter(list[Travel])
+
+
+def serialize_travel(travel) -> bytes:
+    return travel_adapter.dump_json(travel_adapter.validate_python(travel, from_attributes=True))
+
+
+def serialize_travels(travels) -> bytes:
+    return travel_list_adapter.dump_json(travel_list_adapter.validate_python(travels, from_attributes=True))
+
+
+# Backend in memoria: LRU sulle singole risposte, con l'elenco delle chiavi di ogni utente per invalidarle
+class MemoryTravelCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[tuple[int, str], bytes] = OrderedDict() # (utente, ETag) → risposta
+        self.user_keys: dict[int, set[str]] = {}                           # utente → ETag in cache
+
+    async def get(self, user_id: int, key: str) -> bytes | None:
+        body = self.entries.get((user_id, key))
+        if body is not None:
+            self.entries.move_to_end((user_id, key)) # voce usata di recente
+        return body
+
+    async def set(self, user_id: int, key: str, body: bytes):
+        self.entries[(user_id, key)] = body
+        self.entries.move_to_end((user_id, key))
+        self.user_keys.setdefault(user_id, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            (old_user, old_key), _ = self.entries.popitem(last=False)
+            self.discard_key(old_user, old_key)
+            travel_cache_metrics["evictions"] += 1
+
+    async def invalidate(self, user_id: int):
+        for key in self.user_keys.pop(user_id, set()):
+            self.entries.pop((user_id, key), None)
+
+    def discard_key(self, user_id: int, key: str):
+        keys = self.user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[user_id]
+
+
+# Backend Redis (o un server compatibile con il protocollo Redis): cache condivisa da tutti i worker
+# ogni utente ha un hash (ETag → risposta): l'invalidazione è un solo DEL
+class RedisTravelCache:
+    PREFIX = "travel_cache:"
+
+    def __init__(self, client, ttl: int):
+        self.client = client # es. redis.asyncio.Redis, oppure un client finto per le prove (fakeredis)
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int) -> "RedisTravelCache":
+        try:
+            import redis.asyncio as redis # dipendenza opzionale, serve solo con questo backend
+        except ImportError as e:
+            raise RuntimeError("TRAVEL_CACHE_BACKEND=redis richiede il pacchetto 'redis'") from e
+        return cls(redis.from_url(url), ttl)
+
+    async def get(self, user_id: int, key: str) -> bytes | None:
+        return await self.client.hget(f"{self.PREFIX}{user_id}", key)
+
+    async def set(self, user_id: int, key: str, body: bytes):
+        # la scadenza vale per tutto l'hash dell'utente: i suoi dati spariscono se non vengono letti per TTL secondi
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(f"{self.PREFIX}{user_id}", key, body)
+            pipe.expire(f"{self.PREFIX}{user_id}", self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, user_id: int):
+        await self.client.delete(f"{self.PREFIX}{user_id}")
+
+
+# creo la cache in base alle impostazioni (None se disattivata)
+def create_travel_cache():
+    backend_name = settings.TRAVEL_CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+    if backend_name == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("TRAVEL_CACHE_BACKEND=redis richiede REDIS_URL")
+        return RedisTravelCache.from_url(settings.REDIS_URL, settings.TRAVEL_CACHE_TTL_SECONDS)
+    return MemoryTravelCache(settings.TRAVEL_CACHE_SIZE)
+
+
+# istanza condivisa dall'app
+travel_cache = create_travel_cache()
+
+
+# funzione che restituisce la risposta in cache oppure la costruisce con `build` e la salva
+async def cached_travel_payload(user_id: int, key: str, build) -> bytes:
+    if travel_cache is not None:
+        body = await travel_cache.get(user_id, key)
+        if body is not None:
+            travel_cache_metrics["hits"] += 1
+            return body
+
+    travel_cache_metrics["misses"] += 1
+    body = await build()
+    if travel_cache is not None:
+        await travel_cache.set(user_id, key, body)
+    return body
+
+
+# elimina le risposte in cache di un utente (dopo ogni modifica ai suoi viaggi o alle sue tappe)
+async def invalidate_user_travels(user_id: int):
+    if travel_cache is not None:
+        travel_cache_metrics["invalidations"] += 1
+        await travel_cache.invalidate(user_id)
+
+
+# statistiche per le metriche interne
+def travel_cache_stats() -> dict:
+    total = travel_cache_metrics["hits"] + travel_cache_metrics["misses"]
+    return {
+        "backend": settings.TRAVEL_CACHE_BACKEND,
+        **travel_cache_metrics,
+        "hit_ratio": round(travel_cache_metrics["hits"] / total, 3) if total else None,
+    }
@@ -0,0 +1,183 @@
+from sqlalchemy import select, insert, delete, func, tuple_ # costruzione delle query
+from sqlalchemy.dialects import mysql, postgresql, sqlite # INSERT che ignora le righe già esistenti
+from sqlalchemy.ext.asyncio import AsyncSession # sessione ORM asincrona
+from app.models.travel_stats_db import TravelStatsDB # modello ORM per le statistiche dei viaggi
+from app.models.travel_db import TravelDB # modello ORM per i viaggi
+from app.models.day_db import DayDB # modello ORM per le tappe
+
+# Statistiche dei viaggi di ogni utente, tenute aggiornate dalle rotte che modificano viaggi e tappe
+# ogni viaggio contribuisce alla riga del suo anno e a quella del suo paese: la pagina del profilo
+# legge solo queste righe (poche decine) invece di scaricare tutti i viaggi con tutte le tappe
+
+
+# contributo di un viaggio alle statistiche (days = numero delle sue tappe)
+def travel_contribution(travel, days: int) -> dict:
+    votes = travel.votes if isinstance(travel.votes, dict) else {}
+    return {
+        "trips": 1,
+        "days": days,
+        "general_vote": travel.general_vote,
+        # considero solo i voti numerici delle categorie
+        "votes": {name: float(vote) for name, vote in votes.items() if isinstance(vote, (int, float)) and not isinstance(vote, bool)},
+    }
+
+
+# righe (dimensione, etichetta) a cui contribuisce un viaggio
+def stats_keys(year: int, town: str) -> list[tuple[str, str]]:
+    return [("year", str(year)), ("country", town)]
+
+
+# somma i viaggi nelle righe del loro anno e del loro paese, in un solo passaggio
+# ogni viaggio ha user_id, year, town, general_vote, votes e days (numero delle tappe); usata anche dalla revisione 0009
+def aggregate_stats(travels) -> list[dict]:
+    stats: dict[tuple, dict] = {}
+    for travel in travels:
+        contribution = travel_contribution(travel, travel.days)
+        for dimension, label in stats_keys(travel.year, travel.town):
+            row = stats.setdefault((travel.user_id, dimension, label), {
+                "user_id": travel.user_id, "dimension": dimension, "label": label,
+                "trips": 0, "days": 0, "vote_sum": 0.0, "vote_count": 0, "category_votes": {},
+            })
+            row["trips"] += contribution["trips"]
+            row["days"] += contribution["days"]
+            if contribution["general_vote"] is not None:
+                row["vote_sum"] += contribution["general_vote"]
+                row["vote_count"] += 1
+            for name, vote in contribution["votes"].items():
+                total, count = row["category_votes"].get(name, [0.0, 0])
+                row["category_votes"][name] = [total + vote, count + 1]
+    return list(stats.values())
+
+
+# INSERT ... ON DUPLICATE KEY UPDATE (MySQL) oppure ON CONFLICT DO NOTHING (SQLite, PostgreSQL)
+def insert_missing(dialect_name: str, rows: list[dict]):
+    if dialect_name == "mysql":
+        statement = mysql.insert(TravelStatsDB).values(rows)
+        return statement.on_duplicate_key_update(user_id=statement.inserted.user_id) # nessuna modifica
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    return insert(TravelStatsDB).values(rows).on_conflict_do_nothing()
+
+
+# crea a zero le righe che mancano: se due richieste aggiungono insieme il primo viaggio di un anno (o di un paese)
+# una sola riga viene creata, senza errori di chiave duplicata
+async def ensure_stats_rows(db: AsyncSession, user_id: int, keys: list[tuple[str, str]]):
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "label": label, "trips": 0, "days": 0, "vote_sum": 0.0, "vote_count": 0, "category_votes": {}}
+        for dimension, label in keys
+    ]
+    await db.execute(insert_missing(db.get_bind().dialect.name, rows))
+
+
+# somma (sign=1) o toglie (sign=-1) il contributo di un viaggio alle righe del suo anno e del suo paese
+# le righe vengono create se mancano e bloccate (SELECT ... FOR UPDATE) fino al commit della rotta che le modifica
+async def apply_travel_stats(db: AsyncSession, user_id: int, year: int, town: str, contribution: dict, sign: int = 1):
+    keys = stats_keys(year, town)
+    if sign > 0:
+        await ensure_stats_rows(db, user_id, keys)
+    result = await db.execute(
+        select(TravelStatsDB)
+        .filter(TravelStatsDB.user_id == user_id, tuple_(TravelStatsDB.dimension, TravelStatsDB.label).in_(keys))
+        .with_for_update()
+        .execution_options(populate_existing=True) # valori attuali, letti dopo aver ottenuto il lock
+    )
+    rows = {(row.dimension, row.label): row for row in result.scalars().all()}
+
+    for dimension, label in keys:
+        row = rows.get((dimension, label))
+        if row is None:
+            continue # niente da togliere
+
+        row.trips += sign * contribution.get("trips", 0)
+        row.days += sign * contribution.get("days", 0)
+
+        general_vote = contribution.get("general_vote")
+        if general_vote is not None:
+            row.vote_sum += sign * general_vote
+            row.vote_count += sign
+        if row.vote_count <= 0:
+            row.vote_sum, row.vote_count = 0.0, 0 # niente residui degli arrotondamenti
+
+        # il JSON va riassegnato (non modificato sul posto) perché SQLAlchemy registri la modifica
+        category_votes = dict(row.category_votes or {})
+        for name, vote in contribution.get("votes", {}).items():
+            total, count = category_votes.get(name, [0.0, 0])
+            total, count = total + sign * vote, count + sign
+            if count > 0:
+                category_votes[name] = [total, count]
+            else:
+                category_votes.pop(name, None)
+        row.category_votes = category_votes
+
+        # la riga non serve più quando l'ultimo viaggio dell'anno (o del paese) viene eliminato
+        if row.trips <= 0:
+            await db.delete(row)
+
+
+# sposta il contributo di un viaggio modificato (anno, paese o voti cambiati)
+async def replace_travel_stats(db: AsyncSession, user_id: int, old: tuple[int, str, dict], new: tuple[int, str, dict]):
+    if old == new:
+        return # niente da aggiornare
+    old_year, old_town, old_contribution = old
+    new_year, new_town, new_contribution = new
+    await apply_travel_stats(db, user_id, old_year, old_town, old_contribution, sign=-1)
+    await db.flush() # le righe tolte devono essere nel DB prima di essere rilette
+    await apply_travel_stats(db, user_id, new_year, new_town, new_contribution)
+
+
+# media arrotondata (None se non ci sono voti)
+def average(total: float, count: int) -> float | None:
+    return round(total / count, 2) if count else None
+
+
+# costruisce la risposta di GET /travels/stats a partire dalle righe delle statistiche
+def build_stats(rows: list) -> dict:
+    years = sorted((row for row in rows if row.dimension == "year"), key=lambda row: int(row.label), reverse=True)
+    countries = sorted((row for row in rows if row.dimension == "country"), key=lambda row: (-row.trips, row.label))
+
+    # ogni viaggio compare in una sola riga "year": i totali si ricavano da queste
+    category_totals: dict[str, list] = {}
+    for row in years:
+        for name, (total, count) in (row.category_votes or {}).items():
+            category_totals.setdefault(name, [0.0, 0])
+            category_totals[name][0] += total
+            category_totals[name][1] += count
+
+    return {
+        "trips": sum(row.trips for row in years),
+        "days": sum(row.days for row in years),
+        "countries_count": len(countries),
+        "average_vote": average(sum(row.vote_sum for row in years), sum(row.vote_count for row in years)),
+        "category_averages": {name: average(total, count) for name, (total, count) in sorted(category_totals.items())},
+        "per_year": [
+            {"year": int(row.label), "trips": row.trips, "days": row.days, "average_vote": average(row.vote_sum, row.vote_count)}
+            for row in years
+        ],
+        "countries": [
+            {"town": row.label, "trips": row.trips, "days": row.days, "average_vote": average(row.vote_sum, row.vote_count)}
+            for row in countries
+        ],
+    }
+
+
+# ricalcola da zero le statistiche (di un utente o di tutti), es. per riallineare la tabella dopo modifiche fatte a mano nel DB
+# una sola query legge i viaggi con il numero delle tappe, le righe vengono sommate in memoria e inserite tutte insieme
+async def rebuild_travel_stats(db: AsyncSession, user_id: int | None = None) -> int:
+    day_counts = (
+        select(DayDB.travel_id, func.count(DayDB.id).label("days")).group_by(DayDB.travel_id).subquery()
+    )
+    query = select(
+        TravelDB.user_id, TravelDB.year, TravelDB.town, TravelDB.general_vote, TravelDB.votes,
+        func.coalesce(day_counts.c.days, 0).label("days"),
+    ).outerjoin(day_counts, day_counts.c.travel_id == TravelDB.id)
+    clear = delete(TravelStatsDB)
+    if user_id is not None:
+        query = query.filter(TravelDB.user_id == user_id)
+        clear = clear.filter(TravelStatsDB.user_id == user_id)
+
+    await db.execute(clear)
+    travels = (await db.execute(query)).all()
+    rows = aggregate_stats(travels)
+    if rows:
+        await db.execute(insert(TravelStatsDB), rows) # executemany: un solo INSERT per tutte le righe
+    await db.commit()
+    return len(travels)
@@ -1,8 +1,27 @@
 from passlib.context import CryptContext  # per hash password
+from concurrent.futures import ThreadPoolExecutor # thread dedicati all'hashing
+from fastapi import HTTPException # per rispondere 503 quando la coda dell'hashing è piena
+from app.config import settings # importo le impostazioni (parametri di argon2 e limiti dell'executor)
+import asyncio # per attendere l'hashing senza bloccare l'event loop
 import re # per lavorare con le espressioni regolari
 
 # configurazione per hashing password
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# gli hash creati con parametri diversi da quelli attuali vengono aggiornati al login (needs_update)
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# executor dedicato: ogni hash argon2 usa ARGON2_MEMORY_COST KiB, quindi limito i thread
+# (memoria massima ≈ HASH_WORKERS × ARGON2_MEMORY_COST) invece di usare il threadpool condiviso
+hash_executor = ThreadPoolExecutor(max_workers=settings.HASH_WORKERS, thread_name_prefix="argon2")
+
+# contatori dell'hashing
+hash_metrics = {"in_flight": 0, "completed": 0, "failed": 0, "rejected": 0}
+
 
 # funzione per hashare la password nel database
 def get_password_hash(password: str):
@@ -12,6 +31,40 @@ def get_password_hash(password: str):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+
+# esegue una funzione di hashing nell'executor dedicato
+# se ci sono già troppe richieste in attesa risponde subito 503 invece di accodarle all'infinito
+async def run_hashing(func, *args):
+    if hash_metrics["in_flight"] >= settings.HASH_WORKERS + settings.HASH_MAX_QUEUE:
+        hash_metrics["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Servizio momentaneamente sovraccarico, riprova", headers={"Retry-After": "1"})
+
+    hash_metrics["in_flight"] += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+    except BaseException:
+        hash_metrics["failed"] += 1 # errore o richiesta annullata
+        raise
+    finally:
+        hash_metrics["in_flight"] -= 1
+    hash_metrics["completed"] += 1
+    return result
+
+
+# versione asincrona di get_password_hash
+async def hash_password(password: str) -> str:
+    return await run_hashing(get_password_hash, password)
+
+
+# verifica la password e, se l'hash usa parametri vecchi, restituisce anche il nuovo hash da salvare
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+# statistiche per le metriche interne
+def hashing_stats() -> dict:
+    return {**hash_metrics, "workers": settings.HASH_WORKERS, "max_queue": settings.HASH_MAX_QUEUE}
+
 # funzione per validare la password secondo certi requisiti
 def validate_password(password: str) -> dict:
     """
@@ -50,3 +103,4 @@ def validate_password(password: str) -> dict:
             "special": has_special,
         },
     }
+
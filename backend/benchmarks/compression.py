@@ -0,0 +1,91 @@
+# Benchmark: tempo di serializzazione (json vs orjson) e byte trasmessi (nessuna compressione, gzip, brotli)
+# sui payload di GET /travels, GET /users e GET /chats/{id}
+# uso (dalla cartella backend): python -m benchmarks.compression [ripetizioni]
+import gzip
+import json
+import random
+import sys
+import time
+import uuid
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.config import settings
+from app.schemas.travels import Travel
+from app.schemas.users import User
+from app.schemas.chats import Chat
+from app.utils.compression import brotli
+
+# testi e URL variati (con seme fisso), altrimenti la compressione risulterebbe irrealisticamente alta
+rng = random.Random(42)
+cities = ["Firenze", "Roma", "Napoli", "Venezia", "Torino", "Palermo", "Bologna", "Lecce", "Trento", "Bari"]
+words = ("visita museo passeggiata centro storico cena trattoria mercato spiaggia tramonto chiesa piazza "
+         "castello sentiero lago vino degustazione colazione treno battello mostra giardino panorama").split()
+
+
+def text(n: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+
+def photo_url(size: str) -> str:
+    return f"https://res.cloudinary.com/demo/image/upload/v{rng.randint(10**9, 2 * 10**9)}/{size}_{uuid.UUID(int=rng.getrandbits(128)).hex}.webp"
+
+
+def make_day(i: int) -> dict:
+    variants = [{"thumb": photo_url("thumb"), "medium": photo_url("medium"), "full": photo_url("full")} for _ in range(3)]
+    return {
+        "id": i, "city": rng.choice(cities), "date": f"2024-05-{rng.randint(1, 28):02d}", "title": text(4),
+        "description": text(rng.randint(20, 60)),
+        "experiences": rng.sample(["arte", "cibo", "storia", "mare", "natura", "relax"], 3),
+        "lat": round(rng.uniform(37, 46), 6), "lng": round(rng.uniform(7, 18), 6),
+        "photo": [v["full"] for v in variants], "photo_variants": variants,
+        "geocode_pending": False,
+    }
+
+
+def make_travel(i: int, days: int) -> dict:
+    return {
+        "id": i, "town": "Italia", "year": 2024, "start_date": "2024-05-10", "end_date": "2024-05-20",
+        "general_vote": 4.3, "votes": {"cibo": 5, "paesaggio": 4, "attività": 4, "relax": 4, "prezzo": 3},
+        "user_id": 1, "days": [make_day(i * 100 + d) for d in range(days)],
+    }
+
+
+# dati realistici: 30 viaggi da 10 tappe, 20 utenti con 5 viaggi ciascuno, una chat di 20 scambi
+travels = [Travel.model_validate(make_travel(i, 10)).model_dump(mode="json") for i in range(30)]
+users = [
+    User.model_validate({
+        "id": u, "name": "Mario", "surname": "Rossi", "email": f"mario{u}@example.com",
+        "experiences": ["mare", "montagna"], "photo": None, "registration_date": "2024-01-01T10:00:00",
+        "travels": [make_travel(u * 10 + t, 5) for t in range(5)],
+    }).model_dump(mode="json")
+    for u in range(20)
+]
+chat = Chat.model_validate({
+    "id": 1, "user_id": 1, "title": "Weekend in Toscana",
+    "messages": [{"user": text(rng.randint(8, 25)), "ai": text(rng.randint(80, 200))} for _ in range(20)],
+}).model_dump(mode="json")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    results = {}
+    for name, payload in {"GET /travels": travels, "GET /users": users, "GET /chats/{id}": chat}.items():
+        row = {}
+        for label, response_class in {"json": JSONResponse, "orjson": ORJSONResponse}.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body = response_class(payload).body
+            row[f"{label}_ms"] = round((time.perf_counter() - start) / repeat * 1000, 3)
+        row["speedup"] = round(row["json_ms"] / row["orjson_ms"], 1)
+
+        # byte sul filo con le impostazioni dell'app
+        row["identity_kb"] = round(len(body) / 1024, 1)
+        start = time.perf_counter()
+        row["gzip_kb"] = round(len(gzip.compress(body, compresslevel=settings.GZIP_LEVEL)) / 1024, 1)
+        row["gzip_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if brotli is not None:
+            start = time.perf_counter()
+            row["brotli_kb"] = round(len(brotli.compress(body, quality=settings.BROTLI_QUALITY)) / 1024, 1)
+            row["brotli_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        results[name] = row
+
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,66 @@
+# Benchmark della ricerca per email del login su un DB SQLite temporaneo, senza e con l'indice unico
+# uso (dalla cartella backend): python -m benchmarks.email_lookup [utenti]   (default 1.000.000)
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, insert, select, text
+from app.models.user_db import UserDB
+from app.utils.users import get_password_hash, verify_password
+
+users_table = UserDB.__table__ # tabella Core: niente configurazione delle relazioni con gli altri modelli
+
+
+def lookup_ms(connection, emails: list[str]) -> float:
+    timings = []
+    for email in emails:
+        start = time.perf_counter()
+        connection.execute(select(users_table).where(users_table.c.email == email)).first() # stessa query del login
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def email_lookup(users: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/users.db")
+        users_table.create(engine)
+        with engine.begin() as connection:
+            for first in range(0, users, 100_000):
+                connection.execute(insert(users_table), [
+                    {"name": "Mario", "surname": "Rossi", "email": f"utente{i}@example.com", "password": "x"}
+                    for i in range(first, min(first + 100_000, users))
+                ])
+
+        rng = random.Random(42)
+        emails = [f"utente{rng.randrange(users)}@example.com" for _ in range(20)]
+        with engine.connect() as connection:
+            connection.execute(text("DROP INDEX ix_users_email")) # come prima della migrazione 0012
+            before = lookup_ms(connection, emails)
+            start = time.perf_counter()
+            connection.execute(text("CREATE UNIQUE INDEX ix_users_email ON users (email)"))
+            index_seconds = time.perf_counter() - start
+            after = lookup_ms(connection, emails * 50)
+        engine.dispose()
+
+    # il login completo aggiunge la verifica argon2 della password, uguale nei due casi
+    hashed = get_password_hash("Password1!")
+    start = time.perf_counter()
+    verify_password("Password1!", hashed)
+    verify_ms = (time.perf_counter() - start) * 1000
+    return {
+        "users": users,
+        "lookup_ms_without_index": before,
+        "lookup_ms_with_index": after,
+        "speedup": round(before / after),
+        "index_creation_seconds": round(index_seconds, 1),
+        "argon2_verify_ms": round(verify_ms, 1),
+        "login_ms_without_index": round(before + verify_ms, 1),
+        "login_ms_with_index": round(after + verify_ms, 1),
+    }
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    print(json.dumps(email_lookup(int(args[0]) if args else 1_000_000), indent=2))
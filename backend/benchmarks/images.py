@@ -0,0 +1,29 @@
+# Benchmark: dimensioni e tempi delle varianti per una foto di prova
+# uso (dalla cartella backend): python -m benchmarks.images [percorso_immagine]
+import io
+import json
+import sys
+import time
+from PIL import Image
+from app.config import settings
+from app.utils.images import resize_image
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            original = f.read()
+    else:
+        # foto sintetica 4000×3000 (circa 12 megapixel, come quella di uno smartphone)
+        buffer = io.BytesIO()
+        Image.radial_gradient("L").resize((4000, 3000)).convert("RGB").save(buffer, format="JPEG", quality=95)
+        original = buffer.getvalue()
+
+    start = time.perf_counter()
+    result = resize_image(original, settings.IMAGE_FORMAT.upper(), settings.IMAGE_QUALITY)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "original_kb": round(len(original) / 1024, 1),
+        "variants_kb": {name: round(len(data) / 1024, 1) for name, data in result.items()},
+        "resize_ms": round(elapsed * 1000, 1),
+    }, indent=2))
@@ -0,0 +1,40 @@
+# Benchmark del classificatore locale dell'intento sul set di valutazione (tests/data/intent_eval.jsonl):
+# quota decisa senza AI, chiamate all'AI risparmiate e latenza
+# uso (dalla cartella backend): python -m benchmarks.intent [min_confidence]
+import json
+import sys
+import time
+from pathlib import Path
+from app.utils.intent import DEFAULT_MIN_CONFIDENCE, OFF_TOPIC, get_classifier
+
+EVAL_PATH = Path(__file__).resolve().parent.parent / "tests" / "data" / "intent_eval.jsonl"
+
+
+def run(min_confidence: float) -> dict:
+    classifier = get_classifier()
+    with open(EVAL_PATH, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+
+    covered = llm_calls_saved = 0
+    timings = []
+    for example in examples:
+        start = time.perf_counter()
+        intent, _ = classifier.predict(example["text"], min_confidence=min_confidence)
+        timings.append(time.perf_counter() - start)
+        if intent is not None:
+            covered += 1
+            # prima: 1 chiamata per l'intento, 2 se fuori tema (ricontrollo)
+            llm_calls_saved += 2 if intent == OFF_TOPIC else 1
+
+    timings.sort()
+    return {
+        "examples": len(examples),
+        "coverage": round(covered / len(examples), 3),
+        "llm_calls_saved": llm_calls_saved,
+        "latency_p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "latency_p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6, 1),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MIN_CONFIDENCE), indent=2))
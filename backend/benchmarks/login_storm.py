@@ -0,0 +1,37 @@
+# Benchmark di una raffica di login: throughput e memoria massima del processo
+# --unbounded usa il threadpool condiviso (comportamento precedente) per il confronto
+# uso (dalla cartella backend): python -m benchmarks.login_storm [login] [--unbounded]
+import asyncio
+import json
+import resource
+import sys
+import time
+from app.config import settings
+from app.utils.users import get_password_hash, verify_password, verify_and_update_password
+
+
+async def login_storm(logins: int, unbounded: bool) -> dict:
+    hashed = get_password_hash("Password1!")
+    start = time.perf_counter()
+    if unbounded:
+        tasks = [asyncio.to_thread(verify_password, "Password1!", hashed) for _ in range(logins)]
+    else:
+        tasks = [verify_and_update_password("Password1!", hashed) for _ in range(logins)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    ok = sum(1 for r in results if not isinstance(r, Exception))
+    return {
+        "mode": "unbounded" if unbounded else f"executor ({settings.HASH_WORKERS} thread, coda {settings.HASH_MAX_QUEUE})",
+        "logins": logins,
+        "ok": ok,
+        "rejected_503": logins - ok,
+        "seconds": round(elapsed, 2),
+        "logins_per_second": round(ok / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), # ru_maxrss è in KiB su Linux
+    }
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    print(json.dumps(asyncio.run(login_storm(int(args[0]) if args else 200, "--unbounded" in sys.argv)), indent=2))
@@ -0,0 +1,30 @@
+# Test di carico offline: N caricamenti contemporanei verso il backend configurato (usare "memory" o "local")
+# uso (dalla cartella backend): STORAGE_BACKEND=memory python -m benchmarks.storage [caricamenti] [dimensione_kb]
+import asyncio
+import json
+import sys
+import time
+from app.config import settings
+from app.utils.storage import storage_metrics, upload_bytes
+
+
+async def load_test(count: int, size_kb: int) -> dict:
+    data = bytes(size_kb * 1024)
+    start = time.perf_counter()
+    await asyncio.gather(*(upload_bytes(data, ".bin") for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": settings.STORAGE_BACKEND,
+        "uploads": count,
+        "size_kb": size_kb,
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(count * size_kb / 1024 / elapsed, 1),
+        "peak_in_flight": storage_metrics["peak_in_flight"],
+        "concurrency_limit": settings.UPLOAD_CONCURRENCY,
+    }
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    print(json.dumps(asyncio.run(load_test(count, size_kb)), indent=2))
@@ -0,0 +1,72 @@
+# Micro-benchmark: verifica dello stesso token con e senza la cache dei token verificati,
+# con le revoche in memoria e su Redis (EXISTS a ogni richiesta oppure copia locale dei controlli)
+# uso (dalla cartella backend): python -m benchmarks.token_cache [richieste] [--rtt-ms=0.3]
+# con REDIS_URL impostato usa il server Redis vero, altrimenti un client finto che attende rtt-ms a ogni comando
+import asyncio
+import json
+import sys
+import time
+from app import auth
+from app.config import settings
+from app.utils import revocation
+from app.utils.revocation import MemoryRevocationStore, RedisRevocationStore
+
+
+# client Redis finto: ogni comando costa un viaggio di andata e ritorno sulla rete
+class SimulatedRedis:
+    def __init__(self, rtt_ms: float):
+        self.rtt = rtt_ms / 1000
+        self.data = {}
+
+    async def set(self, name, value, ex=None):
+        await asyncio.sleep(self.rtt)
+        self.data[name] = value
+
+    async def exists(self, *names):
+        await asyncio.sleep(self.rtt)
+        return sum(name in self.data for name in names)
+
+
+def redis_client(rtt_ms: float):
+    if settings.REDIS_URL:
+        return RedisRevocationStore.from_url(settings.REDIS_URL).client
+    return SimulatedRedis(rtt_ms)
+
+
+async def cached_us(token: str, store, requests: int) -> float:
+    revocation.revocation_store = store
+    auth.token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(requests):
+        await auth.verify_token_cached(token)
+    return round((time.perf_counter() - start) / requests * 1e6, 2)
+
+
+async def run(requests: int, rtt_ms: float) -> dict:
+    token = auth.create_access_token({"sub": "bench@example.com", "id": 1})
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        auth.verify_token(token)
+    uncached = round((time.perf_counter() - start) / requests * 1e6, 2)
+
+    client = redis_client(rtt_ms)
+    every_request = RedisRevocationStore(client, check_seconds=0) # comportamento precedente
+    local_copy = RedisRevocationStore(client)
+    return {
+        "requests": requests,
+        "redis": settings.REDIS_URL or f"simulato (rtt {rtt_ms} ms)",
+        "uncached_us_per_request": uncached,
+        "cached_memory_us_per_request": await cached_us(token, MemoryRevocationStore(), requests),
+        "cached_redis_every_request_us_per_request": await cached_us(token, every_request, requests),
+        "cached_redis_local_copy_us_per_request": await cached_us(token, local_copy, requests),
+        "redis_lookups_every_request": every_request.lookups,
+        "redis_lookups_local_copy": local_copy.lookups,
+        "check_seconds": local_copy.check_seconds,
+    }
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    rtt = next((float(a.split("=", 1)[1]) for a in sys.argv[1:] if a.startswith("--rtt-ms=")), 0.3)
+    print(json.dumps(asyncio.run(run(int(args[0]) if args else 10000, rtt)), indent=2))
@@ -1,14 +1,37 @@
+from contextlib import asynccontextmanager, suppress # per gestire avvio e chiusura dell'applicazione
+import asyncio # per avviare il worker in background
 from fastapi import FastAPI # importo FastAPI
 from fastapi.middleware.cors import CORSMiddleware # importo CORS
+from fastapi.responses import ORJSONResponse # serializzazione JSON veloce con orjson
+from fastapi.staticfiles import StaticFiles # per servire i file del backend di archiviazione "local"
 
 # importo i router delle API
-from app.routers import travels, days, users, chats
+from app.routers import travels, days, markers, users, chats, internal
 
-# importo la configurazione del database
-from app.database import Base, engine
+# lo schema del database non viene più creato all'avvio: si aggiorna con le migrazioni (alembic upgrade head)
+from app.config import settings # importo le impostazioni
+from app.utils.geocoding import geocoding_worker # worker che calcola le coordinate delle tappe
+from app.utils.http import create_http_client # client HTTP condiviso per le chiamate esterne
+from app.utils.images import shutdown_image_executor # pool di processi che ridimensiona le foto
+from app.utils.compression import CompressionMiddleware # compressione gzip/brotli delle risposte
+
+# lifespan: all'avvio creo il client HTTP condiviso e avvio il worker delle coordinate,
+# alla chiusura fermo il worker, chiudo le connessioni e il pool delle foto
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with create_http_client() as http_client:
+        app.state.http_client = http_client # disponibile nelle rotte tramite get_http_client
+        worker = asyncio.create_task(geocoding_worker(http_client)) if settings.GEOCODE_WORKER_ENABLED else None
+        yield
+        if worker:
+            worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await worker
+    shutdown_image_executor()
 
 # creo l'istanza principale di FastAPI
-app = FastAPI()
+# le risposte JSON vengono serializzate con orjson (più veloce del modulo json sui payload grandi di viaggi e chat)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # configuro il middleware CORS per permettere richieste da qualsiasi origine
 # utile quando il frontend è su un dominio diverso dal backend
@@ -18,14 +41,28 @@ app.add_middleware(
     allow_credentials=True,    # permette l'invio di cookie e credenziali
     allow_methods=["*"],       # permette tutti i metodi HTTP (GET, POST, PUT, DELETE...)
     allow_headers=["*"],       # permette tutti gli header personalizzati
+    expose_headers=["X-Next-Cursor"], # rende leggibile al frontend il cursore della paginazione dei viaggi
 )
 
-# creo tutte le tabelle nel database se non esistono già
-# "Base" contiene tutti i modelli SQLAlchemy registrati
-Base.metadata.create_all(bind=engine)
+# comprimo le risposte più grandi di COMPRESSION_MIN_SIZE (brotli se disponibile, altrimenti gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
 
 # includo il router per ogni rotta al server
 app.include_router(travels.router) # viaggi
 app.include_router(days.router) # tappe
+app.include_router(markers.router) # marker delle tappe sulla mappa
 app.include_router(users.router) # utenti
 app.include_router(chats.router) # chat AI
+
+# metriche interne solo se è impostato METRICS_TOKEN (disattivate di default)
+if settings.METRICS_TOKEN:
+    app.include_router(internal.router)
+
+# con l'archiviazione su disco i file caricati vengono serviti dall'app stessa
+if settings.STORAGE_BACKEND.lower() == "local":
+    app.mount("/media", StaticFiles(directory=settings.STORAGE_LOCAL_DIR), name="media")
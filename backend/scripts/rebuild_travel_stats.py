@@ -0,0 +1,15 @@
+# Ricalcolo delle statistiche dei viaggi di tutti gli utenti (tabella travel_stats)
+# uso (dalla cartella backend): python -m scripts.rebuild_travel_stats
+import asyncio
+from app.database import AsyncSessionLocal
+from app.utils.travel_stats import rebuild_travel_stats
+import main # noqa: F401 (registra tutti i modelli ORM)
+
+
+async def run():
+    async with AsyncSessionLocal() as db:
+        print(f"Statistiche ricalcolate da {await rebuild_travel_stats(db)} viaggi")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
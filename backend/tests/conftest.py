@@ -0,0 +1,65 @@
+import os # per le impostazioni lette dall'app all'importazione
+import tempfile # database SQLite temporaneo
+
+# impostazioni delle prove: vanno definite prima di importare l'app (Settings le legge all'avvio)
+TEST_DIR = tempfile.mkdtemp(prefix="travelapp-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{TEST_DIR}/test.db",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "GOOGLE_API_KEY": "test",
+    "GEOCODE_WORKER_ENABLED": "false",  # niente chiamate a Nominatim
+    "STORAGE_BACKEND": "memory",
+    "LLM_CACHE_BACKEND": "none",
+    "TRAVEL_CACHE_BACKEND": "none",     # gli id vengono riusati tra una prova e l'altra
+    "METRICS_TOKEN": "test-metrics",
+})
+
+import pytest # framework delle prove
+from alembic import command # per creare lo schema con le migrazioni
+from alembic.config import Config # configurazione di Alembic (alembic.ini)
+from fastapi.testclient import TestClient # client HTTP che esegue l'app senza server
+from sqlalchemy import text # per svuotare le tabelle
+from sqlalchemy.orm import Session # sessione sincrona per preparare i dati
+from app.database import Base, engine # modelli e engine sincrono
+from app.auth import create_access_token # token per le rotte protette
+import main # l'app con tutti i modelli registrati
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# schema creato una sola volta con le migrazioni, come in produzione
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    command.upgrade(config, "head")
+
+
+# ogni prova parte da tabelle vuote
+@pytest.fixture(autouse=True)
+def clean_tables(schema):
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(text(f"DELETE FROM {table.name}"))
+
+
+# client dell'app con lifespan avviato (client HTTP condiviso, pool delle foto)
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+# sessione sincrona per inserire i dati delle prove direttamente nel DB
+@pytest.fixture
+def db():
+    with Session(engine) as session:
+        yield session
+
+
+# header di autenticazione per un utente
+def auth_headers(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email, 'id': user.id})}"}
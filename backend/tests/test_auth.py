@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from app import auth
+from app.utils import revocation
+from app.utils.revocation import RedisRevocationStore
+from app.models.user_db import UserDB
+from tests.conftest import auth_headers
+
+
+# client Redis finto condiviso tra più "worker" (solo i comandi usati dall'archivio delle revoche)
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.exists_calls = 0
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = value
+
+    async def exists(self, *names):
+        self.exists_calls += 1
+        return sum(name in self.data for name in names)
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    auth.token_cache.clear()
+    yield
+    auth.token_cache.clear()
+
+
+def test_logout_revokes_token(client, db):
+    user = UserDB(name="Mario", surname="Rossi", email="logout@example.com", password="x", experiences=[])
+    db.add(user)
+    db.commit()
+    headers = auth_headers(user)
+
+    assert client.get("/travels/", headers=headers).status_code == 200
+    assert client.post("/users/logout", headers=headers).status_code == 200
+    assert client.get("/travels/", headers=headers).status_code == 401
+
+
+# un token già in cache su questo worker viene rifiutato appena un altro worker registra il logout (senza copia locale)
+def test_revocation_from_another_worker_is_seen(monkeypatch):
+    shared = FakeRedis()
+    monkeypatch.setattr(revocation, "revocation_store", RedisRevocationStore(shared, check_seconds=0))
+    other_worker = RedisRevocationStore(shared)
+    token = auth.create_access_token({"sub": "mario@example.com", "id": 1})
+
+    async def scenario():
+        assert await auth.verify_token_cached(token) is not None # verificato e messo in cache
+        payload = auth.verify_token(token)
+        await other_worker.revoke(auth.token_digest(token), float(payload["exp"]))
+        return await auth.verify_token_cached(token)
+
+    assert asyncio.run(scenario()) is None
+    assert auth.token_digest(token) not in auth.token_cache
+
+
+def test_cached_token_skips_signature_check(monkeypatch):
+    token = auth.create_access_token({"sub": "mario@example.com", "id": 1})
+    calls = []
+    verify = auth.verify_token
+    monkeypatch.setattr(auth, "verify_token", lambda t: calls.append(t) or verify(t))
+
+    async def scenario():
+        return [await auth.verify_token_cached(token) for _ in range(5)]
+
+    payloads = asyncio.run(scenario())
+
+    assert all(payload["id"] == 1 for payload in payloads)
+    assert len(calls) == 1
+
+
+# con la copia locale Redis viene interrogato una volta ogni check_seconds per token, non a ogni richiesta
+def test_redis_checked_once_per_interval(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(revocation.time, "monotonic", lambda: clock[0])
+    shared = FakeRedis()
+    monkeypatch.setattr(revocation, "revocation_store", RedisRevocationStore(shared, check_seconds=5))
+    other_worker = RedisRevocationStore(shared)
+    token = auth.create_access_token({"sub": "mario@example.com", "id": 1})
+
+    async def scenario():
+        results = [await auth.verify_token_cached(token) for _ in range(100)]
+        assert shared.exists_calls == 1
+        await other_worker.revoke(auth.token_digest(token), float(results[0]["exp"]))
+        results.append(await auth.verify_token_cached(token)) # ancora nella finestra del controllo
+        clock[0] += 5
+        results.append(await auth.verify_token_cached(token))
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(payload is not None for payload in results[:101])
+    assert results[101] is None
+    assert shared.exists_calls == 2
+
+
+# il logout ricevuto da questo worker vale subito, anche per un token controllato da poco
+def test_local_revoke_skips_check_interval(monkeypatch):
+    store = RedisRevocationStore(FakeRedis(), check_seconds=60)
+    monkeypatch.setattr(revocation, "revocation_store", store)
+    token = auth.create_access_token({"sub": "mario@example.com", "id": 1})
+
+    async def scenario():
+        assert await auth.verify_token_cached(token) is not None
+        await auth.revoke_token(token)
+        return await auth.verify_token_cached(token)
+
+    assert asyncio.run(scenario()) is None
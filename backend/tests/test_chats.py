@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models.user_db import UserDB
+from app.models.chat_db import ChatDB
+from app.models.chat_message_db import ChatMessageDB
+from app.routers import chats
+from app.utils.chats import estimate_tokens
+
+
+# scambio non salvato: build_context legge solo id, domanda e risposta
+def exchange(id: int, text: str = "ciao") -> ChatMessageDB:
+    return ChatMessageDB(id=id, user=text, ai=text)
+
+
+# gli scambi più recenti entrano finché c'è budget, in ordine cronologico; i più vecchi restano fuori
+def test_build_context_packs_recent_exchanges():
+    history = [exchange(id) for id in range(1, 6)]
+    cost = estimate_tokens(chats.format_exchange(history[0]))
+
+    context, dropped = chats.build_context(history, None, budget=cost * 3)
+
+    assert [ex.id for ex in dropped] == [1, 2]
+    assert context == "\n".join(chats.format_exchange(ex) for ex in history[2:])
+
+
+# il riassunto occupa parte del budget e apre il contesto
+def test_build_context_counts_summary():
+    history = [exchange(id) for id in range(1, 6)]
+    header = "Riassunto della conversazione precedente: Roma a maggio"
+    cost = estimate_tokens(chats.format_exchange(history[0]))
+
+    context, dropped = chats.build_context(history, "Roma a maggio", budget=estimate_tokens(header) + cost * 2)
+
+    assert [ex.id for ex in dropped] == [1, 2, 3]
+    assert context.startswith(header + "\n")
+    assert context.endswith(chats.format_exchange(history[-1]))
+
+
+# lo scambio più recente entra anche se da solo supera il budget
+def test_build_context_keeps_last_exchange():
+    history = [exchange(1), exchange(2, "x" * 400)]
+
+    context, dropped = chats.build_context(history, None, budget=10)
+
+    assert [ex.id for ex in dropped] == [1]
+    assert context == chats.format_exchange(history[1])
+
+
+# con più scambi non riassunti di quelli letti per il contesto, il riassunto parte dai più vecchi
+# e un aggiornamento fallito non ne salta nessuno
+def test_summary_starts_from_oldest_exchanges(db, monkeypatch):
+    user = UserDB(name="Mario", surname="Rossi", email="chat@example.com", password="x", experiences=[])
+    db.add(user)
+    db.flush()
+    chat = ChatDB(user_id=user.id, title="Roma")
+    db.add(chat)
+    db.flush()
+    db.add_all(ChatMessageDB(chat_id=chat.id, user=f"domanda {n}", ai=f"risposta {n}") for n in range(chats.MAX_CONTEXT_MESSAGES + 10))
+    db.commit()
+    ids = db.execute(select(ChatMessageDB.id).filter(ChatMessageDB.chat_id == chat.id).order_by(ChatMessageDB.id)).scalars().all()
+
+    prompts = []
+    failures = [RuntimeError("quota")]
+
+    async def fake_generate(prompt, kind="answer"):
+        prompts.append(prompt)
+        if failures:
+            raise failures.pop()
+        return SimpleNamespace(text="riassunto")
+
+    monkeypatch.setattr(chats, "generate_content", fake_generate)
+    monkeypatch.setattr(chats, "MAX_SUMMARY_MESSAGES", 5)
+
+    async def scenario():
+        engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        monkeypatch.setattr(chats, "AsyncSessionLocal", session_factory)
+        tasks = SimpleNamespace(added=[], add_task=lambda *args: tasks.added.append(args))
+        try:
+            for _ in range(2): # il primo aggiornamento fallisce, il secondo riparte dallo stesso punto
+                async with session_factory() as session:
+                    chat_db = await session.get(ChatDB, chat.id)
+                    history, _ = await chats.prepare_context(chat_db, session, tasks)
+                task, *args = tasks.added.pop()
+                await task(*args)
+        finally:
+            await engine.dispose()
+        return history
+
+    history = asyncio.run(scenario())
+
+    assert history[0].id == ids[10] # il contesto legge solo gli scambi più recenti
+    assert "domanda 0" in prompts[1] and "domanda 4" in prompts[1] and "domanda 5" not in prompts[1]
+    db.expire_all()
+    assert db.get(ChatDB, chat.id).summary_until == ids[4]
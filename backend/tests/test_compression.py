@@ -0,0 +1,62 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from app.utils.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+
+
+@pytest.mark.parametrize("header, available, expected", [
+    ("gzip, deflate, br", ["br", "gzip"], "br"),
+    ("br;q=0, gzip", ["br", "gzip"], "gzip"),        # brotli rifiutato esplicitamente
+    ("gzip;q=0.5, br;q=0.8", ["br", "gzip"], "br"),
+    ("gzip;q=1.0, br;q=0.2", ["br", "gzip"], "gzip"),
+    ("gzip;q=0", ["br", "gzip"], None),
+    ("x-brotli, xgzip", ["br", "gzip"], None),       # nessuna corrispondenza per sottostringa
+    ("*", ["br", "gzip"], "br"),
+    ("*;q=0.1, br;q=0", ["br", "gzip"], "gzip"),
+    ("BR;Q=1", ["gzip"], None),                      # brotli non installato
+    ("", ["br", "gzip"], None),
+    ("gzip;q=abc", ["gzip"], None),
+])
+def test_choose_encoding(header, available, expected):
+    assert choose_encoding(header, available) == expected
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5 , br ; q=0, identity") == {"gzip": 0.5, "br": 0.0, "identity": 1.0}
+
+
+# app minima con il middleware: il corpo è abbastanza grande da essere compresso
+@pytest.fixture
+def compressed_client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/")
+    def index():
+        return PlainTextResponse("viaggio " * 200)
+
+    return TestClient(app)
+
+
+def test_gzip_refused_with_q_zero(compressed_client):
+    response = compressed_client.get("/", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "viaggio " * 200
+
+
+def test_gzip_response(compressed_client):
+    response = compressed_client.get("/", headers={"Accept-Encoding": "br;q=0, gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == "viaggio " * 200 # decompresso dal client
+
+
+def test_brotli_response(compressed_client):
+    pytest.importorskip("brotli")
+    response = compressed_client.get("/", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == "viaggio " * 200 # decompresso dal client
@@ -0,0 +1,45 @@
+from datetime import date
+from app.models.user_db import UserDB
+from app.models.travel_db import TravelDB
+from app.models.day_db import DayDB
+from tests.conftest import auth_headers
+
+
+def seed_travel(db, town: str):
+    user = UserDB(name="Mario", surname="Rossi", email="geo@example.com", password="x", experiences=[])
+    db.add(user)
+    db.flush()
+    travel = TravelDB(town=town, year=2024, start_date=date(2024, 5, 1), end_date=date(2024, 5, 3), user_id=user.id)
+    db.add(travel)
+    db.flush()
+    day = DayDB(city="Paris", date=date(2024, 5, 1), title="Centro", description="", experiences=[], photo=[], lat=48.85, lng=2.35, travel_id=travel.id)
+    db.add(day)
+    db.commit()
+    return user, travel, day
+
+
+def travel_body(town: str) -> dict:
+    return {"town": town, "year": 2024, "start_date": "2024-05-01", "end_date": "2024-05-03"}
+
+
+# le coordinate delle tappe dipendono anche dal paese del viaggio: cambiandolo vanno ricalcolate
+def test_town_change_requeues_day_geocoding(client, db):
+    user, travel, day = seed_travel(db, "France")
+
+    response = client.put(f"/travels/{travel.id}", json=travel_body("United States"), headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.json()["days"][0]["lat"] is None
+    db.refresh(day)
+    assert day.geocode_pending is True
+
+
+def test_same_town_keeps_day_coordinates(client, db):
+    user, travel, day = seed_travel(db, "France")
+
+    response = client.put(f"/travels/{travel.id}", json=travel_body("France"), headers=auth_headers(user))
+
+    assert response.status_code == 200
+    assert response.json()["days"][0]["lat"] == 48.85
+    db.refresh(day)
+    assert day.geocode_pending is False
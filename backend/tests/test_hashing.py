@@ -0,0 +1,54 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from app.config import settings
+from app.utils import users
+from app.utils.users import hash_metrics, run_hashing
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    for name in hash_metrics:
+        hash_metrics[name] = 0
+
+
+def slow_hash(password: str) -> str:
+    time.sleep(0.2)
+    return f"hash:{password}"
+
+
+# oltre HASH_WORKERS + HASH_MAX_QUEUE richieste contemporanee le altre ricevono subito 503 (invece di accodarsi)
+def test_overload_is_rejected_with_503(monkeypatch):
+    monkeypatch.setattr(settings, "HASH_MAX_QUEUE", 1)
+    limit = settings.HASH_WORKERS + settings.HASH_MAX_QUEUE
+
+    async def storm():
+        return await asyncio.gather(*(run_hashing(slow_hash, str(i)) for i in range(limit + 5)), return_exceptions=True)
+
+    results = asyncio.run(storm())
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 5
+    assert all(r.status_code == 503 and r.headers["Retry-After"] == "1" for r in rejected)
+    assert hash_metrics == {"in_flight": 0, "completed": limit, "failed": 0, "rejected": 5}
+
+
+def test_failed_hashes_are_not_counted_as_completed():
+    def broken(password: str) -> str:
+        raise ValueError("hash non valido")
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_hashing(broken, "x"))
+
+    assert hash_metrics == {"in_flight": 0, "completed": 0, "failed": 1, "rejected": 0}
+
+
+# l'hash con parametri vecchi viene aggiornato al login
+def test_outdated_hash_is_rehashed():
+    old_hash = users.pwd_context.handler("argon2").using(time_cost=settings.ARGON2_TIME_COST + 1).hash("Password1!")
+
+    valid, new_hash = asyncio.run(users.verify_and_update_password("Password1!", old_hash))
+
+    assert valid and new_hash is not None
+    assert users.verify_password("Password1!", new_hash)
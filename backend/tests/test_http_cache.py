@@ -0,0 +1,72 @@
+from datetime import date, datetime, timezone
+from app.models.user_db import UserDB
+from app.models.travel_db import TravelDB
+from app.models.day_db import DayDB
+from tests.conftest import auth_headers
+
+
+def seed_travel(db):
+    user = UserDB(name="Mario", surname="Rossi", email="etag@example.com", password="x", experiences=[])
+    db.add(user)
+    db.flush()
+    travel = TravelDB(town="Italia", year=2024, start_date=date(2024, 5, 1), end_date=date(2024, 5, 20), user_id=user.id)
+    db.add(travel)
+    db.flush()
+    # abbastanza tappe perché la risposta superi COMPRESSION_MIN_SIZE
+    db.add_all([
+        DayDB(city="Roma", date=date(2024, 5, d), title=f"Tappa {d}", description="Passeggiata nel centro storico " * 3, experiences=[], photo=[], travel_id=travel.id)
+        for d in range(1, 15)
+    ])
+    db.commit()
+    return user, travel
+
+
+# lo stesso ETag (debole) accompagna la risposta compressa e quella non compressa
+def test_weak_etag_shared_by_all_encodings(client, db):
+    user, travel = seed_travel(db)
+    headers = auth_headers(user)
+
+    identity = client.get(f"/travels/{travel.id}", headers={**headers, "Accept-Encoding": "identity"})
+    gzipped = client.get(f"/travels/{travel.id}", headers={**headers, "Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.headers["etag"].startswith('W/"')
+    assert identity.headers["etag"] == gzipped.headers["etag"]
+
+
+def test_if_none_match_returns_304_for_any_encoding(client, db):
+    user, travel = seed_travel(db)
+    headers = auth_headers(user)
+    etag = client.get(f"/travels/{travel.id}", headers={**headers, "Accept-Encoding": "gzip"}).headers["etag"]
+
+    for accept_encoding in ("gzip", "identity"):
+        response = client.get(f"/travels/{travel.id}", headers={**headers, "Accept-Encoding": accept_encoding, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    # confronto debole: conta solo il valore tra virgolette
+    strong_form = etag.removeprefix("W/")
+    response = client.get(f"/travels/{travel.id}", headers={**headers, "If-None-Match": strong_form})
+    assert response.status_code == 304
+
+
+# un viaggio nuovo che riprende l'id di uno eliminato (SQLite riusa il rowid più alto) non ne eredita l'ETag
+def test_reused_id_gets_a_new_etag(client, db):
+    user, travel = seed_travel(db)
+    travel.updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.commit()
+    headers = auth_headers(user)
+    old_single = client.get(f"/travels/{travel.id}", headers=headers).headers["etag"]
+    old_list = client.get("/travels/", headers=headers).headers["etag"]
+
+    assert client.delete(f"/travels/{travel.id}", headers=headers).status_code == 200
+    body = {"town": "Francia", "year": 2024, "start_date": "2024-06-01", "end_date": "2024-06-03"}
+    created = client.post("/travels/", json=body, headers=headers).json()
+    assert created["id"] == travel.id
+
+    single = client.get(f"/travels/{travel.id}", headers={**headers, "If-None-Match": old_single})
+    listing = client.get("/travels/", headers={**headers, "If-None-Match": old_list})
+    assert single.status_code == 200
+    assert single.json()["town"] == "Francia"
+    assert listing.status_code == 200
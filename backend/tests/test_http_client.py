@@ -0,0 +1,54 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+
+# server HTTP locale che conta le connessioni TCP aperte dai client
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive: la connessione resta aperta tra una richiesta e l'altra
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+# il client creato nel lifespan riusa la stessa connessione per tutte le chiamate e viene chiuso allo spegnimento
+def test_shared_client_reuses_connection_and_closes_on_shutdown(stub_server):
+    with TestClient(main.app) as test_client:
+        http_client = main.app.state.http_client
+
+        async def call_stub(times: int) -> list[int]:
+            return [(await http_client.get(f"{stub_server}/search?q={i}")).status_code for i in range(times)]
+
+        statuses = test_client.portal.call(call_stub, 5)
+
+        assert statuses == [200] * 5
+        assert StubHandler.connections == 1
+        assert not http_client.is_closed
+
+    assert http_client.is_closed
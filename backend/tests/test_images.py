@@ -0,0 +1,32 @@
+import io
+from PIL import Image
+from app.utils.images import IMAGE_VARIANTS, resize_image
+
+
+def jpeg_with_exif(width: int, height: int) -> bytes:
+    exif = Image.Exif()
+    exif[0x010F] = "Fotocamera di prova" # produttore
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "orange").save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+# ogni variante rispetta il lato massimo previsto e non contiene i metadati EXIF dell'originale
+def test_variants_are_resized_without_exif():
+    variants = resize_image(jpeg_with_exif(3000, 2000), "WEBP", 80)
+
+    assert set(variants) == set(IMAGE_VARIANTS)
+    for name, data in variants.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert max(image.size) == IMAGE_VARIANTS[name]
+            assert not image.getexif()
+
+
+# le foto più piccole delle varianti non vengono ingrandite
+def test_small_photo_is_not_upscaled():
+    variants = resize_image(jpeg_with_exif(300, 200), "JPEG", 80)
+
+    for data in variants.values():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.size == (300, 200)
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+import pytest
+from app.utils.intent import OFF_TOPIC, get_classifier
+
+EVAL_PATH = Path(__file__).resolve().parent / "data" / "intent_eval.jsonl"
+
+
+def load_examples() -> list[dict]:
+    with open(EVAL_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# previsioni locali sul set di valutazione: solo quelle decise senza AI
+@pytest.fixture(scope="module")
+def decided():
+    classifier = get_classifier()
+    examples = load_examples()
+    predictions = [(classifier.predict(example["text"])[0], example["intent"]) for example in examples]
+    return examples, [(intent, expected) for intent, expected in predictions if intent is not None]
+
+
+# la maggior parte dei messaggi viene decisa in locale (risparmiando le chiamate all'AI)
+def test_coverage(decided):
+    examples, covered = decided
+    assert len(covered) / len(examples) >= 0.85
+
+
+# la scelta tra viaggi e fuori tema non deve mai sbagliare: un messaggio di viaggio rifiutato è l'errore peggiore
+def test_topic_accuracy(decided):
+    _, covered = decided
+    assert all((intent == OFF_TOPIC) == (expected == OFF_TOPIC) for intent, expected in covered)
+
+
+def test_intent_accuracy(decided):
+    _, covered = decided
+    correct = sum(intent == expected for intent, expected in covered)
+    assert correct / len(covered) >= 0.9
+
+
+# le risposte brevi senza parole note dipendono dalla conversazione: le decide l'AI
+def test_follow_up_without_known_words_goes_to_llm():
+    assert get_classifier().predict("sì, mi piace")[0] is None
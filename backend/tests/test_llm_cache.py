@@ -0,0 +1,61 @@
+import asyncio
+from app.utils.llm_cache import LLMCache, MemoryBackend
+
+
+# backend in memoria che registra le scritture
+class RecordingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__(max_entries=10)
+        self.writes = []
+
+    async def set(self, key: str, entry: dict, ttl: int):
+        self.writes.append(ttl)
+        await super().set(key, entry, ttl)
+
+
+def make_generate():
+    calls = []
+
+    async def generate(prompt: str) -> str:
+        calls.append(prompt)
+        return f"risposta {len(calls)}"
+
+    return generate, calls
+
+
+def test_hits_do_not_rewrite_or_extend_the_entry():
+    backend = RecordingBackend()
+    cache = LLMCache(backend, ttl=3600, variants=2)
+    generate, calls = make_generate()
+
+    async def scenario():
+        first = [await cache.get_or_generate("Cosa vedere a Roma?", generate) for _ in range(2)]
+        _, expires_at = backend.entries[next(iter(backend.entries))]
+        hits = [await cache.get_or_generate("Cosa vedere a  Roma?", generate) for _ in range(20)]
+        return first, hits, expires_at
+
+    first, hits, expires_at = asyncio.run(scenario())
+
+    assert first == ["risposta 1", "risposta 2"]
+    assert set(hits) <= set(first)
+    assert len(calls) == 2
+    assert len(backend.writes) == 2 # solo le due varianti generate
+    assert backend.entries[next(iter(backend.entries))][1] == expires_at
+
+
+def test_new_variant_keeps_the_first_expiry():
+    backend = RecordingBackend()
+    cache = LLMCache(backend, ttl=3600, variants=3)
+    generate, _ = make_generate()
+
+    async def scenario():
+        await cache.get_or_generate("Dove andare in Grecia?", generate)
+        key = next(iter(backend.entries))
+        entry, _ = backend.entries[key]
+        entry["expires_at"] -= 3000 # la prima risposta è di 50 minuti fa
+        await cache.get_or_generate("Dove andare in Grecia?", generate)
+
+    asyncio.run(scenario())
+
+    assert backend.writes[0] == 3600
+    assert backend.writes[1] <= 600
@@ -0,0 +1,47 @@
+from datetime import date
+import pytest
+from app.config import settings
+from app.models.user_db import UserDB
+from app.models.travel_db import TravelDB
+from app.models.day_db import DayDB
+from tests.conftest import auth_headers
+
+BBOX = "12.4,41.8,12.6,42.0"
+
+
+# due tappe nello stesso luogo (stesse coordinate dal geocoding) e una poco lontana
+@pytest.fixture
+def user(db):
+    user = UserDB(name="Mario", surname="Rossi", email="markers@example.com", password="x", experiences=[])
+    db.add(user)
+    db.flush()
+    travel = TravelDB(town="Italia", year=2024, start_date=date(2024, 5, 1), end_date=date(2024, 5, 3), user_id=user.id)
+    db.add(travel)
+    db.flush()
+    for day, (title, lat, lng) in enumerate([("Colosseo", 41.89, 12.49), ("Colosseo", 41.89, 12.49), ("Fori", 41.8925, 12.4853)], start=1):
+        db.add(DayDB(city="Roma", date=date(2024, 5, day), title=title, description="", experiences=[], photo=[], lat=lat, lng=lng, travel_id=travel.id))
+    db.commit()
+    return user
+
+
+def get_markers(client, user, zoom: int) -> list[dict]:
+    response = client.get("/days/markers", params={"bbox": BBOX, "zoom": zoom}, headers=auth_headers(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_low_zoom_groups_nearby_days(client, user):
+    markers = get_markers(client, user, 6)
+
+    assert [(marker["count"], marker["day"]) for marker in markers] == [(3, None)]
+
+
+# dallo zoom massimo ogni tappa è un marker, anche quelle con le stesse coordinate
+@pytest.mark.parametrize("offset", [0, 2])
+def test_max_zoom_returns_single_days(client, user, offset):
+    markers = get_markers(client, user, settings.MARKER_CLUSTER_MAX_ZOOM + offset)
+
+    assert [marker["count"] for marker in markers] == [1, 1, 1]
+    assert [marker["day"]["title"] for marker in markers] == ["Colosseo", "Colosseo", "Fori"]
+    assert markers[0]["day"]["date"] == "2024-05-01"
+    assert (markers[0]["lat"], markers[0]["lng"]) == (markers[1]["lat"], markers[1]["lng"])
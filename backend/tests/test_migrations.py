@@ -0,0 +1,108 @@
+import os
+from datetime import date
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from tests.conftest import BACKEND_DIR, TEST_DIR
+
+
+# database di prova separato da quello delle altre prove, migrato fino alla revisione richiesta
+@pytest.fixture
+def connection():
+    path = os.path.join(TEST_DIR, "migrations.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def migrate(connection, action, *revision: str):
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["connection"] = connection
+    action(config, *revision)
+    connection.commit()
+
+
+# dati nel formato dello schema iniziale (travelapp.sql): date come testo e messaggi nella colonna JSON
+def insert_legacy_data(connection):
+    connection.execute(text(
+        "INSERT INTO users (id, name, surname, email, password) VALUES (1, 'Mario', 'Rossi', 'mario@example.com', 'x')"
+    ))
+    connection.execute(text(
+        "INSERT INTO travels (id, town, year, start_date, end_date, general_vote, votes, user_id) VALUES "
+        "(1, 'Italia', 2024, '03-05-2024', '2024-05-10', 4, '{\"cibo\": 5, \"prezzo\": \"n/d\"}', 1), "
+        "(2, 'Francia', 2023, 'maggio', '', NULL, NULL, 1)"
+    ))
+    connection.execute(text(
+        "INSERT INTO days (id, city, date, title, lat, lng, travel_id) VALUES "
+        "(1, 'Roma', '04-05-2024', 'Colosseo', 41.89, 12.49, 1), "
+        "(2, 'Napoli', '2024-05-06', 'Vesuvio', NULL, NULL, 1), "
+        "(3, 'Parigi', '??', 'Louvre', NULL, NULL, 2)"
+    ))
+    connection.execute(text(
+        "INSERT INTO chats (id, title, messages, user_id) VALUES "
+        "(1, 'Roma', '[{\"user\": \"Ciao\", \"ai\": \"Ciao!\"}, {\"user\": \"Cosa vedo?\", \"ai\": \"Il Colosseo\\ne i Fori\"}]', 1), "
+        "(2, 'Vuota', NULL, 1)"
+    ))
+    connection.commit()
+
+
+def test_upgrade_moves_legacy_data(connection):
+    migrate(connection, command.upgrade, "0001")
+    insert_legacy_data(connection)
+    migrate(connection, command.upgrade, "head")
+
+    # messaggi copiati in ordine, anteprima dall'ultima risposta, colonna JSON eliminata
+    messages = connection.execute(text("SELECT chat_id, user_message, ai_message FROM chat_messages ORDER BY id")).all()
+    assert messages == [(1, "Ciao", "Ciao!"), (1, "Cosa vedo?", "Il Colosseo\ne i Fori")]
+    assert connection.execute(text("SELECT preview FROM chats ORDER BY id")).scalars().all() == ["Il Colosseo e i Fori", None]
+    assert "messages" not in {column["name"] for column in inspect(connection).get_columns("chats")}
+
+    # date lette nei due formati; quelle non leggibili prendono l'anno del viaggio o l'inizio del viaggio
+    travels = connection.execute(text("SELECT start_date, end_date FROM travels ORDER BY id")).all()
+    assert travels == [("2024-05-03", "2024-05-10"), ("2023-01-01", "2023-01-01")]
+    days = connection.execute(text("SELECT date, geocode_pending FROM days ORDER BY id")).all()
+    assert days == [("2024-05-04", 0), ("2024-05-06", 1), ("2023-01-01", 1)]
+
+    # statistiche calcolate per i viaggi esistenti
+    stats = connection.execute(text(
+        "SELECT dimension, label, trips, days, vote_count, category_votes FROM travel_stats ORDER BY dimension, label"
+    )).all()
+    assert stats == [
+        ("country", "Francia", 1, 1, 0, "{}"),
+        ("country", "Italia", 1, 2, 1, '{"cibo": [5.0, 1]}'),
+        ("year", "2023", 1, 1, 0, "{}"),
+        ("year", "2024", 1, 2, 1, '{"cibo": [5.0, 1]}'),
+    ]
+
+    # l'email unica di travelapp.sql diventa l'indice dei modelli
+    indexes = {index["name"]: index["unique"] for index in inspect(connection).get_indexes("users")}
+    assert indexes["ix_users_email"] == 1
+    assert inspect(connection).get_unique_constraints("users") == []
+
+
+# il database migrato corrisponde ai modelli
+def test_head_matches_models(connection):
+    migrate(connection, command.upgrade, "head")
+    migrate(connection, command.check)
+
+
+# tornando allo schema iniziale i dati riprendono il vecchio formato
+def test_downgrade_restores_legacy_format(connection):
+    migrate(connection, command.upgrade, "0001")
+    insert_legacy_data(connection)
+    migrate(connection, command.upgrade, "head")
+    migrate(connection, command.downgrade, "0001")
+
+    assert set(inspect(connection).get_table_names()) >= {"users", "travels", "days", "chats"}
+    assert not {"chat_messages", "travel_stats", "geocode_cache"} & set(inspect(connection).get_table_names())
+    messages = connection.execute(text("SELECT messages FROM chats WHERE id = 1")).scalar_one()
+    assert messages == '[{"user": "Ciao", "ai": "Ciao!"}, {"user": "Cosa vedo?", "ai": "Il Colosseo\\ne i Fori"}]'
+    assert connection.execute(text("SELECT start_date FROM travels WHERE id = 1")).scalar_one() == date(2024, 5, 3).isoformat()
+
+    migrate(connection, command.upgrade, "head")
+    assert connection.execute(text("SELECT COUNT(*) FROM chat_messages")).scalar_one() == 2
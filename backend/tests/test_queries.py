@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app.database import async_engine
+from app.models.user_db import UserDB
+from app.models.travel_db import TravelDB
+from app.models.day_db import DayDB
+from tests.conftest import auth_headers
+
+
+# conta le query SQL eseguite dall'app nel blocco
+@contextmanager
+def count_statements():
+    counter = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        yield counter
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+# un utente con `travels` viaggi, ognuno con due tappe
+def seed_user(db, email: str, travels: int) -> UserDB:
+    user = UserDB(name="Mario", surname="Rossi", email=email, password="x", experiences=[])
+    db.add(user)
+    db.flush()
+    for i in range(travels):
+        travel = TravelDB(town=f"Paese {i}", year=2000 + i % 20, start_date=date(2000 + i % 20, 5, 1), end_date=date(2000 + i % 20, 5, 3), user_id=user.id)
+        db.add(travel)
+        db.flush()
+        db.add_all([DayDB(city="Città", date=date(2000 + i % 20, 5, d), title=f"Tappa {d}", description="", experiences=[], photo=[], travel_id=travel.id) for d in (1, 2)])
+    db.commit()
+    return user
+
+
+def statements_for(client, url: str, headers: dict | None = None) -> int:
+    with count_statements() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return counter[0]
+
+
+# le query di GET /travels e GET /users non devono crescere con il numero di viaggi e tappe (niente N+1)
+@pytest.mark.parametrize("url", ["/travels/", "/users/", "/users/{user_id}"])
+def test_statement_count_does_not_grow_with_travels(client, db, url):
+    small = seed_user(db, "small@example.com", 2)
+    large = seed_user(db, "large@example.com", 200)
+
+    few = statements_for(client, url.format(user_id=small.id), auth_headers(small))
+    many = statements_for(client, url.format(user_id=large.id), auth_headers(large))
+
+    assert many == few
+    assert few <= 4
+
+
+def test_travels_response_contains_all_days(client, db):
+    user = seed_user(db, "days@example.com", 200)
+
+    travels = client.get("/travels/", headers=auth_headers(user)).json()
+
+    assert len(travels) == 200
+    assert all(len(travel["days"]) == 2 for travel in travels)
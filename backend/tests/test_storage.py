@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.config import settings
+from app.utils import storage
+from app.utils.storage import MemoryStorage, storage_metrics, upload_bytes, read_upload
+
+
+# backend in memoria lento, per avere caricamenti che si sovrappongono
+class SlowMemoryStorage(MemoryStorage):
+    async def save(self, chunks, extension):
+        await asyncio.sleep(0.01)
+        return await super().save(chunks, extension)
+
+
+@pytest.fixture
+def slow_storage(monkeypatch):
+    backend = SlowMemoryStorage()
+    monkeypatch.setattr(storage, "storage", backend)
+    monkeypatch.setattr(storage, "upload_semaphore", asyncio.Semaphore(settings.UPLOAD_CONCURRENCY))
+    monkeypatch.setitem(storage_metrics, "peak_in_flight", 0)
+    return backend
+
+
+# tanti caricamenti insieme: al backend ne arrivano al massimo UPLOAD_CONCURRENCY alla volta
+def test_concurrent_uploads_are_bounded(slow_storage):
+    data = bytes(3 * settings.UPLOAD_CHUNK_SIZE + 10) # più chunk per file
+
+    async def storm():
+        return await asyncio.gather(*(upload_bytes(data, ".bin") for _ in range(20)))
+
+    urls = asyncio.run(storm())
+
+    assert len(set(urls)) == 20
+    assert all(content == data for content in slow_storage.files.values())
+    assert storage_metrics["peak_in_flight"] == settings.UPLOAD_CONCURRENCY
+
+
+class FakeUpload:
+    def __init__(self, size: int):
+        self.remaining = size
+
+    async def read(self, size: int) -> bytes:
+        chunk = min(size, self.remaining)
+        self.remaining -= chunk
+        return bytes(chunk)
+
+
+def test_oversized_upload_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(read_upload(FakeUpload(4096)))
+
+    assert error.value.status_code == 413
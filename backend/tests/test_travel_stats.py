@@ -0,0 +1,96 @@
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models.user_db import UserDB
+from app.models.travel_stats_db import TravelStatsDB
+from app.utils.travel_stats import apply_travel_stats, rebuild_travel_stats
+from tests.conftest import auth_headers
+
+
+@pytest.fixture
+def user(db):
+    user = UserDB(name="Mario", surname="Rossi", email="stats@example.com", password="x", experiences=[])
+    db.add(user)
+    db.commit()
+    return user
+
+
+def stats_rows(db, user_id: int) -> dict:
+    rows = db.execute(select(TravelStatsDB).filter(TravelStatsDB.user_id == user_id)).scalars().all()
+    return {(row.dimension, row.label): (row.trips, row.days, row.vote_count) for row in rows}
+
+
+# due richieste aggiungono insieme il primo viaggio dello stesso anno e paese: nessun errore e nessun conteggio perso
+def test_concurrent_first_inserts(db, user):
+    contribution = {"trips": 1, "days": 0, "general_vote": 4.0, "votes": {"cibo": 5.0}}
+
+    async def add_travel(session_factory, started: asyncio.Barrier):
+        async with session_factory() as session:
+            await started.wait() # le due richieste partono insieme, prima che esista la riga
+            await apply_travel_stats(session, user.id, 2024, "Italia", contribution)
+            await session.commit()
+
+    async def scenario():
+        engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        started = asyncio.Barrier(2)
+        try:
+            return await asyncio.gather(add_travel(session_factory, started), add_travel(session_factory, started), return_exceptions=True)
+        finally:
+            await engine.dispose()
+
+    results = asyncio.run(scenario())
+
+    assert results == [None, None]
+    assert stats_rows(db, user.id) == {("year", "2024"): (2, 0, 2), ("country", "Italia"): (2, 0, 2)}
+
+
+def test_stats_follow_travel_changes(client, db, user):
+    headers = auth_headers(user)
+    body = {"town": "Italia", "year": 2024, "start_date": "2024-05-01", "end_date": "2024-05-03", "general_vote": 4}
+    first = client.post("/travels/", json=body, headers=headers).json()
+    client.post("/travels/", json={**body, "general_vote": 2}, headers=headers)
+
+    client.put(f"/travels/{first['id']}", json={**body, "town": "Francia", "year": 2023}, headers=headers)
+    stats = client.get("/travels/stats", headers=headers).json()
+
+    assert stats["trips"] == 2
+    assert {row["town"]: row["trips"] for row in stats["countries"]} == {"Italia": 1, "Francia": 1}
+    assert [row["year"] for row in stats["per_year"]] == [2024, 2023]
+    assert stats["average_vote"] == 3.0
+
+    client.delete(f"/travels/{first['id']}", headers=headers)
+    assert stats_rows(db, user.id) == {("year", "2024"): (1, 0, 1), ("country", "Italia"): (1, 0, 1)}
+
+
+# il ricalcolo da zero riproduce le righe tenute aggiornate dalle rotte (tappe e voti delle categorie compresi)
+def test_rebuild_matches_incremental_stats(client, db, user):
+    headers = auth_headers(user)
+    body = {"town": "Italia", "year": 2024, "start_date": "2024-05-01", "end_date": "2024-05-03", "general_vote": 4, "votes": {"cibo": 5}}
+    first = client.post("/travels/", json=body, headers=headers).json()
+    client.post("/travels/", json={**body, "year": 2023, "general_vote": None, "votes": {}}, headers=headers)
+    client.post("/travels/", json={**body, "town": "Francia"}, headers=headers)
+    day = {"city": "Roma", "date": "2024-05-02", "title": "Roma", "description": "Colosseo"}
+    assert client.post(f"/travels/{first['id']}/days", data=day, headers=headers).status_code == 200
+
+    def all_rows():
+        rows = db.execute(select(TravelStatsDB).filter(TravelStatsDB.user_id == user.id)).scalars().all()
+        return {(row.dimension, row.label): (row.trips, row.days, row.vote_sum, row.vote_count, row.category_votes) for row in rows}
+
+    incremental = all_rows()
+
+    async def rebuild():
+        engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+        try:
+            async with AsyncSession(engine) as session:
+                return await rebuild_travel_stats(session)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(rebuild()) == 3
+    db.expire_all()
+    assert all_rows() == incremental
+    assert incremental[("year", "2024")] == (2, 1, 8.0, 2, {"cibo": [10.0, 2]})
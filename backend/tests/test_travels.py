@@ -0,0 +1,76 @@
+from datetime import date
+import pytest
+from app.models.user_db import UserDB
+from app.models.travel_db import TravelDB
+from tests.conftest import auth_headers
+
+
+# viaggi con molte date uguali: la paginazione deve distinguerli per id
+@pytest.fixture
+def user(db):
+    user = UserDB(name="Mario", surname="Rossi", email="pages@example.com", password="x", experiences=[])
+    other = UserDB(name="Anna", surname="Bianchi", email="other@example.com", password="x", experiences=[])
+    db.add_all([user, other])
+    db.flush()
+    starts = [date(2024, 5, 1)] * 4 + [date(2024, 3, 1)] * 3 + [date(2023, 8, 1)] * 3 + [date(2022, 1, 1)]
+    for start in starts:
+        db.add(TravelDB(town="Italia", year=start.year, start_date=start, end_date=start, user_id=user.id))
+    db.add(TravelDB(town="Francia", year=2024, start_date=date(2024, 5, 1), end_date=date(2024, 5, 1), user_id=other.id))
+    db.commit()
+    return user
+
+
+# percorre tutte le pagine seguendo l'header X-Next-Cursor
+def walk_pages(client, user, **params) -> list[list[dict]]:
+    pages, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/travels/", params=query, headers=auth_headers(user))
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def order_key(travel: dict):
+    return travel["year"], travel["start_date"], travel["id"]
+
+
+def test_pages_cover_every_travel_once_in_order(client, user):
+    everything = client.get("/travels/", headers=auth_headers(user)).json()
+    pages = walk_pages(client, user, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+    walked = [travel for page in pages for travel in page]
+    assert walked == everything
+    assert len({travel["id"] for travel in walked}) == 11
+    assert [order_key(travel) for travel in walked] == sorted((order_key(travel) for travel in walked), reverse=True)
+
+
+def test_year_filter_pages(client, user):
+    pages = walk_pages(client, user, year=2024, limit=5)
+
+    assert [len(page) for page in pages] == [5, 2]
+    assert {travel["year"] for page in pages for travel in page} == {2024}
+
+
+# l'ultima pagina piena non restituisce un cursore verso una pagina vuota
+def test_exact_last_page_has_no_cursor(client, user):
+    response = client.get("/travels/", params={"year": 2023, "limit": 3}, headers=auth_headers(user))
+
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("cursor", ["non-un-cursore", "WzIwMjRd", "WzIwMjQsICJpZXJpIiwgMV0="])
+def test_invalid_cursor_is_rejected(client, user, cursor):
+    response = client.get("/travels/", params={"cursor": cursor, "limit": 3}, headers=auth_headers(user))
+
+    assert response.status_code == 400
+
+
+def test_years_are_distinct_and_descending(client, user):
+    response = client.get("/travels/years", headers=auth_headers(user))
+
+    assert response.json() == [2024, 2023, 2022]
@@ -1,44 +1,93 @@
+-- Schema di riferimento del database (MySQL)
+-- le tabelle si creano e si aggiornano con le migrazioni di Alembic (alembic upgrade head), non con questo file
+-- corrisponde all'ultima revisione (0012): un database creato da qui va segnato con "alembic stamp head"
+
 CREATE TABLE users (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     surname VARCHAR(255) NOT NULL,
-    email VARCHAR(255) UNIQUE NOT NULL,
+    email VARCHAR(255) NOT NULL,
     password VARCHAR(255) NOT NULL,
     experiences JSON,
     photo VARCHAR(255),
-    registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX ix_users_email (email)
 );
 
 CREATE TABLE travels (
     id INT AUTO_INCREMENT PRIMARY KEY,
     town VARCHAR(255) NOT NULL,
     year INT NOT NULL,
-    start_date VARCHAR(255) NOT NULL,
-    end_date VARCHAR(255) NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
     general_vote FLOAT,
     votes JSON,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 1,
     user_id INT NOT NULL,
+    INDEX ix_travels_user_id_year_start_date (user_id, year, start_date),
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
 CREATE TABLE days (
     id INT AUTO_INCREMENT PRIMARY KEY,
     city VARCHAR(255) NOT NULL,
-    date VARCHAR(255) NOT NULL,
+    date DATE NOT NULL,
     title VARCHAR(255) NOT NULL,
     description TEXT,
     experiences JSON,
     photo JSON,
+    photo_variants JSON,
     lat FLOAT,
     lng FLOAT,
+    geocode_pending BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 1,
     travel_id INT NOT NULL,
+    INDEX ix_days_geocode_pending (geocode_pending),
+    INDEX ix_days_travel_id_lat_lng (travel_id, lat, lng),
     FOREIGN KEY (travel_id) REFERENCES travels(id) ON DELETE CASCADE
 );
 
 CREATE TABLE chats (
     id INT AUTO_INCREMENT PRIMARY KEY,
     title VARCHAR(255) NOT NULL,
-    messages JSON,
+    preview VARCHAR(255),
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 1,
+    summary TEXT,
+    summary_until INT,
+    user_id INT NOT NULL,
+    INDEX ix_chats_user_id_updated_at_id (user_id, updated_at, id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE chat_messages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    chat_id INT NOT NULL,
+    user_message TEXT NOT NULL,
+    ai_message TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_chat_messages_chat_id_id (chat_id, id),
+    FOREIGN KEY (chat_id) REFERENCES chats(id) ON DELETE CASCADE
+);
+
+CREATE TABLE travel_stats (
     user_id INT NOT NULL,
+    dimension VARCHAR(16) NOT NULL,
+    label VARCHAR(255) NOT NULL,
+    trips INT NOT NULL DEFAULT 0,
+    days INT NOT NULL DEFAULT 0,
+    vote_sum FLOAT NOT NULL DEFAULT 0,
+    vote_count INT NOT NULL DEFAULT 0,
+    category_votes JSON,
+    PRIMARY KEY (user_id, dimension, label),
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
+
+CREATE TABLE geocode_cache (
+    query VARCHAR(255) PRIMARY KEY,
+    lat FLOAT,
+    lng FLOAT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -61,6 +61,12 @@ function Header() {
 
   // funzione di Logout
   const handleLogout = () => {
+    // revoco il token anche sul server (senza attendere la risposta)
+    fetch("http://127.0.0.1:8000/users/logout", {
+      method: "POST",
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+    }).catch(() => {});
+
     // rimuovo il token e l'id utente dal LocalStorage
     localStorage.removeItem("token");
     localStorage.removeItem("userId");
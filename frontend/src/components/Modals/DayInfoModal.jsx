@@ -2,6 +2,7 @@ import { useState, useRef, useEffect } from "react";
 import { motion, AnimatePresence } from "framer-motion";
 import { FaArrowLeft, FaMapMarkerAlt, FaTimes } from "react-icons/fa";
 import WorldMap from "../WorldMap";
+import { formatDate } from "../../utils/dates"; // mostro le date ISO come DD-MM-YYYY
 
 function DayInfoModal({ selectedDay, onClose, travelDays }) {
   const [openImage, setOpenImage] = useState(null); // stato per Modale Immagine
@@ -73,7 +74,7 @@ function DayInfoModal({ selectedDay, onClose, travelDays }) {
               <h1 className="text-3xl font-extrabold text-white mb-2 drop-shadow-lg">
                {selectedDay.title}
               </h1>
-              <p className="text-2xl font-bold text-cyan-200/80 mb-4">{selectedDay.date}</p>
+              <p className="text-2xl font-bold text-cyan-200/80 mb-4">{formatDate(selectedDay.date)}</p>
               <p className="text-white text-justify font-bold leading-relaxed mb-6">{selectedDay.description}</p>
 
               {/* Esperienze */}
@@ -106,10 +107,10 @@ function DayInfoModal({ selectedDay, onClose, travelDays }) {
                   {selectedDay.photo.map((p, i) => (
                     <motion.img
                       key={i}
-                      src={p}
+                      src={selectedDay.photo_variants?.[i]?.thumb || p} // anteprima nella griglia
                       alt="foto viaggio"
                       loading="lazy"
-                      onClick={() => setOpenImage(p)}
+                      onClick={() => setOpenImage(selectedDay.photo_variants?.[i]?.full || p)}
                       className="w-full h-40 sm:h-40 object-cover rounded-3xl border-3 border-white/40 shadow-sm cursor-pointer
                        hover:border-white"
                       variants={{
@@ -1,7 +1,7 @@
 import { AnimatePresence, motion } from "framer-motion";
 import { FaArrowLeft, FaPlus, FaTrash } from "react-icons/fa";
 
-function ChatListModal({ isOpen, onClose, chats, loadChat, startNewChat, setDeleteId, }) {
+function ChatListModal({ isOpen, onClose, chats, hasMore, loadMore, loadChat, startNewChat, setDeleteId, }) {
     return (
         <AnimatePresence>
             {isOpen && (
@@ -76,6 +76,11 @@ function ChatListModal({ isOpen, onClose, chats, loadChat, startNewChat, setDele
                                         <div className="truncate font-medium">
                                             {chat.title || `Chat #${chat.id}`}
                                         </div>
+                                        {chat.preview && (
+                                            <div className="truncate text-sm text-white/60">
+                                                {chat.preview}
+                                            </div>
+                                        )}
                                     </button>
 
                                     <button
@@ -89,6 +94,14 @@ function ChatListModal({ isOpen, onClose, chats, loadChat, startNewChat, setDele
                                     </button>
                                 </div>
                             ))}
+
+                            {hasMore && (
+                                <button
+                                    onClick={loadMore}
+                                    className="w-full mt-2 px-4 py-2 rounded-xl text-white hover:bg-white/10 cursor-pointer transition">
+                                    Carica altre chat
+                                </button>
+                            )}
                         </div>
                     </motion.div>
                 </>
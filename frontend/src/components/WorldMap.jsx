@@ -1,6 +1,7 @@
 import React, { useEffect, useState, useRef } from "react";
-import { MapContainer, TileLayer, GeoJSON, Marker, Popup, useMap } from "react-leaflet";
+import { MapContainer, TileLayer, GeoJSON, Marker, Popup, useMap, useMapEvents } from "react-leaflet";
 import L from "leaflet";
+import { formatDate } from "../utils/dates"; // mostro le date ISO come DD-MM-YYYY
 
 const customIcon = new L.Icon({
     iconUrl: "https://unpkg.com/leaflet@1.7.1/dist/images/marker-icon.png", //  icona standard di Leaflet
@@ -40,8 +41,84 @@ function FlyToSelected({ selectedDay, lastFlyRef }) {
 }
 
 
+//  icona per un gruppo di tappe vicine, con il numero di tappe
+function clusterIcon(count) {
+    const size = count < 10 ? 32 : count < 100 ? 40 : 48; //  gruppi più grandi per più tappe
+    return L.divIcon({
+        html: `<span>${count}</span>`,
+        className: "flex items-center justify-center rounded-full bg-orange-500/80 border-2 border-white text-white font-bold shadow-lg",
+        iconSize: [size, size],
+    });
+}
+
+
+//  Marker raggruppati dal backend: a ogni spostamento o zoom chiede solo le tappe dell'area visibile
+function ServerMarkers({ travelId = null }) {
+    const [clusters, setClusters] = useState([]); //  gruppi di tappe restituiti dal backend
+    const requestRef = useRef(null); //  per annullare la richiesta precedente
+
+    const loadMarkers = (map) => {
+        const token = localStorage.getItem("token");
+        if (!token) return;
+
+        requestRef.current?.abort(); //  la vista precedente non serve più
+        const controller = new AbortController();
+        requestRef.current = controller;
+
+        const params = new URLSearchParams({
+            bbox: map.getBounds().toBBoxString(), //  "ovest,sud,est,nord"
+            zoom: map.getZoom(),
+        });
+        if (travelId) params.set("travel_id", travelId);
+
+        fetch(`http://127.0.0.1:8000/days/markers?${params}`, {
+            headers: { Authorization: `Bearer ${token}` },
+            signal: controller.signal,
+        })
+            .then((res) => (res.ok ? res.json() : []))
+            .then((data) => setClusters(data))
+            .catch((err) => {
+                if (err.name !== "AbortError") console.error("Errore nel caricamento dei marker:", err);
+            });
+    };
+
+    const map = useMapEvents({
+        moveend: () => loadMarkers(map), //  anche dopo lo zoom
+    });
+
+    useEffect(() => {
+        loadMarkers(map); //  primo caricamento
+        return () => requestRef.current?.abort();
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [map, travelId]);
+
+    return clusters.map((cluster) =>
+        cluster.day ? (
+            <Marker key={`day-${cluster.day.id}`} position={[cluster.lat, cluster.lng]} icon={customIcon}>
+                <Popup>
+                    <div style={{ minWidth: "200px" }}>
+                        <h3 className="font-bold text-lg">{cluster.day.title}</h3>
+                        <p className="text-sm text-gray-600">📅 {formatDate(cluster.day.date)}</p>
+                    </div>
+                </Popup>
+            </Marker>
+        ) : (
+            <Marker
+                key={`cluster-${cluster.lat}-${cluster.lng}`}
+                position={[cluster.lat, cluster.lng]}
+                icon={clusterIcon(cluster.count)}
+                eventHandlers={{
+                    click: () => map.flyTo([cluster.lat, cluster.lng], Math.min(map.getZoom() + 2, map.getMaxZoom())), //  zoom sul gruppo
+                }}
+            />
+        )
+    );
+}
+
+
 //  Componente principale mappa
-function WorldMap({ days = [], selectedDay = null, mapRef, isModal = false }) {
+//  con serverMarkers le tappe non vengono passate dal genitore ma lette dal backend, già raggruppate
+function WorldMap({ days = [], selectedDay = null, mapRef, isModal = false, serverMarkers = false, travelId = null }) {
     const [geoData, setGeoData] = useState(null); //  dati GeoJSON per i confini dei paesi
     const lastFlyRef = useRef(null); //  per evitare doppi flyTo
 
@@ -105,7 +182,9 @@ function WorldMap({ days = [], selectedDay = null, mapRef, isModal = false }) {
                 )}
 
                 {/* Marker per i giorni */}
-                {selectedDay ? (
+                {serverMarkers ? (
+                    <ServerMarkers travelId={travelId} />
+                ) : selectedDay ? (
                     <Marker
                         key={selectedDay.id} //  chiave unica per il marker
                         position={[Number(selectedDay.lat), Number(selectedDay.lng)]} //  posizione del marker
@@ -115,7 +194,7 @@ function WorldMap({ days = [], selectedDay = null, mapRef, isModal = false }) {
                         <Popup>
                             <div style={{ minWidth: "200px" }}>
                                 <h3 className="font-bold text-lg">{selectedDay.title}</h3>
-                                <p className="text-sm text-gray-600">📅 {selectedDay.date}</p>
+                                <p className="text-sm text-gray-600">📅 {formatDate(selectedDay.date)}</p>
                             </div>
                         </Popup>
                     </Marker>
@@ -131,7 +210,7 @@ function WorldMap({ days = [], selectedDay = null, mapRef, isModal = false }) {
                             <Popup>
                                 <div style={{ minWidth: "200px" }}>
                                     <h3 className="font-bold text-lg">{day.title}</h3>
-                                    <p className="text-sm text-gray-600">📅 {day.date}</p>
+                                    <p className="text-sm text-gray-600">📅 {formatDate(day.date)}</p>
                                 </div>
                             </Popup>
                         </Marker>
@@ -10,6 +10,7 @@ function ChatAIController() {
     const [hasStartedChat, setHasStartedChat] = useState(false); // stato per iniziare una chat
     const [currentChatId, setCurrentChatId] = useState(null); // stato per l'ID della chat corrente
     const [chats, setChats] = useState([]); // stato per caricare le chat
+    const [nextChatsCursor, setNextChatsCursor] = useState(null); // cursore della pagina successiva della lista chat
     const [currentChatTitle, setCurrentChatTitle] = useState(""); // stato per il titolo della chat
     const [deleteId, setDeleteId] = useState(null); // stato per l'id della chat da eliminare
     const [message, setMessage] = useState(""); // messaggio di successo o errore
@@ -31,8 +32,8 @@ function ChatAIController() {
     }, []); // esegui solo al montaggio
 
 
-    // uso lo useEffect per ottenere i dati delle chat
-    useEffect(() => {
+    // funzione per caricare una pagina della lista delle chat (senza messaggi)
+    const loadChats = (cursor = null) => {
         const token = localStorage.getItem("token"); // recupera il token JWT
         if (!token) return; // se non c'è token, non faccio nulla
 
@@ -40,9 +41,24 @@ function ChatAIController() {
             headers: {
                 Authorization: `Bearer ${token}`, //  token nell'header
             },
+            params: cursor ? { cursor } : {}, // pagina successiva
         })
-            .then((res) => setChats(res.data)) // aggiorna lo stato con i dati ricevuti
+            .then((res) => {
+                // aggiorna lo stato con i dati ricevuti (le pagine successive vengono aggiunte in fondo)
+                setChats((prev) => (cursor ? [...prev, ...res.data] : res.data));
+                setNextChatsCursor(res.headers["x-next-cursor"] || null);
+            })
             .catch((err) => console.error(err)); // gestisce errori
+    };
+
+    // funzione per caricare le chat successive
+    const loadMoreChats = () => {
+        if (nextChatsCursor) loadChats(nextChatsCursor);
+    };
+
+    // uso lo useEffect per ottenere la prima pagina delle chat
+    useEffect(() => {
+        loadChats();
     }, []);
 
 
@@ -75,7 +91,7 @@ function ChatAIController() {
 
         try {
             const token = localStorage.getItem("token"); // ottengo il token di autenticazione
-            const res = await fetch(`http://127.0.0.1:8000/chats`, { // richiesta al backend per la risposta AI
+            const res = await fetch(`http://127.0.0.1:8000/chats/stream`, { // richiesta al backend per la risposta AI in streaming (SSE)
                 method: "POST", //  metodo POST
                 headers: {
                     "Content-Type": "application/json",
@@ -83,22 +99,48 @@ function ChatAIController() {
                 },
                 body: JSON.stringify({ message: input, mode: "chat", chat_id: currentChatId }), // corpo della richiesta
             });
-
-            const data = await res.json(); // analizza la risposta JSON
-
-            // Se il backend manda un nuovo chat_id (fallback)
-            if (data.chat_id && !currentChatId) { // se non c'è ancora un chat_id
-                setCurrentChatId(data.chat_id); // impostalo dallo stato
+            if (!res.ok || !res.body) throw new Error("Risposta non valida");
+
+            const reader = res.body.getReader(); // leggo la risposta man mano che arriva
+            const decoder = new TextDecoder();
+            let buffer = ""; // eventi SSE non ancora completi
+            let text = "";   // testo della risposta ricevuto finora
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // ogni evento SSE termina con una riga vuota
+                const events = buffer.split("\n\n");
+                buffer = events.pop();
+
+                for (const raw of events) {
+                    let event = "message";
+                    let data = "";
+                    raw.split("\n").forEach((line) => {
+                        if (line.startsWith("event: ")) event = line.slice(7);
+                        else if (line.startsWith("data: ")) data += line.slice(6);
+                    });
+                    if (!data) continue;
+                    const payload = JSON.parse(data);
+
+                    if (event === "meta") {
+                        // Se il backend manda un nuovo chat_id (fallback)
+                        if (payload.chat_id && !currentChatId) setCurrentChatId(payload.chat_id);
+                    } else if (event === "error") {
+                        throw new Error(payload.detail);
+                    } else if (event === "message") {
+                        // al primo pezzo creo il messaggio AI, poi lo aggiorno man mano
+                        const first = text === "";
+                        text += payload.delta;
+                        setIsLoading(false);
+                        setMessages((prev) => first
+                            ? [...prev, { role: "ai", text }]
+                            : [...prev.slice(0, -1), { role: "ai", text }]);
+                    }
+                }
             }
-            const clean = data.response // pulisci il testo della risposta
-                .replace(/\*\*/g, "")
-                .replace(/\*/g, "")
-                .replace(/\n{2,}/g, "\n")
-                .trim();
-
-            const aiMessage = { role: "ai", text: clean }; // crea il messaggio AI
-            setMessages((prev) => [...prev, aiMessage]); // aggiungi il messaggio AI alla lista
-            setApplyTypewriter(true); // abilito l'effetto macchina da scrivere solo per i nuovi messaggi
         } catch (err) {
             setMessages((prev) => [ // aggiungi un messaggio di errore in caso di fallimento
                 ...prev, // mantieni i messaggi precedenti
@@ -350,6 +392,8 @@ function ChatAIController() {
         startNewChat,         // funzione per iniziare una nuova chat
         chats,                // indica le chat caricate
         setChats,             // stato per caricare le chat
+        loadMoreChats,        // funzione per caricare le chat successive
+        hasMoreChats: Boolean(nextChatsCursor), // indica se ci sono altre chat da caricare
         loadChat,             // funzione per caricare le chat
         currentChatTitle,     // titolo della chat
         message,              // messaggio di conferma o errore
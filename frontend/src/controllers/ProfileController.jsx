@@ -6,6 +6,7 @@ import { FaStar } from "react-icons/fa";
 function ProfileController() {
     const [user, setUser] = useState(null); // stato per i dati utente
     const [recentTravels, setRecentTravels] = useState([]) // stato per i viaggi recenti
+    const [travelStats, setTravelStats] = useState(null); // stato per le statistiche dei viaggi
     const [deleteProfileId, setDeleteProfileId] = useState(null); //  stato per il modale di conferma eliminazione profilo (Apri / Chiudi)
     const [message, setMessage] = useState(""); // stato per i messaggi di errore/successo
     const [showEditModal, setShowEditModal] = useState(false); // stato per mostrare/nascondere il modale di modifica
@@ -23,23 +24,31 @@ function ProfileController() {
             .catch((err) => console.error(err)); // gestisce errori
     }, []);
 
-    // uso lo useEffect per ottenere i dati dei viaggi
+    // uso lo useEffect per ottenere l'ultimo viaggio e le statistiche (calcolate dal backend)
     useEffect(() => {
         const token = localStorage.getItem("token"); // recupera il token JWT
         if (!token) return; // se non c'è token, non faccio nulla
+        const headers = { Authorization: `Bearer ${token}` }; //  token nell'header
 
         axios
-            .get("http://127.0.0.1:8000/travels", {
-                headers: {
-                    Authorization: `Bearer ${token}`, //  token nell'header
-                },
-            })
+            .get("http://127.0.0.1:8000/travels?limit=1", { headers }) // serve solo il viaggio più recente
             .then((res) => setRecentTravels(res.data)) // aggiorna lo stato con i dati ricevuti
             .catch((err) => console.error(err)); // gestisce errori
+
+        axios
+            .get("http://127.0.0.1:8000/travels/stats", { headers })
+            .then((res) => setTravelStats(res.data))
+            .catch((err) => console.error(err));
     }, []);
 
     // funzione per il logout
     const handleLogout = () => {
+        // revoco il token anche sul server (senza attendere la risposta)
+        fetch("http://127.0.0.1:8000/users/logout", {
+          method: "POST",
+          headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+        }).catch(() => {});
+
         // rimuovo token e dati utente
         localStorage.removeItem('token');
         localStorage.removeItem('userId');
@@ -150,6 +159,7 @@ function ProfileController() {
     return {
         user,                    // dati utente
         recentTravels,           // viaggi recenti
+        travelStats,             // statistiche dei viaggi
         deleteProfileId,         // id profilo da eliminare
         message,                 // messaggi di errore/successo
         showEditModal,           // mostra/nasconde modale di modifica
@@ -35,7 +35,7 @@ function TravelDaysController() {
     // prendo con un array tutte le immagini delle tappe
     const heroImages = useMemo(() => {
         const imgs = travel?.days
-            ?.flatMap(d => d.photo || []) // utilizzo flatMap per ciclare sugli array delle tappe
+            ?.flatMap(d => d.photo_variants?.length ? d.photo_variants.map(v => v.medium) : d.photo || []) // utilizzo flatMap per ciclare sugli array delle tappe (variante media se disponibile)
             .filter(Boolean);
 
         return imgs?.length ? shuffleArray(imgs) : ["/fallback.jpg"]; // richiamo la funzione shuffleArray per rimescolare le foto
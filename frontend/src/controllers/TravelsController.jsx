@@ -2,8 +2,11 @@ import { useEffect, useState, useRef, useMemo } from "react";
 import { FaStar } from "react-icons/fa";
 import axios from "axios";
 
+const TRAVELS_PAGE_SIZE = 12; // viaggi per pagina: i successivi si caricano scorrendo il carosello
+
 function TravelsController() {
     const [travels, setTravels] = useState([]); // stato per i viaggi
+    const [allYears, setAllYears] = useState([]); // stato per gli anni dei viaggi (calcolati dal backend)
     const [deleteId, setDeleteId] = useState(null); // stato per l'id del viaggio da eliminare
     const [message, setMessage] = useState(""); // messaggio di successo o errore
     const [activeCard, setActiveCard] = useState(null); // stato per aprire una card dei viaggi e mostare le altre informazioni
@@ -12,27 +15,24 @@ function TravelsController() {
     const [openMenuId, setOpenMenuId] = useState(null); // stato per aprire / chiudere il dropdown menù
     const [leftLabel, setLeftLabel] = useState("Scorri a sinistra"); // stato per lo scorrimento a sinistra
     const [rightLabel, setRightLabel] = useState("Scorri a destra"); // stato per lo scorrimento a destra
+    const [nextCursor, setNextCursor] = useState(null); // cursore della pagina successiva (header X-Next-Cursor), null se non ce ne sono altre
+    const [loadingMore, setLoadingMore] = useState(false); // stato per il caricamento della pagina successiva
 
     const scrollRef = useRef(null); // mi permette di fare lo scroll del carosello
     const cardRefs = useRef({});    // oggetto per salvare i ref di tutte le card
     const menuRef = useRef(null);   // mi permette di chiudere il menù dropdown cliccando in ogni punto
+    const requestRef = useRef(0);   // numero della richiesta in corso: ignoro le pagine arrivate dopo un cambio di anno
+    const loadingRef = useRef(false); // evita di chiedere due volte la stessa pagina durante lo scroll
 
 
-    // Lista di tutte gli anni nella select
-    const allYears = travels
-        ? [...new Set(travels.map(d => d.year))].sort((a, b) => b - a) // anni unici in ordine decrescente
-        : [];
-
     // converte gli anni (interi) in stringhe
     const yearOptions = allYears.map(y => ({
         value: y,
         label: y.toString(), // la select mostra sempre stringhe
     }));
 
-    // Funzione per filtrare i viaggi in base agli anni
-    const filteredTravels = selectedYear
-        ? travels.filter(d => d.year === selectedYear)
-        : travels; // se nessun anno selezionato, mostra tutti
+    // i viaggi arrivano già filtrati per anno dal backend
+    const filteredTravels = travels;
 
 
     // Funzione per ottenere il carosello delle immagini per l'hero
@@ -41,7 +41,8 @@ function TravelsController() {
             .map(v => ({
                 id: v.id,
                 town: v.town,
-                image: v.days?.[0]?.photo?.[0] || null
+                // variante media della prima foto (URL originale per le foto senza varianti)
+                image: v.days?.[0]?.photo_variants?.[0]?.medium || v.days?.[0]?.photo?.[0] || null
             }))
             .filter(v => v.image);
     }, [travels]);
@@ -91,21 +92,81 @@ function TravelsController() {
         }
     }, [activeCard]);
 
-    // uso lo useEffect per ottenere i dati dei viaggi
+    // uso lo useEffect per ottenere gli anni dei viaggi per la select
     useEffect(() => {
         const token = localStorage.getItem("token"); // recupera il token JWT
         if (!token) return; // se non c'è token, non faccio nulla
 
         axios
-            .get("http://127.0.0.1:8000/travels", {
+            .get("http://127.0.0.1:8000/travels/years", {
                 headers: {
                     Authorization: `Bearer ${token}`, //  token nell'header
                 },
             })
-            .then((res) => setTravels(res.data)) // aggiorna lo stato con i dati ricevuti
+            .then((res) => setAllYears(res.data)) // anni unici in ordine decrescente
             .catch((err) => console.error(err)); // gestisce errori
     }, []);
 
+    // funzione per ottenere una pagina di viaggi (solo quelli dell'anno selezionato, se presente)
+    const fetchTravelsPage = (token, cursor) => {
+        const params = { limit: TRAVELS_PAGE_SIZE };
+        if (selectedYear !== null) params.year = selectedYear; // filtro per anno lato server
+        if (cursor) params.cursor = cursor; // riparto dall'ultimo viaggio della pagina precedente
+
+        return axios.get("http://127.0.0.1:8000/travels", {
+            headers: {
+                Authorization: `Bearer ${token}`, //  token nell'header
+            },
+            params,
+        });
+    };
+
+    // uso lo useEffect per ottenere la prima pagina dei viaggi, di nuovo a ogni cambio di anno
+    useEffect(() => {
+        const token = localStorage.getItem("token"); // recupera il token JWT
+        if (!token) return; // se non c'è token, non faccio nulla
+
+        const request = ++requestRef.current;
+        setNextCursor(null);
+        fetchTravelsPage(token, null)
+            .then((res) => {
+                if (request !== requestRef.current) return; // nel frattempo è cambiato l'anno
+                setTravels(res.data); // aggiorna lo stato con i dati ricevuti
+                setNextCursor(res.headers["x-next-cursor"] || null);
+            })
+            .catch((err) => console.error(err)); // gestisce errori
+    }, [selectedYear]);
+
+    // con questa aggiungo la pagina successiva dei viaggi in fondo al carosello
+    const loadMoreTravels = () => {
+        const token = localStorage.getItem("token"); // recupera il token JWT
+        if (!token || !nextCursor || loadingRef.current) return; // nessuna pagina da caricare o già in caricamento
+
+        const request = requestRef.current;
+        loadingRef.current = true;
+        setLoadingMore(true);
+        fetchTravelsPage(token, nextCursor)
+            .then((res) => {
+                if (request !== requestRef.current) return; // nel frattempo è cambiato l'anno
+                setTravels((prev) => [...prev, ...res.data]);
+                setNextCursor(res.headers["x-next-cursor"] || null);
+            })
+            .catch((err) => console.error(err)) // gestisce errori
+            .finally(() => {
+                loadingRef.current = false;
+                setLoadingMore(false);
+            });
+    };
+
+    // scroll infinito: vicino alla fine del carosello carico i viaggi successivi
+    const handleCarouselScroll = () => {
+        const scrollContainer = scrollRef.current;
+        if (!scrollContainer) return;
+        if (scrollContainer.scrollLeft + scrollContainer.clientWidth >= scrollContainer.scrollWidth - 990) {
+            loadMoreTravels();
+        }
+    };
+
     // con questa cancello tutti i dati del viaggio
     const handleDelete = () => {
         const token = localStorage.getItem("token"); // recupera il token JWT
@@ -188,7 +249,10 @@ function TravelsController() {
         if (!scrollRef.current) return;
         const scrollContainer = scrollRef.current;
 
-        if (scrollContainer.scrollLeft + scrollContainer.clientWidth >= scrollContainer.scrollWidth) {
+        if (scrollContainer.scrollLeft + scrollContainer.clientWidth >= scrollContainer.scrollWidth && nextCursor) {
+            // siamo alla fine ma ci sono altri viaggi: li carico invece di tornare all'inizio
+            loadMoreTravels();
+        } else if (scrollContainer.scrollLeft + scrollContainer.clientWidth >= scrollContainer.scrollWidth) {
             // siamo all'inzio, salto alla fine
             scrollContainer.scrollTo({ left: 0, behavior: "smooth" });
             setLeftLabel("Vai all'ultimo viaggio");
@@ -249,7 +313,11 @@ function TravelsController() {
         setOpenMenuId,     //  stato per indicare l'apertura del menù dropdown
         menuRef,           // mi permette di chiudere il menù dropdown cliccando in ogni punto
         leftLabel,         // indica che scorre a sinistra
-        rightLabel         // indica che scorre a destra
+        rightLabel,        // indica che scorre a destra
+        hasMoreTravels: nextCursor !== null, // ci sono altri viaggi da caricare
+        loadingMore,       // pagina successiva in caricamento
+        loadMoreTravels,   // funzione per caricare la pagina successiva
+        handleCarouselScroll // carica la pagina successiva vicino alla fine del carosello
     }
 }
 
@@ -21,6 +21,8 @@ function ChatAI() {
         messagesEndRef,     // per fare lo scroll automatico
         startNewChat,       // funzione per iniziare una nuova chat
         chats,              // indica le chat caricate
+        loadMoreChats,      // funzione per caricare le chat successive
+        hasMoreChats,       // indica se ci sono altre chat da caricare
         loadChat,           // funzione per caricare le chat
         message,            // messaggio di conferma o errore
         handleDelete,       // funzione per eliminare la chat
@@ -39,6 +41,8 @@ function ChatAI() {
                 isOpen={isChatListOpen}
                 onClose={() => setIsChatListOpen(false)}
                 chats={chats}
+                hasMore={hasMoreChats}
+                loadMore={loadMoreChats}
                 loadChat={loadChat}
                 startNewChat={startNewChat}
                 setDeleteId={setDeleteId}
@@ -91,12 +91,12 @@ function EditDay() {
           <div>
             <label className="block font-bold text-white mb-2">Data</label>
             <input
-              type="text"
+              type="date"
               name="date"
               value={day.date}
               onChange={handleChange}
               className="w-full p-2 font-semibold border border-white/40 rounded-full bg-white/10 text-white placeholder-white/70 
-              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition"
+              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition scheme-dark"
             />
           </div>
 
@@ -80,12 +80,12 @@ function EditTravel() {
           <div>
             <label className="block font-bold text-white mb-2">Data Inizio</label>
             <input
-              type="text"
+              type="date"
               name="start_date"
               value={travel.start_date}
               onChange={handleChange}
               className="w-full p-2 font-semibold border border-white/40 rounded-full bg-white/10 text-white placeholder-white/70 
-              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition "
+              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition scheme-dark"
             />
           </div>
 
@@ -93,12 +93,12 @@ function EditTravel() {
           <div>
             <label className="block font-bold text-white mb-2">Data Fine</label>
             <input
-              type="text"
+              type="date"
               name="end_date"
               value={travel.end_date}
               onChange={handleChange}
               className="w-full p-2 font-semibold border border-white/40 rounded-full bg-white/10 text-white placeholder-white/70 
-              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition"
+              focus:ring-2 focus:ring-orange-400 dark:focus:ring-blue-400 focus:border-transparent transition scheme-dark"
             />
           </div>
         </div>
@@ -4,12 +4,15 @@ import { FaCheckCircle, FaArrowRight, FaCompass, FaEdit, FaGlobe, FaPlus, FaSign
 import EditProfileModal from "../components/Modals/EditProfileModal"; // importo il modale di modifica profilo
 import ModalDeleteProfile from "../components/DeleteModals/ModalDeleteProfile"; // importo il modale di conferma eliminazione profilo
 import ProfileController from "../controllers/ProfileController"; // importo la logica della pagina profilo
+import WorldMap from "../components/WorldMap"; // importo la mappa
+import { formatDate } from "../utils/dates"; // mostro le date ISO come DD-MM-YYYY
 
 function ProfilePage() {
 
   const {
     user,                      // dati utente
     recentTravels,             // viaggi recenti
+    travelStats,               // statistiche dei viaggi
     deleteProfileId,           // id del profilo da eliminare
     message,                   // messaggi di errore/successo
     showEditModal,             // stato del modale di modifica
@@ -210,7 +213,7 @@ function ProfilePage() {
                         </h4>
 
                         <span className="text-sm bg-white/20 px-4 py-2 rounded-3xl text-white inline-flex items-center gap-2">
-                          {travel.start_date} <FaArrowRight size={12} /> {travel.end_date}
+                          {formatDate(travel.start_date)} <FaArrowRight size={12} /> {formatDate(travel.end_date)}
                         </span>
                       </div>
                       <div className="border-t border-white/40 my-2 pt-1" />
@@ -235,6 +238,60 @@ function ProfilePage() {
             </motion.div>
           </motion.section>
 
+          {/*  STATISTICHE DEI VIAGGI */}
+          {travelStats?.trips ? (
+            <motion.div
+              className="bg-linear-to-br from-white/20 via-white/10 to-transparent backdrop-blur-2xl
+              p-6 rounded-3xl shadow-2xl border border-white/40 transition-all duration-500 hover:scale-105
+              hover:shadow-[0_0_30px_rgba(255,255,255,0.40)]"
+              initial={{ x: -80, opacity: 0 }}
+              animate={{ x: 0, opacity: 1 }}
+              transition={{ duration: 1, ease: "easeOut" }}>
+
+              <h3 className="text-2xl font-bold text-white text-center mb-4 drop-shadow">
+                I tuoi numeri
+              </h3>
+
+              <div className="grid grid-cols-3 gap-2 text-center mb-4">
+                {[
+                  ["Paesi", travelStats.countries_count],
+                  ["Viaggi", travelStats.trips],
+                  ["Tappe", travelStats.days],
+                ].map(([label, value]) => (
+                  <div key={label} className="bg-white/20 rounded-3xl px-4 py-2">
+                    <p className="text-2xl font-bold text-white">{value}</p>
+                    <p className="text-sm text-white/80">{label}</p>
+                  </div>
+                ))}
+              </div>
+
+              {travelStats.average_vote ? (
+                <div className="flex justify-center items-center gap-2 mb-3">
+                  <StarRating rating={travelStats.average_vote} />
+                  <span className="text-white/80 text-sm">media dei tuoi viaggi</span>
+                </div>
+              ) : null}
+
+              {/* viaggi per anno */}
+              <div className="flex flex-wrap justify-center gap-2">
+                {travelStats.per_year.map((year) => (
+                  <span
+                    key={year.year}
+                    className="text-sm bg-white/20 px-4 py-2 rounded-3xl text-white">
+                    {year.year}: {year.trips} {year.trips === 1 ? "viaggio" : "viaggi"}, {year.days} {year.days === 1 ? "tappa" : "tappe"}
+                  </span>
+                ))}
+              </div>
+
+              {/* tutte le tappe sulla mappa, raggruppate dal backend */}
+              {travelStats.days ? (
+                <div className="flex justify-center mt-4">
+                  <WorldMap serverMarkers={true} />
+                </div>
+              ) : null}
+            </motion.div>
+          ) : null}
+
           {/*  ESPERIENZE UTENTE */}
           <motion.div
             className="bg-linear-to-br from-white/20 via-white/10 to-transparent backdrop-blur-2xl
@@ -6,6 +6,7 @@ import DaysExperiencesSelect from "../components/Selects/DaysExperiencesSelect";
 import DayInfoModal from "../components/Modals/DayInfoModal"; // importo il modale Scopri di più
 import ModalDeleteDay from "../components/DeleteModals/ModalDeleteDay"; // importo il modale di conferma eliminazione tappa
 import TravelDaysController from "../controllers/TravelDaysController"; // importo la logica della pagina TravelDays
+import { formatDate } from "../utils/dates"; // mostro le date ISO come DD-MM-YYYY
 
 function TravelDays() {
 
@@ -81,9 +82,9 @@ function TravelDays() {
             </h1>
 
             <p className="mt-3 text-xl sm:text-2xl font-semibold text-white/90 flex justify-center items-center gap-2">
-              {travel.start_date}
+              {formatDate(travel.start_date)}
               <FaArrowRight />
-              {travel.end_date}
+              {formatDate(travel.end_date)}
             </p>
           </div>
         </div>
@@ -227,7 +228,7 @@ function TravelDays() {
                                     {d.title?.length > 10 ? `${d.title.slice(0, 10)}...` : d.title}
                                   </p>
                                   <p className="text-white text-2xl font-bold opacity-80 drop-shadow-md mt-2">
-                                    {d.date}
+                                    {formatDate(d.date)}
                                   </p>
                                 </div>
 
@@ -306,7 +307,7 @@ function TravelDays() {
                                   {d.photo.slice(0, 2).map((p, i) => (
                                     <img
                                       key={i}
-                                      src={p}
+                                      src={d.photo_variants?.[i]?.thumb || p} // anteprima leggera se disponibile
                                       className="w-37 h-28 sm:w-48 object-cover rounded-2xl border border-white/40 shadow-md"
                                     />
                                   ))}
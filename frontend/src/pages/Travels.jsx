@@ -4,6 +4,7 @@ import { FaPlus, FaArrowDown, FaArrowLeft, FaArrowRight, FaRegImage, FaCalendarD
 import YearSelect from "../components/Selects/YearSelect"; // importo la select per gli anni
 import ModalDeleteTravel from "../components/DeleteModals/ModalDeleteTravel"; // importo il modale di conferma eliminazione viaggio
 import TravelsController from "../controllers/TravelsController"; // importo la logica della pagina viaggi
+import { formatDate } from "../utils/dates"; // mostro le date ISO come DD-MM-YYYY
 
 function Travels() {
 
@@ -29,7 +30,11 @@ function Travels() {
     setOpenMenuId,           //  stato per indicare l'apertura del menù dropdown
     menuRef,                 // mi permette di chiudere il menù dropdown cliccando in ogni punto
     leftLabel,               // indica che scorre a sinistra
-    rightLabel               // indica che scorre a destra
+    rightLabel,              // indica che scorre a destra
+    hasMoreTravels,          // ci sono altri viaggi da caricare
+    loadingMore,             // pagina successiva in caricamento
+    loadMoreTravels,         // carica la pagina successiva
+    handleCarouselScroll     // scroll infinito del carosello
   } = TravelsController();   // uso la logica della pagina viaggi
 
 
@@ -158,6 +163,7 @@ function Travels() {
                 {/* LISTA SCORREVOLE */}
                 <motion.div
                   ref={scrollRef}
+                  onScroll={handleCarouselScroll} // carica altri viaggi vicino alla fine
                   className={`flex items-start gap-6 overflow-x-auto no-scrollbar px-6 py-4 scroll-smooth snap-x snap-mandatory
                   ${activeCard ? "overflow-x-hidden" : "overflow-x-auto"}`} // questo impedisce lo scroll quando una card è aperta
                   variants={{
@@ -196,7 +202,7 @@ function Travels() {
                           {v.days && v.days[0]?.photo?.[0] ? (
                             <div className="relative overflow-hidden">
                               <img
-                                src={v.days[0].photo[0]}
+                                src={v.days[0].photo_variants?.[0]?.thumb || v.days[0].photo[0]} // anteprima leggera se disponibile
                                 alt={`Foto di ${v.town}`}
                                 className="w-full h-52 object-cover transition-transform duration-300"
                               />
@@ -273,7 +279,7 @@ function Travels() {
                             <div className="flex flex-col sm:flex-row justify-between sm:items-center items-start gap-3 mt-2">
                               <div>
                                 <p className="text-white sm:text-2xl text-xl font-semibold inline-flex items-center gap-2">
-                                  {v.start_date} <FaArrowRight size={20} /> {v.end_date}
+                                  {formatDate(v.start_date)} <FaArrowRight size={20} /> {formatDate(v.end_date)}
                                 </p>
                               </div>
 
@@ -348,6 +354,20 @@ function Travels() {
                     })}
                   </AnimatePresence>
                 </motion.div>
+
+                {/* Altri viaggi (anche senza scroll, es. da tastiera o con pochi viaggi visibili) */}
+                {hasMoreTravels && !activeCard && (
+                  <div className="flex justify-center mt-2">
+                    <button
+                      onClick={loadMoreTravels}
+                      disabled={loadingMore}
+                      className="px-5 py-2 rounded-full bg-white/20 hover:bg-white backdrop-blur-xl cursor-pointer
+                      text-white hover:text-black border border-white/50 text-sm font-semibold shadow-lg
+                      transition-all duration-300 disabled:opacity-50 disabled:cursor-wait">
+                      {loadingMore ? "Caricamento..." : "Carica altri viaggi"}
+                    </button>
+                  </div>
+                )}
               </div>
             ) : (
               <p className="font-semibold text-center mt-8 px-4 py-2 backdrop-blur-md rounded-full 
@@ -0,0 +1,6 @@
+// il backend restituisce le date in formato ISO (YYYY-MM-DD): le mostro come DD-MM-YYYY
+export function formatDate(isoDate) {
+    if (!isoDate) return "";
+    const [year, month, day] = isoDate.split("-");
+    return day && month && year ? `${day}-${month}-${year}` : isoDate; // se non è ISO la mostro così com'è
+}